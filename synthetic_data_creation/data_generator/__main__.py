@@ -0,0 +1,155 @@
+"""
+Builds a book of households from the command line, no notebook needed:
+
+    python -m data_generator build 250000 --years 1 20 --seed 498 --workers 32 --out ./data_result
+
+The rows go straight into a Parquet dataset partitioned by split (see parquet_writer.py), the same layout
+Data_Creation.ipynb gets from df.to_parquet(), in row groups of --batch-size rows no matter how big the shards are.
+While it runs it prints households/sec, rows/sec, how long is left and the peak memory of the writing process, every
+few seconds. --panel and --instruments switch on the yearly panel
+(see panel.py) and the per phase timings (see instrumentation.py). --batched-start starts each shard's households
+together (see life_history.py).
+
+    python -m data_generator features ./data_result ./nn_features
+
+turns each split of a built dataset into the NN research inputs, ready to load as ragged tensors (see ragged_features.py).
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from .benchmark import peak_rss
+from .build import build, SHARD_SIZE
+from .ids import id_shard
+from .parquet_writer import parquet_writer, assign_batch_splits, ROW_GROUP_SIZE
+
+
+def format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02}:{seconds:02}'
+
+
+class progress:
+    """Keeps count of what's been built and prints how it's going at most every `every` seconds"""
+
+    def __init__(self, total, every=5.0, out=sys.stderr):
+        self.total = total
+        self.every = every
+        self.out = out
+        self.households = 0
+        self.rows = 0
+        self.start = time.perf_counter()
+        self._printed = self.start
+        # On a terminal the line gets rewritten in place, in a batch job's log every update gets its own line
+        self._end = '\r' if out.isatty() else '\n'
+
+    def update(self, households, rows):
+        """households is how many are done so far, rows how many more got written"""
+        self.households = households
+        self.rows += rows
+
+        now = time.perf_counter()
+        if now - self._printed >= self.every or self.households == self.total:
+            self._printed = now
+            print(self.line(now), end=self._end, file=self.out, flush=True)
+
+    def line(self, now=None):
+        seconds = (now or time.perf_counter()) - self.start
+        households_per_sec = self.households / seconds if seconds else 0
+        rows_per_sec = self.rows / seconds if seconds else 0
+        left = (self.total - self.households) / households_per_sec if households_per_sec else 0
+        memory = peak_rss()
+
+        return (
+            f'{self.households:,}/{self.total:,} households  {households_per_sec:,.0f} households/sec  '
+            f'{rows_per_sec:,.0f} rows/sec  ETA {format_seconds(left)}'
+            + ('' if memory is None else f'  peak RSS {memory:,.0f}MB')
+        )
+
+    def finish(self):
+        if self._end == '\r':
+            print(file=self.out)
+
+
+def run_build(args):
+    years = args.years[0] if len(args.years) == 1 else tuple(args.years)
+    rng = np.random.default_rng(args.seed)
+
+    run = None
+    if args.instruments:
+        from .instrumentation import instruments
+        run = instruments()
+
+    status = progress(args.households, args.every)
+
+    with parquet_writer(args.out, row_group_size=args.batch_size) as writer:
+        shards = build(args.households, args.seed, years, args.shard_size, args.workers, run, args.panel, batches=True,
+                       batched_start=args.batched_start)
+        for batch in shards:
+            # Shards without rows get skipped, so go by the shard the last household's id says this one is
+            index = id_shard(int(batch.column('household_id')[-1].as_py(), 16))
+            done = min((index // args.shard_size + 1) * args.shard_size, args.households)
+
+            writer.write_batch(assign_batch_splits(batch, rng))
+            status.update(done, batch.num_rows)
+            del batch
+
+    if status.households != args.households:
+        status.update(args.households, 0)
+    status.finish()
+    print(
+        f'{status.households:,} households, {writer.rows_written:,} rows written to {args.out} '
+        f'in {format_seconds(time.perf_counter() - status.start)}'
+    )
+
+    if run is not None:
+        print(run.format_report())
+
+    return writer.rows_written
+
+
+def run_features(args):
+    from .ragged_features import export_splits
+
+    for split, rows in export_splits(args.dataset, args.out, args.compress).items():
+        print(f'{split}: {rows:,} rows written to {args.out}/{split}.npz')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m data_generator', description='Synthetic insurance data generator')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('build', help='build households and write their rows to a Parquet dataset')
+    command.add_argument('households', type=int, help='how many households to build')
+    command.add_argument('--years', type=int, nargs='+', default=[1, 20],
+                         help='years to move every household forward, or a low high range to pick from')
+    command.add_argument('--seed', type=int, default=0)
+    command.add_argument('--workers', type=int, help='processes to build in, every core by default')
+    command.add_argument('--out', default='./data_result', help='directory to write the dataset to')
+    command.add_argument('--batch-size', type=int, default=ROW_GROUP_SIZE,
+                         help='rows per Parquet row group, each split holds up to this many rows before writing them')
+    command.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='households a worker builds at a time')
+    command.add_argument('--panel', help='directory to also write the yearly panel to')
+    command.add_argument('--batched-start', action='store_true',
+                         help='start each shard at once with a PopulationEngine, faster, but the rows are not draw '
+                              'for draw the same as a normal build (see build.build())')
+    command.add_argument('--instruments', action='store_true', help='time every phase and print a report at the end')
+    command.add_argument('--every', type=float, default=5.0, help='seconds between progress lines')
+    command.set_defaults(run=run_build)
+
+    command = commands.add_parser('features', help='save the NN inputs of every split of a built dataset')
+    command.add_argument('dataset', help='directory build wrote the dataset to')
+    command.add_argument('out', help='directory to save {split}.npz to')
+    command.add_argument('--compress', action='store_true')
+    command.set_defaults(run=run_features)
+
+    args = parser.parse_args(args)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Works out who drives which vehicle from a humans x vehicles matrix of interest.
+
+human.vehicle_interest() looks at one human and one vehicle at a time, so the vehicle's age curve, the household's
+count of young kids, and (for kids) a sort of every vehicle's value get redone for every pair.
+interest_matrix() works those out once per vehicle/fleet and fills in the whole matrix in one pass, and
+allocate_vehicles() runs the same rules as household.determine_veh_assignements() on top of that matrix.
+
+The matrices are plain lists of rows, households rarely have more than a handful of drivers and vehicles and NumPy's
+overhead per call costs more than the math at that size.
+"""
+
+from .codes import MALE, FEMALE
+
+
+def vehicle_terms(veh, parents):
+    """
+    The parts of human.vehicle_interest() that only depend on the vehicle, and if the household has young kids:
+    (base interest, male, female, young driver, parent multipliers)
+    """
+
+    # No one wants to drive an older car!
+    base = max(
+        2
+        + 0.05 * max(5 - veh.age, 0)
+        - 0.05 * max(veh.age - 5, 0)
+        + 0.025 * max(veh.age - 15, 0)
+        + 0.02 * max(veh.age - 20, 0),
+        0.25
+    )
+
+    return (
+        base,
+        1 + veh.male_interest,
+        1 + veh.female_interest,
+        1 + veh.child_interest,
+        1 + veh.parent_interest if parents else None
+    )
+
+
+def kid_penalties(vehicles):
+    """
+    Kids don't want to drive the fancy car! Multipliers for (kids, kids 21 and under) for each vehicle, None if there isn't one.
+    These depend on the rest of the fleet, the vehicle values only get sorted once for everybody.
+    """
+
+    veh_values = sorted([x.value for x in vehicles], reverse=True)
+
+    penalties = []
+    for veh in vehicles:
+        if veh.value >= veh_values[0]:
+            penalties.append((0.25, 0.25))
+        elif len(vehicles) > 1 and veh.value >= veh_values[1]:
+            penalties.append((0.35, 0.35))
+        elif veh.value > 15_000:
+            penalties.append((None, 0.5))
+        else:
+            penalties.append((None, None))
+
+    return penalties
+
+
+def interest_matrix(humans, vehicles, household, terms=None):
+    """
+    human.vehicle_interest(veh, vehicles) for every human and vehicle, as a list of rows (one row per human).
+    terms can be passed in if the vehicle_terms() of these vehicles are already known.
+    """
+
+    if terms is None:
+        parents = household.child_count_lt_18 > 0
+        terms = [vehicle_terms(x, parents) for x in vehicles]
+
+    penalties = None
+    matrix = []
+
+    for human in humans:
+        is_kid = type(human).__name__ == 'child'
+        gender, age = human.gender, human.age
+
+        if is_kid and penalties is None:
+            penalties = kid_penalties(vehicles)
+
+        row = []
+        for j, (base, male, female, young, parent) in enumerate(terms):
+            interest = base
+
+            if gender == MALE:
+                interest *= male
+            if gender == FEMALE:
+                interest *= female
+            if age <= 25:
+                interest *= young
+            if parent is not None:
+                interest *= parent
+
+            if is_kid:
+                penalty = penalties[j][1] if age <= 21 else penalties[j][0]
+                if penalty is not None:
+                    interest *= penalty
+
+            row.append(interest)
+
+        matrix.append(row)
+
+    return matrix
+
+
+def allocate_vehicles(household, drivers, vehicles, interest):
+    """
+    Share of each vehicle's driving done by each driver, as a list of rows (one row per driver).
+    interest is interest_matrix(drivers, vehicles, household).
+    """
+
+    veh_cnt = len(vehicles)
+
+    if veh_cnt <= 1:
+        # Everyone drives that car
+        return [[1] * veh_cnt for driver in drivers]
+
+    rows = {x.id: i for i, x in enumerate(drivers)}
+
+    def first_pick(human):
+        preferences = interest[rows[human.id]] if human.id in rows else interest_matrix([human], vehicles, household)[0]
+        return preferences.index(max(preferences))
+
+    # Looking for the second pick hands back the top pick again, so runner up cars never get claimed
+    hoh_first_pick = first_pick(household.head_of_household)
+
+    if household.significant_other is None:
+        # Driver gets to drive everything, find their favorite
+        rest = 0.15 if veh_cnt == 2 else 0.05/(veh_cnt - 2)
+        return [[0.85 if i == hoh_first_pick else rest for i in range(veh_cnt)] for driver in drivers]
+
+    # Got to pick which driver gets each car, both parents end up with their favorite
+    so_first_pick = first_pick(household.significant_other)
+
+    allocation = [[0] * veh_cnt for driver in drivers]
+    rest = 0.15/(veh_cnt - 1)
+    for parent, pick in [(household.head_of_household, hoh_first_pick), (household.significant_other, so_first_pick)]:
+        if parent.id in rows:
+            allocation[rows[parent.id]] = [0.85 if i == pick else rest for i in range(veh_cnt)]
+
+    if len(drivers) > 2:
+        claimed_cars = [hoh_first_pick, so_first_pick]
+        other_drivers = [rows[x.id] for x in household.children if x.is_driving_age]
+
+        preferences = [[interest[k][i] ** 2 if i not in claimed_cars else (0.75 * interest[k][i]) ** 2
+                        for i in range(veh_cnt)]
+                       for k in other_drivers]
+        balanced_preferences = [[x/total for x in y] for y, total in zip(preferences, map(sum, preferences))]
+        sum_of_veh_pref = [sum(x[i] for x in preferences) for i in range(veh_cnt)]
+
+        allocated_preferences = [[x/sum_of_veh_pref[i] for i, x in enumerate(y)] for y in balanced_preferences]
+        for k, y in zip(other_drivers, allocated_preferences):
+            total = sum(y)
+            allocation[k] = [x/total for x in y]
+
+    return allocation
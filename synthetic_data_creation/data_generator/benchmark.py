@@ -0,0 +1,321 @@
+"""
+Times the hot paths of building households, so performance work can be judged on numbers instead of guesses.
+
+Every scale builds households the same way build.household_rows() does (fixed seed, household number i draws from
+random_stream(seed, i)) and times each phase separately:
+
+    household               building the household, its whole starting life
+    move_forward_n_years    moving it forward 1 to 20 years
+    generate_claims         time inside household.generate_claims() (also counted in the two phases above)
+    update_vehicles         time inside household.update_vehicles() (also counted in the two phases above)
+    summary                 household.summary
+    summary_per_vehicle     household.summary_per_vehicle
+
+For each phase it reports households/sec (rows/sec for the summaries). The four top level phases also report how many
+times the garbage collector kicked in (every collection means ~700 more container objects were allocated than freed),
+the net change in allocated memory blocks (sys.getallocatedblocks(), what the phase left behind, which is negative when
+it freed more than it made, not how many allocations it did) and how much the phase pushed up the peak RSS. The two
+nested phases run inside of the others, so they only get their time, their memory is in the phase around them.
+
+--trace-memory also runs tracemalloc and reports the most memory each top level phase had allocated at once on top of
+what was there when it started (peak_traced_kb). Tracing makes everything several times slower, so the timings of a
+traced run can't be compared with an untraced one. Each scale runs in a fresh process so its peak RSS is its own.
+
+Results go to a JSON file that can be compared against a run from another commit:
+
+    python -m data_generator.benchmark --scales 1000 10000 --out after.json --compare before.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Not on Windows, peak RSS just doesn't get reported there
+    resource = None
+
+from .household import household
+from .rng import random_stream
+
+SCALES = (1_000, 10_000, 100_000)
+SEED = 498
+PHASES = ('household', 'move_forward_n_years', 'generate_claims', 'update_vehicles', 'summary', 'summary_per_vehicle')
+
+# household methods that run inside of the other phases, they get timed by wrapping the method for the run
+NESTED_PHASES = ('generate_claims', 'update_vehicles')
+
+
+def peak_rss():
+    """Peak resident memory of this process in MB, None where the resource module isn't around"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class gc_counter:
+    """Counts garbage collections while it's registered, each one means ~700 more container objects were made"""
+
+    def __init__(self):
+        self.collections = 0
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self.collections += 1
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+
+class benchmark_phase:
+    """
+    Totals for one phase, used as a context manager around every call that belongs to the phase.
+    A nested phase runs inside of another one and only keeps its time, see the top of the file.
+    """
+
+    def __init__(self, name, collections, nested=False):
+        self.name = name
+        self.collections = collections
+        self.nested = nested
+        self.seconds = 0
+        self.calls = 0
+        self.households = 0
+        self.rows = 0
+        self.net_blocks = 0
+        self.gc_collections = 0
+        self.rss_growth = 0
+        self.peak_traced = 0
+
+    def __enter__(self):
+        if not self.nested:
+            self._rss = peak_rss()
+            self._collections = self.collections.collections
+            self._blocks = sys.getallocatedblocks()
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+                self._traced = tracemalloc.get_traced_memory()[0]
+
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._start
+        self.calls += 1
+        if self.nested:
+            return None
+
+        self.net_blocks += sys.getallocatedblocks() - self._blocks
+        self.gc_collections += self.collections.collections - self._collections
+        if self._rss is not None:
+            self.rss_growth += peak_rss() - self._rss
+        if tracemalloc.is_tracing():
+            self.peak_traced = max(self.peak_traced, tracemalloc.get_traced_memory()[1] - self._traced)
+
+    def results(self):
+        return {
+            'seconds': self.seconds,
+            'calls': self.calls,
+            'households': self.households,
+            'households_per_sec': self.households / self.seconds if self.seconds else None,
+            'rows': self.rows,
+            'rows_per_sec': self.rows / self.seconds if self.rows and self.seconds else None,
+            'net_allocated_blocks': None if self.nested else self.net_blocks,
+            'gc_collections': None if self.nested else self.gc_collections,
+            'peak_rss_growth_mb': None if self.nested or peak_rss() is None else self.rss_growth,
+            'peak_traced_kb': self.peak_traced / 1024 if tracemalloc.is_tracing() and not self.nested else None
+        }
+
+
+def timed(phase, method):
+    def wrapper(*args, **kwargs):
+        with phase:
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def run_scale(n, seed=SEED, years=(1, 20), trace_memory=False):
+    """
+    Builds, moves forward and summarizes n households one at a time and times every phase.
+    Households are let go as soon as they're summarized, like build.iter_vehicle_rows(), so memory stays flat.
+    """
+
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+
+    with gc_counter() as collections:
+        phases = {name: benchmark_phase(name, collections, name in NESTED_PHASES) for name in PHASES}
+        originals = {name: household.__dict__[name] for name in NESTED_PHASES}
+        for name, method in originals.items():
+            setattr(household, name, timed(phases[name], method))
+
+        try:
+            for index in range(n):
+                with phases['household']:
+                    x = household(random_stream(seed, index))
+
+                with phases['move_forward_n_years']:
+                    x.move_forward_n_years(years if isinstance(years, int) else x.rng.randint(*years))
+
+                # Same households that build.household_rows() puts out rows for
+                if x.inforce and x.driver_count > 0:
+                    with phases['summary']:
+                        x.summary
+                    phases['summary'].households += 1
+                    phases['summary'].rows += 1
+
+                    with phases['summary_per_vehicle']:
+                        rows = x.summary_per_vehicle
+                    phases['summary_per_vehicle'].households += 1
+                    phases['summary_per_vehicle'].rows += len(rows)
+
+                # Let the household go outside of the phases, so freeing it isn't counted against the next household
+                x = rows = None
+
+        finally:
+            for name, method in originals.items():
+                setattr(household, name, method)
+
+    for name in ('household', 'move_forward_n_years', *NESTED_PHASES):
+        phases[name].households = n
+
+    seconds = time.perf_counter() - start
+    results = {
+        'households': n,
+        'seconds': seconds,
+        'households_per_sec': n / seconds,
+        'peak_rss_mb': peak_rss(),
+        'trace_memory': trace_memory,
+        'phases': {name: phase.results() for name, phase in phases.items()}
+    }
+
+    if trace_memory:
+        tracemalloc.stop()
+
+    return results
+
+
+def git_commit():
+    """The commit the benchmark ran on, None if this isn't a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(__file__), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales=SCALES, seed=SEED, years=(1, 20), isolate=True, trace_memory=False):
+    """
+    Runs every scale and returns the results (what gets saved as JSON).
+    isolate=True runs each scale in a fresh process so peak RSS isn't carried over from the scale before it.
+    """
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'years': years,
+        'scales': []
+    }
+
+    for n in scales:
+        if isolate:
+            with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+                results['scales'].append(pool.submit(run_scale, n, seed, years, trace_memory).result())
+        else:
+            results['scales'].append(run_scale(n, seed, years, trace_memory))
+
+        report(results['scales'][-1])
+
+    return results
+
+
+def report(scale):
+    print(f"{scale['households']:,} households in {scale['seconds']:.1f}s, peak RSS {scale['peak_rss_mb'] or 0:.0f}MB")
+    for name, phase in scale['phases'].items():
+        rate = f"{phase['rows_per_sec']:>12,.0f} rows/sec" if phase['rows_per_sec'] else ''
+        print(f"    {name:<22}{phase['seconds']:>9.2f}s{phase['households_per_sec'] or 0:>12,.0f} households/sec{rate}")
+
+
+def compare(before, after):
+    """
+    Speedup of every phase between two saved runs, for the scales both of them ran.
+    {households: {phase: before seconds per household / after seconds per household}}, above 1 means after is faster.
+    """
+
+    speedups = {}
+    earlier = {x['households']: x for x in before['scales']}
+
+    for scale in after['scales']:
+        if scale['households'] not in earlier:
+            continue
+
+        old = earlier[scale['households']]['phases']
+        speedups[scale['households']] = {
+            name: phase['households_per_sec'] / old[name]['households_per_sec']
+            for name, phase in scale['phases'].items()
+            if name in old and phase['households_per_sec'] and old[name]['households_per_sec']
+        }
+
+    return speedups
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Times the household simulation phases at a few population sizes')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(SCALES))
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 20],
+                        help='years to move forward, or a low high range to pick from')
+    parser.add_argument('--out', help='JSON file to save the results to')
+    parser.add_argument('--compare', help='JSON file from an earlier run to compare against')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='report peak traced memory per phase, the run is a lot slower')
+    parser.add_argument('--no-isolate', dest='isolate', action='store_false',
+                        help='run every scale in this process')
+    args = parser.parse_args(args)
+
+    years = args.years[0] if len(args.years) == 1 else tuple(args.years)
+    results = run(args.scales, args.seed, years, args.isolate, args.trace_memory)
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)
+
+        for n, speedups in compare(before, results).items():
+            print(f'{n:,} households vs {args.compare}')
+            for name, speedup in speedups.items():
+                print(f'    {name:<22}{speedup:>6.2f}x')
+
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Builds a book of households spread over every core on the machine.
+
+The households are cut into fixed size shards that get built in a pool of processes. Every household gets its own
+random stream seeded from the build seed and the household's number, so the rows that come out are exactly the same
+whether the build runs on 1 worker or 64, or with a different shard size.
+Shards hand back their summary_per_vehicle rows instead of the household objects, pickling the whole object graph
+back to the parent costs more than building it!
+"""
+
+import os
+from collections import deque
+from contextlib import contextmanager, ExitStack
+from concurrent.futures import ProcessPoolExecutor
+
+from .household import household
+from .rng import random_stream
+
+SHARD_SIZE = 5_000
+
+
+def shard_sizes(n, shard_size=SHARD_SIZE):
+    """How many households go into each shard, only the last one can come up short"""
+    return [min(shard_size, n - start) for start in range(0, n, shard_size)]
+
+
+def household_rows(seed, index, years=(1, 20), started=None):
+    """
+    Builds household number index of a build and moves it forward, then hands back its summary_per_vehicle rows.
+    years is either a number of years or a (low, high) range to pick from, like Data_Creation.ipynb does.
+    started is the household when it's already been started (see life_history.start_households()).
+    Lapsed households and households without any drivers don't have any rows.
+    """
+
+    with household.instruments.profiled(index):
+        x = household(random_stream(seed, index)) if started is None else started
+        x.move_forward_n_years(years if isinstance(years, int) else x.rng.randint(*years))
+        rows = x.summary_per_vehicle if x.inforce and x.driver_count > 0 else []
+
+    household.instruments.count('rng_draws', x.rng.draws)
+    return rows
+
+
+@contextmanager
+def instrumented(run):
+    """
+    Switches on run's instruments (see instrumentation.py) for every household in this process during the with block.
+
+    with instrumented(instruments()) as run:
+        for rows in iter_vehicle_rows(10_000):
+            ...
+    """
+
+    previous = household.instruments
+    household.instruments = run
+    try:
+        yield run
+    finally:
+        household.instruments = previous
+
+
+def iter_vehicle_rows(n, seed=0, years=(1, 20), batch_size=10_000, start=0):
+    """
+    Builds households one at a time and yields their rows in batches of batch_size (the last batch can be smaller).
+    Each household is let go as soon as its rows are out, so memory stays flat no matter how big n gets.
+
+    for rows in iter_vehicle_rows(250_000, seed = 42):
+        writer.write(pd.DataFrame(rows))
+    """
+
+    batch = []
+    for index in range(start, start + n):
+        batch.extend(household_rows(seed, index, years))
+
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+
+    if batch:
+        yield batch
+
+
+def build_shard(shard, n, seed, years=(1, 20), shard_size=SHARD_SIZE, batched_start=False):
+    """
+    Builds the n households of one shard and returns all of their rows.
+    batched_start=True starts the whole shard at once with life_history.start_households(), see build().
+    """
+
+    start = shard * shard_size
+    if not batched_start:
+        return [row for index in range(start, start + n) for row in household_rows(seed, index, years)]
+
+    from .life_history import start_households
+
+    with household.instruments.phase('batched_start'):
+        started = start_households(n, seed, start)
+
+    rows = []
+    for i in range(n):
+        rows.extend(household_rows(seed, start + i, years, started[i]))
+        # Let each household go once its rows are out
+        started[i] = None
+
+    return rows
+
+
+def run_shard(shard, n, seed, years=(1, 20), shard_size=SHARD_SIZE, run=None, panel=None, batched_start=False):
+    """
+    build_shard() with run's instruments and/or panel output (to the directory panel) switched on.
+    Hands back the rows and the instruments' report (None without instruments).
+    """
+
+    with ExitStack() as stack:
+        if run is not None:
+            stack.enter_context(instrumented(run))
+
+        if panel is not None:
+            # Only needs pyarrow when there's a panel to write
+            from .panel import panel_writer, recording_panel
+            stack.enter_context(recording_panel(stack.enter_context(panel_writer(panel, name=f'part-{shard}'))))
+
+        rows = build_shard(shard, n, seed, years, shard_size, batched_start)
+
+    return rows, None if run is None else run.report()
+
+
+def shared_shard(shard, n, seed, years=(1, 20), shard_size=SHARD_SIZE, run=None, panel=None, batched_start=False):
+    """
+    run_shard() that hands its rows back as a record batch in shared memory (see shared_batches.py) instead of a list.
+    Hands back the shared memory block's name (None if the shard has no rows) and the instruments' report.
+    """
+
+    from .parquet_writer import schema_of, rows_to_batch
+    from .shared_batches import to_shared_memory
+
+    rows, report = run_shard(shard, n, seed, years, shard_size, run, panel, batched_start)
+    if not rows:
+        return None, report
+
+    return to_shared_memory(rows_to_batch(rows, schema_of(rows))), report
+
+
+def build(n, seed=0, years=(1, 20), shard_size=SHARD_SIZE, workers=None, instruments=None, panel=None, batches=False,
+          batched_start=False):
+    """
+    Builds n households across a pool of processes and yields the rows one shard at a time, in shard order.
+    workers defaults to every core, workers=1 builds in this process which is handy for debugging.
+
+    Only a couple of shards per worker are in flight at once so a slow consumer doesn't pile up finished shards.
+    Passing instruments (see instrumentation.py) switches them on in every worker, and each worker's report gets
+    merged into them as its shard comes back.
+    panel is a directory to write every vehicle's yearly panel rows to (see panel.py), one part file per shard.
+
+    batches=True yields each shard as a pyarrow RecordBatch instead (shards without rows are skipped). The workers
+    build the batches and pass them over in shared memory, so the parent never unpickles a row (see shared_batches.py).
+    A batch is only good until the next one is asked for, parquet_writer.write_batch() is made for them.
+
+    batched_start=True starts each shard's households all at once with life_history.start_households() (a
+    PopulationEngine lives out their starting lives together), which is a lot faster than building them one at a time.
+    The rows follow the same rules but aren't draw for draw the same as a normal build's, and they also depend on the
+    shard size, since each shard's engine draws for the whole shard.
+
+    for rows in build(1_000_000, seed = 42):
+        df = pd.DataFrame(rows)
+    """
+
+    sizes = shard_sizes(n, shard_size)
+
+    switched_on = instruments is not None or panel is not None
+
+    if workers == 1:
+        for shard, size in enumerate(sizes):
+            if not switched_on:
+                rows = build_shard(shard, size, seed, years, shard_size, batched_start)
+            else:
+                # In this process the instruments fill in directly, there's no report to merge
+                rows, report = run_shard(shard, size, seed, years, shard_size, instruments, panel, batched_start)
+
+            if not batches:
+                yield rows
+            elif rows:
+                from .parquet_writer import schema_of, rows_to_batch
+                yield rows_to_batch(rows, schema_of(rows))
+        return
+
+    if batches:
+        from .shared_batches import from_shared_memory, release, track_blocks
+        track_blocks()
+
+    def submit(pool, shard, size):
+        run = None if instruments is None else instruments.fresh()
+        if batches:
+            return pool.submit(shared_shard, shard, size, seed, years, shard_size, run, panel, batched_start)
+        if not switched_on:
+            return pool.submit(build_shard, shard, size, seed, years, shard_size, batched_start)
+
+        return pool.submit(run_shard, shard, size, seed, years, shard_size, run, panel, batched_start)
+
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        shards = iter(enumerate(sizes))
+
+        for shard, size in shards:
+            pending.append(submit(pool, shard, size))
+            if len(pending) >= 2 * workers:
+                break
+
+        while pending:
+            rows = pending.popleft().result()
+            if switched_on or batches:
+                rows, report = rows
+                if report is not None:
+                    instruments.merge(report)
+
+            for shard, size in shards:
+                pending.append(submit(pool, shard, size))
+                break
+
+            if not batches:
+                yield rows
+            elif rows is not None:
+                batch, block = from_shared_memory(rows)
+                yield batch
+                del batch
+                release(block)
@@ -0,0 +1,353 @@
+"""
+Saves a whole population of households to a single .npz file and loads it back, ready to keep simulating.
+
+Pickling households means pickling a tangled graph (households point at humans, humans point back at the household,
+claims point at vehicles and drivers...) one object at a time. A checkpoint lays the same state out as columns instead,
+one table per kind of object:
+
+    household   driviness, child_interest, tenure, inforce, where its id allocator is, and its random_stream's state
+    human       every human slot, plus which household it's in, if it's a head of house/spouse/child, and if it's
+                still a member (kids that moved out are kept when one of their claims still points at them)
+    vehicle     every vehicle slot, plus if it's still one of the household's vehicles (sold ones are kept for claims)
+    property    every housing_property slot
+    claim       every claim slot, with the vehicle/driver as row numbers, and if it's in the household's claim_ledger
+
+Links between objects are row numbers in these tables, and every household's random_stream (bit generator state and
+the numbers still sitting in its buffers) is saved too, so a loaded household keeps drawing the same numbers it would
+have drawn if it had never been saved. One aged base population can be saved once and loaded for every experiment:
+
+    save_population('base.npz', households)
+    for experiment in experiments:
+        households = load_population('base.npz')
+        ...
+"""
+
+import numpy as np
+
+from .household import household
+from .human import human
+from .head_of_house import head_of_house
+from .spouse import spouse
+from .child import child
+from .vehicle import vehicle
+from .housing_property import housing_property
+from .claim import claim
+from .mileage import mileage_table, ROAD_TYPES
+from .ids import id_allocator
+from .rng import random_stream, REFILLS
+
+FORMAT_VERSION = 2
+
+# Why household.prune_claims() let go of a claim, version 1 checkpoints didn't have these
+FOLDED_CLAIMS = ('unpaid', 'departed', 'expired')
+
+# human kind codes, in the order of HUMAN_KINDS
+HEAD, SPOUSE, CHILD = 0, 1, 2
+HUMAN_KINDS = (head_of_house, spouse, child)
+
+HOUSEHOLD_COLUMNS = ('id', 'driviness', 'child_interest', 'tenure_years', 'inforce')
+HUMAN_COLUMNS = tuple(x for x in human.__slots__ if x != 'household')
+VEHICLE_COLUMNS = tuple(x for x in vehicle.__slots__ if x != 'household')
+PROPERTY_COLUMNS = tuple(x for x in housing_property.__slots__ if x != 'household')
+CLAIM_COLUMNS = tuple(x for x in claim.__slots__ if x not in ('household', 'vehicle', 'driver'))
+
+# random_stream buffers, each one is saved as the bit generator state it was filled from and how many numbers are left
+RNG_BUFFERS = tuple(REFILLS)
+EMPTY_STATE = {'state': {'state': 0, 'inc': 0}, 'has_uint32': 0, 'uinteger': 0}
+
+
+def pack(values):
+    """A column of values as an array, and a mask of where the Nones were (None if there weren't any)"""
+    present = [x for x in values if x is not None]
+    if len(present) == len(values):
+        return np.asarray(values), None
+
+    array = np.asarray(present)
+    mask = np.array([x is None for x in values])
+    full = np.zeros(len(values), dtype=array.dtype)
+    full[~mask] = array
+
+    return full, mask
+
+
+def unpack(array, mask=None):
+    """The values of a pack()ed column back as a list of plain python values"""
+    values = array.tolist()
+    if mask is not None:
+        for i in np.flatnonzero(mask).tolist():
+            values[i] = None
+
+    return values
+
+
+def split_u128(values):
+    """128 bit numbers (PCG64 states) as (high, low) uint64 arrays"""
+    return (np.array([x >> 64 for x in values], dtype=np.uint64),
+            np.array([x & (1 << 64) - 1 for x in values], dtype=np.uint64))
+
+
+def join_u128(high, low):
+    return [h << 64 | l for h, l in zip(high.tolist(), low.tolist())]
+
+
+def current_mileage(x):
+    """The household's cached mileage_table if it's still the one for this year, otherwise None"""
+    if x._mileage is None:
+        return None
+
+    key, table = x._mileage
+    if key != (x.tenure_years, tuple(x.vehicles), tuple(x.drivers)):
+        return None
+
+    return table
+
+
+def to_arrays(households):
+    """Every household's state as a dict of flat arrays named like 'human/age', what save_population() writes out"""
+    tables = {name: {} for name in ('household', 'human', 'vehicle', 'property', 'claim')}
+    rows = {name: [] for name in tables}
+    links = {name: [] for name in tables}
+    states = []
+    mileage = []
+
+    for h, x in enumerate(households):
+        human_rows, vehicle_rows = {}, {}
+
+        def add_human(person, member):
+            human_rows[id(person)] = len(rows['human'])
+            rows['human'].append(person)
+            links['human'].append((h, HUMAN_KINDS.index(type(person)), member))
+
+        def add_vehicle(veh, current):
+            vehicle_rows[id(veh)] = len(rows['vehicle'])
+            rows['vehicle'].append(veh)
+            links['vehicle'].append((h, current))
+
+        add_human(x.head_of_household, True)
+        if x.significant_other is not None:
+            add_human(x.significant_other, True)
+        for person in x.children:
+            add_human(person, True)
+
+        for veh in x.vehicles:
+            add_vehicle(veh, True)
+
+        for house in x.properties:
+            rows['property'].append(house)
+            links['property'].append((h,))
+
+        # Drivers and vehicles that are gone but still have claims come along too
+        in_ledger = {id(c) for c in x.claim_ledger.claims}
+        for c in x.claims:
+            if c.driver is not None and id(c.driver) not in human_rows:
+                add_human(c.driver, False)
+            if id(c.vehicle) not in vehicle_rows:
+                add_vehicle(c.vehicle, False)
+
+            rows['claim'].append(c)
+            links['claim'].append((
+                h, vehicle_rows[id(c.vehicle)], -1 if c.driver is None else human_rows[id(c.driver)], id(c) in in_ledger
+            ))
+
+        states.append(x.rng.getstate())
+
+        table = current_mileage(x)
+        mileage.append(None if table is None else table.miles.ravel())
+
+        rows['household'].append(x)
+        links['household'].append((x.new_id.shard, x.new_id.counter))
+
+    columns = {
+        'household': HOUSEHOLD_COLUMNS, 'human': HUMAN_COLUMNS, 'vehicle': VEHICLE_COLUMNS,
+        'property': PROPERTY_COLUMNS, 'claim': CLAIM_COLUMNS
+    }
+    link_columns = {
+        'household': ('id_shard', 'id_counter'),
+        'human': ('household', 'kind', 'member'),
+        'vehicle': ('household', 'current'),
+        'property': ('household',),
+        'claim': ('household', 'vehicle', 'driver', 'in_ledger')
+    }
+
+    for name, objects in rows.items():
+        for column in columns[name]:
+            values = [getattr(x, column) for x in objects]
+            if column == 'prefered_vehicle':
+                # human.pick_prefered_vehicle() always hands back a 1 item list (it comes from rng.choices)
+                values = [x[0] for x in values]
+
+            tables[name][column] = values
+
+        for i, column in enumerate(link_columns[name]):
+            tables[name][column] = [x[i] for x in links[name]]
+
+    # random_stream state, PCG64 keeps 2 128 bit numbers (the increment never changes, buffers only save the state)
+    if any(x['bit_generator']['bit_generator'] != 'PCG64' for x in states):
+        raise ValueError('checkpoints can only save random_streams that use PCG64')
+
+    bit_generators = {'': [x['bit_generator'] for x in states]}
+    for name in RNG_BUFFERS:
+        bit_generators[f'{name}_'] = [x['buffers'][name][0] or EMPTY_STATE for x in states]
+        tables['household'][f'rng_{name}_left'] = [x['buffers'][name][1] for x in states]
+
+    tables['household'].update({
+        'rng_index': [x['index'] for x in states],
+        'rng_buffer_size': [x['buffer_size'] for x in states],
+        'rng_buffered': [x['buffered'] for x in states],
+        'mileage_size': [-1 if x is None else len(x) for x in mileage]
+    })
+    for reason in FOLDED_CLAIMS:
+        tables['household'][f'folded_{reason}'] = [x.folded_claims[reason] for x in rows['household']]
+    for prefix, saved in bit_generators.items():
+        tables['household'][f'rng_{prefix}has_uint32'] = [x['has_uint32'] for x in saved]
+        tables['household'][f'rng_{prefix}uinteger'] = [x['uinteger'] for x in saved]
+
+    arrays = {'format_version': np.array(FORMAT_VERSION)}
+    for name, table in tables.items():
+        for column, values in table.items():
+            arrays[f'{name}/{column}'], mask = pack(values)
+            if mask is not None:
+                arrays[f'{name}/{column}.none'] = mask
+
+    arrays['rng/inc_high'], arrays['rng/inc_low'] = split_u128([x['state']['inc'] for x in bit_generators['']])
+    for prefix, saved in bit_generators.items():
+        arrays[f'rng/{prefix}state_high'], arrays[f'rng/{prefix}state_low'] = split_u128([x['state']['state'] for x in saved])
+
+    arrays['mileage/miles'] = np.concatenate([x for x in mileage if x is not None] or [np.zeros(0)])
+
+    return arrays
+
+
+def from_arrays(arrays):
+    """Households back from to_arrays(), ready to move forward"""
+    version = int(arrays['format_version'])
+    if version not in (1, FORMAT_VERSION):
+        raise ValueError(f'checkpoint is format version {version}, this code reads versions 1 to {FORMAT_VERSION}')
+
+    def table(name):
+        prefix = f'{name}/'
+        return {
+            key[len(prefix):]: unpack(arrays[key], arrays[f'{key}.none'] if f'{key}.none' in arrays else None)
+            for key in arrays
+            if key.startswith(prefix) and not key.endswith('.none')
+        }
+
+    households = []
+    hh = table('household')
+    incs = join_u128(arrays['rng/inc_high'], arrays['rng/inc_low'])
+    rng_states = {
+        prefix: join_u128(arrays[f'rng/{prefix}state_high'], arrays[f'rng/{prefix}state_low'])
+        for prefix in ('', *[f'{name}_' for name in RNG_BUFFERS])
+    }
+
+    def bit_generator(prefix, h):
+        return {
+            'bit_generator': 'PCG64',
+            'state': {'state': rng_states[prefix][h], 'inc': incs[h]},
+            'has_uint32': hh[f'rng_{prefix}has_uint32'][h],
+            'uinteger': hh[f'rng_{prefix}uinteger'][h]
+        }
+
+    for h, index in enumerate(hh['rng_index']):
+        stream = random_stream(0, index)
+        stream.setstate({
+            'index': index,
+            'buffer_size': hh['rng_buffer_size'][h],
+            'buffered': hh['rng_buffered'][h],
+            'bit_generator': bit_generator('', h),
+            'buffers': {name: (bit_generator(f'{name}_', h), hh[f'rng_{name}_left'][h]) for name in RNG_BUFFERS}
+        })
+
+        x = household.__new__(household)
+        x.start_empty(stream)
+        x.new_id = id_allocator(hh['id_shard'][h], hh['id_counter'][h])
+        for column in HOUSEHOLD_COLUMNS:
+            setattr(x, column, hh[column][h])
+        for reason in FOLDED_CLAIMS:
+            if f'folded_{reason}' in hh and hh[f'folded_{reason}'][h]:
+                x.folded_claims[reason] = hh[f'folded_{reason}'][h]
+        households.append(x)
+
+    humans = []
+    people = table('human')
+    for i, (h, kind, member) in enumerate(zip(people['household'], people['kind'], people['member'])):
+        cls = HUMAN_KINDS[kind]
+        person = cls.__new__(cls)
+        person.household = x = households[h]
+        for column in HUMAN_COLUMNS:
+            setattr(person, column, people[column][i])
+        person.prefered_vehicle = [person.prefered_vehicle]
+        humans.append(person)
+
+        if not member:
+            continue
+        if kind == HEAD:
+            x.head_of_household = person
+        elif kind == SPOUSE:
+            x.significant_other = person
+        else:
+            x.children.append(person)
+
+    vehicles = []
+    cars = table('vehicle')
+    for i, (h, current) in enumerate(zip(cars['household'], cars['current'])):
+        veh = vehicle.__new__(vehicle)
+        veh.household = x = households[h]
+        for column in VEHICLE_COLUMNS:
+            setattr(veh, column, cars[column][i])
+        vehicles.append(veh)
+
+        if current:
+            x.vehicles.append(veh)
+
+    houses = table('property')
+    for i, h in enumerate(houses['household']):
+        house = housing_property.__new__(housing_property)
+        house.household = x = households[h]
+        for column in PROPERTY_COLUMNS:
+            setattr(house, column, houses[column][i])
+        x.properties.append(house)
+
+    claims = table('claim')
+    for i, (h, veh, driver, in_ledger) in enumerate(
+            zip(claims['household'], claims['vehicle'], claims['driver'], claims['in_ledger'])):
+        c = claim.__new__(claim)
+        c.household = x = households[h]
+        c.vehicle = vehicles[veh]
+        c.driver = None if driver == -1 else humans[driver]
+        for column in CLAIM_COLUMNS:
+            setattr(c, column, claims[column][i])
+        x.claims.append(c)
+
+        if in_ledger:
+            x.claim_ledger.record(c)
+
+    # The year's mileage table gets drawn once and reused, bring it back so nothing gets drawn twice
+    miles = arrays['mileage/miles']
+    offset = 0
+    for x, size in zip(households, hh['mileage_size']):
+        if size == -1:
+            continue
+
+        drivers = x.drivers
+        table = mileage_table.__new__(mileage_table)
+        table.drivers = drivers
+        table.vehicles = x.vehicles
+        table.driver_index = {y.id: i for i, y in enumerate(drivers)}
+        table.vehicle_index = {y.id: i for i, y in enumerate(x.vehicles)}
+        table.miles = miles[offset:offset + size].reshape(len(drivers), len(x.vehicles), len(ROAD_TYPES)).copy()
+        x._mileage = ((x.tenure_years, tuple(x.vehicles), tuple(drivers)), table)
+        offset += size
+
+    return households
+
+
+def save_population(path, households, compress=False):
+    """Writes households to a .npz checkpoint, compress=True makes a smaller file that's slower to write and read"""
+    (np.savez_compressed if compress else np.savez)(path, **to_arrays(households))
+
+
+def load_population(path):
+    """Households back from a save_population() checkpoint"""
+    with np.load(path) as arrays:
+        return from_arrays({key: arrays[key] for key in arrays.files})
@@ -1,5 +1,5 @@
-import random
 
+from .codes import MALE
 from .human import human
 
 
@@ -10,6 +10,8 @@ class child(human):
     When children get old enough, they try to leave the household. Ever getting married will also cause them to leave.
     """
 
+    __slots__ = ()
+
     def __init__(self, house, target_age, upbringing_score):
         super().__init__(household=house,
                          target_age=target_age,
@@ -21,7 +23,7 @@ class child(human):
 
         score = 0.5 * self_sufficent + 0.25 * older_kid
 
-        if score > random.uniform(0, 1):
+        if score > self.household.rng.uniform(0, 1):
             self.household.remove_child(self)
 
     def get_married(self, years_remaining = 0):
@@ -38,7 +40,7 @@ class child(human):
                 
         # Men drive a bit more!
         # According to the Federal Highway Administration, female drivers travel about 6,408 miles less than men annually.
-        if self.gender == 'm':
+        if self.gender == MALE:
             mileage *= 1.2
 
         # If they've got a job we've got extra driving to do!
@@ -65,4 +67,4 @@ class child(human):
         city_mileage = mileage * 0.55 * self.household.primary_house.city_driving_ratio
         highway_mileage = mileage * 0.45 * self.household.primary_house.highway_driving_ratio
         
-        return (city_mileage, highway_mileage)
\ No newline at end of file
+        return (city_mileage, highway_mileage)
\ No newline at end of file
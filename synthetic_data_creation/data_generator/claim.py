@@ -1,7 +1,8 @@
-import random
 from statistics import mean
 from .utils import sig
-from uuid import uuid4
+from .ids import format_id
+from .codes import (SINGLE_CAR_COLLISION, MULTI_CAR_COLLISION, THEFT, HAIL, GLASS, UBI_CLAIM, ERS_CLAIM, MALE, FEMALE,
+                    COVERAGES, BI_COV, PD_COV, COLL_COV, COMP_COV, MPC_COV, ERS_COV, UBI_COV, coverage_flag)
 
 
 class claim:
@@ -9,8 +10,24 @@ class claim:
     This represents an insurance claim occuring. 
     An insurance claim must relate to a vehicle object. 
     It may or may not have a driver (i.e. a car can get hit by hail without anyone actively driving it!)
+
+    claim_type is a code from codes.CLAIM_TYPES. The coverages the vehicle had when the claim happened are a copy of
+    its coverage bitmask, veh_had_bi_cov_ind and friends read single bits of it.
     """
 
+    __slots__ = (
+        'household', 'vehicle', 'vehicle_id', 'driver', 'driver_id', 'id', 'when_occured', 'claim_type',
+        'veh_had_coverage', 'bi', 'pd', 'coll', 'comp', 'mpc', 'ers', 'ubi'
+    )
+
+    veh_had_bi_cov_ind = coverage_flag('veh_had_coverage', BI_COV)
+    veh_had_pd_cov_ind = coverage_flag('veh_had_coverage', PD_COV)
+    veh_had_coll_cov_ind = coverage_flag('veh_had_coverage', COLL_COV)
+    veh_had_comp_cov_ind = coverage_flag('veh_had_coverage', COMP_COV)
+    veh_had_mpc_cov_ind = coverage_flag('veh_had_coverage', MPC_COV)
+    veh_had_ers_cov_ind = coverage_flag('veh_had_coverage', ERS_COV)
+    veh_had_ubi_cov_ind = coverage_flag('veh_had_coverage', UBI_COV)
+
     def __init__(self, claim_type, household, vehicle, driver=None):
         self.household = household
         self.vehicle = vehicle
@@ -22,35 +39,29 @@ class claim:
         else:
             self.driver_id = None
 
-        self.id = uuid4().hex
+        self.id = self.household.new_id()
 
         self.when_occured = self.household.tenure_years
-        
-        self.veh_had_bi_cov_ind = self.vehicle.bi_cov_ind
-        self.veh_had_pd_cov_ind = self.vehicle.pd_cov_ind
-        self.veh_had_coll_cov_ind = self.vehicle.coll_cov_ind
-        self.veh_had_comp_cov_ind = self.vehicle.comp_cov_ind
-        self.veh_had_mpc_cov_ind = self.vehicle.mpc_cov_ind
-        self.veh_had_ers_cov_ind = self.vehicle.ers_cov_ind
-        self.veh_had_ubi_cov_ind = self.vehicle.ubi_cov_ind
-
-        if claim_type == 'single_car_collision':
+        self.claim_type = claim_type
+        self.veh_had_coverage = self.vehicle.coverage
+
+        if claim_type == SINGLE_CAR_COLLISION:
             self.build_single_car_collision()
-        elif claim_type == 'multi_car_collision':
+        elif claim_type == MULTI_CAR_COLLISION:
             self.build_multi_car_collision()
-        elif claim_type == 'theft':
+        elif claim_type == THEFT:
             self.build_theft()
-        elif claim_type == 'hail':
+        elif claim_type == HAIL:
             self.build_hail()
-        elif claim_type == 'glass':
+        elif claim_type == GLASS:
             self.build_glass()
-        elif claim_type == 'ubi':
+        elif claim_type == UBI_CLAIM:
             self.build_ubi()
-        elif claim_type == 'ers':
+        elif claim_type == ERS_CLAIM:
             self.build_ers()
 
     def build_single_car_collision(self):
-        crash_type = random.choices(['tree', 'fence', 'parked_car', 'pedestrian'], [0.4, 0.3, 0.2, 0.1])[0]
+        crash_type = self.household.rng.choices(['tree', 'fence', 'parked_car', 'pedestrian'], [0.4, 0.3, 0.2, 0.1])[0]
         protection = self.vehicle.protection
         hurt_others = self.vehicle.hurt_others
         income = self.household.annual_income
@@ -64,11 +75,11 @@ class claim:
 
         p = {'pedestrian': 0.9, 'parked_car': 0.3 * mult}
         p = p.get(crash_type, 0)
-        self.bi = int(p > random.uniform(0, 1) and self.veh_had_bi_cov_ind)
+        self.bi = int(p > self.household.rng.uniform(0, 1) and self.veh_had_bi_cov_ind)
 
         p = {'pedestrian': 0.05, 'parked_car': 0.9 * mult, 'fence': 0.9, 'tree': 0.05}
         p = p.get(crash_type, 0)
-        self.pd = int(p > random.uniform(0, 1) and self.veh_had_pd_cov_ind)
+        self.pd = int(p > self.household.rng.uniform(0, 1) and self.veh_had_pd_cov_ind)
 
         p = {'parked_car': 0.85, 'fence': 0.15, 'tree': 0.9, 'pedestrian': 0.15}
         p = p.get(crash_type, 0)
@@ -80,7 +91,7 @@ class claim:
             mult = 0.9
         else:
             mult = 1
-        self.coll = int(mult * p > random.uniform(0, 1) and self.veh_had_coll_cov_ind)
+        self.coll = int(mult * p > self.household.rng.uniform(0, 1) and self.veh_had_coll_cov_ind)
 
         self.comp = 0
 
@@ -93,13 +104,13 @@ class claim:
         else: 
             mult = 1
 
-        self.mpc = int(mult * p > random.uniform(0, 1) and self.veh_had_mpc_cov_ind)
+        self.mpc = int(mult * p > self.household.rng.uniform(0, 1) and self.veh_had_mpc_cov_ind)
 
         self.ers = 0
         self.ubi = 0
 
     def build_multi_car_collision(self):
-        crash_type = random.choices(['fender_bender', 'serious'], [0.5, 0.5])[0]        
+        crash_type = self.household.rng.choices(['fender_bender', 'serious'], [0.5, 0.5])[0]        
         protection = self.vehicle.protection
         hurt_others = self.vehicle.hurt_others
         income = self.household.annual_income
@@ -113,11 +124,11 @@ class claim:
 
         p = {'fender_bender': 0.05, 'serious': 0.6}
         p = p.get(crash_type, 0)
-        self.bi = int(p*mult > random.uniform(0, 1) and self.veh_had_bi_cov_ind)
+        self.bi = int(p*mult > self.household.rng.uniform(0, 1) and self.veh_had_bi_cov_ind)
 
         p = {'fender_bender': 0.35 * mult, 'serious': 0.95}
         p = p.get(crash_type, 0)
-        self.pd = int(p > random.uniform(0, 1) and self.veh_had_pd_cov_ind)
+        self.pd = int(p > self.household.rng.uniform(0, 1) and self.veh_had_pd_cov_ind)
 
         if income > 150_000:
             mult = 0.5
@@ -131,7 +142,7 @@ class claim:
         p = {'fender_bender': 0.3 * mult, 'serious': 0.95}
         p = p.get(crash_type, 0)
 
-        self.coll = int(p > random.uniform(0, 1) and self.veh_had_coll_cov_ind)
+        self.coll = int(p > self.household.rng.uniform(0, 1) and self.veh_had_coll_cov_ind)
 
         self.comp = 0
 
@@ -145,7 +156,7 @@ class claim:
         else: 
             mult = 1
 
-        self.mpc = int(mult * p > random.uniform(0, 1) and self.veh_had_mpc_cov_ind)
+        self.mpc = int(mult * p > self.household.rng.uniform(0, 1) and self.veh_had_mpc_cov_ind)
 
         self.ers = 0
         self.ubi = 0
@@ -173,7 +184,7 @@ class claim:
         elif garages > 0:            
             mult *= 1 - 0.75 * (1.0 * veh_cnt/garages)
 
-        self.comp = int(mult * 1 > random.uniform(0, 1) and self.veh_had_comp_cov_ind)
+        self.comp = int(mult * 1 > self.household.rng.uniform(0, 1) and self.veh_had_comp_cov_ind)
         self.mpc = 0
         self.ers = 0
         self.ubi = 0
@@ -201,7 +212,7 @@ class claim:
         elif garages > 0:    
             mult *= 1 - 0.75 * (1.0 * veh_cnt/garages)
 
-        self.comp = int(mult * 1 > random.uniform(0, 1) and self.veh_had_comp_cov_ind)
+        self.comp = int(mult * 1 > self.household.rng.uniform(0, 1) and self.veh_had_comp_cov_ind)
 
         self.mpc = 0
         self.ers = 0
@@ -225,7 +236,7 @@ class claim:
         self.pd = 0
         self.coll = 0
 
-        self.comp = int(mult * 1 > random.uniform(0, 1) and self.veh_had_comp_cov_ind)
+        self.comp = int(mult * 1 > self.household.rng.uniform(0, 1) and self.veh_had_comp_cov_ind)
 
         self.mpc = 0
         self.ers = 0
@@ -233,7 +244,7 @@ class claim:
 
     def build_ubi(self): 
         protection = self.vehicle.protection
-        crash_type = random.choices(['fender_bender', 'serious'], [0.5, 0.5])[0]
+        crash_type = self.household.rng.choices(['fender_bender', 'serious'], [0.5, 0.5])[0]
         income = self.household.annual_income
 
         self.bi = 0
@@ -251,7 +262,7 @@ class claim:
         p = {'fender_bender': 0.2 * mult, 'serious': 0.8}
         p = p.get(crash_type, 0)
 
-        self.coll = int(p > random.uniform(0, 1) and self.veh_had_coll_cov_ind)
+        self.coll = int(p > self.household.rng.uniform(0, 1) and self.veh_had_coll_cov_ind)
 
         self.comp = 0
         self.mpc = 0
@@ -267,16 +278,16 @@ class claim:
         p = {'fender_bender': 0.3, 'serious': 0.8}
         p = p.get(crash_type, 0)
         
-        self.ubi = int(p * mult > random.uniform(0, 1) and self.veh_had_ubi_cov_ind)
+        self.ubi = int(p * mult > self.household.rng.uniform(0, 1) and self.veh_had_ubi_cov_ind)
 
     def build_ers(self):
 
-        if self.driver.gender == 'm':
+        if self.driver.gender == MALE:
             p = 0.7        
-        elif self.driver.gender == 'f':
+        elif self.driver.gender == FEMALE:
             p = 0.85     
         
-        self.ers = int(p > random.uniform(0, 1) and self.veh_had_ubi_cov_ind)
+        self.ers = int(p > self.household.rng.uniform(0, 1) and self.veh_had_ubi_cov_ind)
     
         self.bi = 0
         self.pd = 0
@@ -288,9 +299,9 @@ class claim:
     @property
     def summary(self):
         results = {
-            'claim_id': self.id,
-            'vehicle_id': self.vehicle_id,
-            'driver_id': self.driver_id,
+            'claim_id': format_id(self.id),
+            'vehicle_id': format_id(self.vehicle_id),
+            'driver_id': format_id(self.driver_id),
             'driver_claim': self.driver_id is not None,
             'bi_ind': self.bi,
             'pd_ind': self.pd,
@@ -299,13 +310,7 @@ class claim:
             'mpc_ind': self.mpc,
             'ers_ind': self.ers,
             'ubi_ind': self.ubi,                
-            'veh_had_bi_cov_ind': self.veh_had_bi_cov_ind,
-            'veh_had_pd_cov_ind': self.veh_had_pd_cov_ind,
-            'veh_had_coll_cov_ind': self.veh_had_coll_cov_ind,
-            'veh_had_comp_cov_ind': self.veh_had_comp_cov_ind,
-            'veh_had_mpc_cov_ind': self.veh_had_mpc_cov_ind,
-            'veh_had_ers_cov_ind': self.veh_had_ers_cov_ind,
-            'veh_had_ubi_cov_ind': self.veh_had_ubi_cov_ind,
+            **{f'veh_had_{x}_cov_ind': bool(self.veh_had_coverage & 1 << i) for i, x in enumerate(COVERAGES)},
             'claim_age': self.how_old
         }
 
@@ -0,0 +1,123 @@
+from bisect import bisect_left
+
+from .codes import COVERAGES
+
+
+class claim_ledger:
+    """
+    A running tally of a household's paid claims, so summaries don't have to dig through every claim ever made.
+
+    Only claims that show up in the summaries are counted: paid claims that either had no driver or whose driver is
+    still inforce. When a driver leaves the household their claims come back out of the tally.
+
+    Counts are kept by the year a claim happened instead of its age. As tenure_years moves forward every claim ages
+    for free, and looking up claims that are n years old is just a lookup on year tenure_years - n.
+    The years with claims are also kept in order for each coverage, which makes the time since last claim a peek at
+    the end of a list.
+    """
+
+    def __init__(self, household):
+        self.household = household
+        self.claims = []
+        self.driver_claims = {}
+        self.counts = {}
+        self.years = {}
+
+    def copy(self, household, claims):
+        """The same tally for a copy of the household (see fork.py), claims maps each claim to the copy's claim"""
+        ledger = claim_ledger(household)
+        ledger.claims = [claims[x] for x in self.claims]
+        ledger.driver_claims = {key: [claims[x] for x in value] for key, value in self.driver_claims.items()}
+        ledger.counts = {scope: {key: dict(value) for key, value in x.items()} for scope, x in self.counts.items()}
+        ledger.years = {scope: {key: list(value) for key, value in x.items()} for scope, x in self.years.items()}
+
+        return ledger
+
+    @staticmethod
+    def coverages(claim):
+        """The coverages a claim paid out on, 'all' covers every paid claim"""
+        return ['all', *[x for x in COVERAGES if getattr(claim, x) == 1]]
+
+    def add(self, claim):
+        """Records a new claim, claims that wouldn't show up in the summaries are skipped"""
+        if not claim.paid_indicator:
+            return None
+
+        if claim.driver is not None and not claim.driver.inforce:
+            return None
+
+        self.record(claim)
+
+    def record(self, claim):
+        """Tallies a claim without checking that it belongs in the ledger, used to rebuild a saved ledger (checkpoint.py)"""
+        if claim.driver is not None:
+            self.driver_claims.setdefault(claim.driver.id, []).append(claim)
+
+        self.claims.append(claim)
+        for scope in (None, claim.vehicle_id):
+            for coverage in self.coverages(claim):
+                self._tally(scope, coverage, claim.when_occured, 1)
+
+    def remove_driver(self, driver):
+        """Takes the claims of a driver that left the household back out of the tally"""
+        removed = self.driver_claims.pop(driver.id, [])
+        if not removed:
+            return None
+
+        self.claims = [x for x in self.claims if x.driver is not driver]
+        for claim in removed:
+            for scope in (None, claim.vehicle_id):
+                for coverage in self.coverages(claim):
+                    self._tally(scope, coverage, claim.when_occured, -1)
+
+    def expire(self, before):
+        """
+        Drops every claim from before the year before, along with their tallies, and hands the dropped claims back.
+        Nothing reads the tallies of claims older than 16 years (see count() and time_since()).
+        """
+        expired = [x for x in self.claims if x.when_occured < before]
+        if not expired:
+            return expired
+
+        self.claims = [x for x in self.claims if x.when_occured >= before]
+        for key in list(self.driver_claims):
+            self.driver_claims[key] = [x for x in self.driver_claims[key] if x.when_occured >= before]
+            if not self.driver_claims[key]:
+                del self.driver_claims[key]
+
+        for scope, coverages in self.counts.items():
+            for coverage, counts in coverages.items():
+                for year in [x for x in counts if x < before]:
+                    del counts[year]
+
+                years = self.years[scope][coverage]
+                del years[:bisect_left(years, before)]
+
+        return expired
+
+    def _tally(self, scope, coverage, year, change):
+        counts = self.counts.setdefault(scope, {}).setdefault(coverage, {})
+        years = self.years.setdefault(scope, {}).setdefault(coverage, [])
+
+        counts[year] = counts.get(year, 0) + change
+
+        if counts[year] == 0:
+            del counts[year]
+            years.remove(year)
+        elif change > 0 and counts[year] == change:
+            # Claims only ever get added for the current year, so the years stay in order
+            years.append(year)
+
+    def count(self, coverage, age, vehicle_id=None):
+        """How many claims paid on a coverage age years ago, for the whole household or just one vehicle"""
+        return self.counts.get(vehicle_id, {}).get(coverage, {}).get(self.household.tenure_years - age, 0)
+
+    def time_since(self, coverage, vehicle_id=None):
+        """Years since the last claim on a coverage, claims from this year and over 16 years old don't count"""
+        tenure = self.household.tenure_years
+
+        for year in reversed(self.years.get(vehicle_id, {}).get(coverage, [])):
+            if year < tenure:
+                return tenure - year if tenure - year <= 16 else None
+
+        return None
@@ -0,0 +1,59 @@
+"""
+Small integer codes for the categorical values used throughout the simulation.
+Comparing small ints is a lot cheaper than comparing strings, so values are kept as codes while simulating
+and only turned back into their labels when results are written out.
+"""
+
+GENDERS = ('m', 'f')
+MALE, FEMALE = range(2)
+
+VEHICLE_TYPES = ('pickup', 'suv', 'sedan', 'sports car', 'van')
+PICKUP, SUV, SEDAN, SPORTS_CAR, VAN = range(5)
+
+LOCATIONS = ('downtown', 'suburb', 'country')
+DOWNTOWN, SUBURB, COUNTRY = range(3)
+
+EDUCATION_LEVELS = ('uneducated', 'high school degree', 'attending college', 'college graduate', 'postbaccalaureate degree')
+UNEDUCATED, HIGH_SCHOOL_DEGREE, ATTENDING_COLLEGE, COLLEGE_GRADUATE, POSTBACCALAUREATE_DEGREE = range(5)
+
+CLAIM_TYPES = ('single_car_collision', 'multi_car_collision', 'theft', 'hail', 'glass', 'ubi', 'ers')
+SINGLE_CAR_COLLISION, MULTI_CAR_COLLISION, THEFT, HAIL, GLASS, UBI_CLAIM, ERS_CLAIM = range(7)
+
+# Coverages are packed into a bitmask, one bit per coverage in this order
+COVERAGES = ('bi', 'pd', 'coll', 'comp', 'mpc', 'ers', 'ubi')
+BI_COV, PD_COV, COLL_COV, COMP_COV, MPC_COV, ERS_COV, UBI_COV = (1 << i for i in range(7))
+
+
+def encode(labels, value):
+    """Turns a label into its code"""
+    return labels.index(value)
+
+
+def decode(labels, code):
+    """Turns a code back into its label"""
+    return labels[code]
+
+
+def coverage_mask(**indicators):
+    """Packs coverage indicators like bi=True, coll=False into a bitmask"""
+    mask = 0
+    for i, name in enumerate(COVERAGES):
+        if indicators.get(name, False):
+            mask |= 1 << i
+
+    return mask
+
+
+def coverage_flag(mask, bit):
+    """
+    A True/False property for one coverage bit of the bitmask stored in the attribute named mask,
+    so code can keep reading and setting things like vehicle.coll_cov_ind
+    """
+
+    def get(self):
+        return bool(getattr(self, mask) & bit)
+
+    def set(self, value):
+        setattr(self, mask, getattr(self, mask) | bit if value else getattr(self, mask) & ~bit)
+
+    return property(get, set)
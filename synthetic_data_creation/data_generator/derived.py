@@ -0,0 +1,56 @@
+"""
+Cached household properties that only get worked out again when something they depend on changes.
+
+Things like household.drivers or household.child_count_lt_18 get read over and over while a year is simulated
+(everyone's mileage, vehicle interest, child checks, summaries...) but only change when a handful of things happen.
+A derived property names the events it depends on, and whatever makes one of those events happen calls
+household.changed(event) so the stale values get dropped:
+
+    'members'   a child was born or moved out, or someone got married
+    'licensed'  someone reached driving age
+    'aged'      someone got a year older, or the household's drivers picked up a year of tenure
+    'moved'     the household moved (or picked up a vacation home)
+
+Setting household.check_cache = True works every value out again on every read and raises if the cached one is off,
+which is handy for catching a change that forgot to call household.changed().
+"""
+
+
+class derived:
+    """A read only property whose value is kept in the household's cache until one of its events happens"""
+
+    def __init__(self, *events):
+        self.events = events
+
+    def __call__(self, compute):
+        self.compute = compute
+        self.__doc__ = compute.__doc__
+        return self
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+        if '_invalidated_by' not in vars(owner):
+            owner._invalidated_by = {}
+
+        for event in self.events:
+            owner._invalidated_by.setdefault(event, []).append(name)
+
+    def __get__(self, household, owner=None):
+        if household is None:
+            return self
+
+        cache = household._derived
+        try:
+            value = cache[self.name]
+        except KeyError:
+            value = cache[self.name] = self.compute(household)
+            return value
+
+        if household.check_cache and value != self.compute(household):
+            raise RuntimeError(f'cached household.{self.name} is stale, should be {self.compute(household)!r} not {value!r}')
+
+        return value
+
+    def __set__(self, household, value):
+        raise AttributeError(f"can't set household.{self.name}")
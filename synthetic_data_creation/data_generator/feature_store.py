@@ -0,0 +1,167 @@
+"""
+A cache of the GLM/GBM modeling matrices, saved once and memory mapped by every experiment after that.
+
+The GLM and GBM notebooks all start the same way: read the whole split=train Parquet, pick the same 25 vars, turn the
+coverage_* flags into ints, encode the labels and pad the missing values forward, and then throw it all away when the
+kernel stops. modeling_matrix() does that once, saves x and y as .npy files and hands back memory maps of them, so the
+next run (or another process running at the same time) just maps the same files:
+
+    matrix = modeling_matrix('./datasets', 'train')
+    model.fit(matrix.x, matrix.y[:, 0])
+
+Each entry is keyed by the dataset's version and everything that goes into the matrix (split, features, targets,
+label codes, fill), so changing the feature list makes a new entry instead of reading a stale one. The version defaults
+to a fingerprint of the split's Parquet files (their names, sizes and modification times), pass version = 'v5' (like
+the W&B artifact version) to key on that instead. Since the files are only ever read, the OS keeps one copy of the
+pages no matter how many processes map them.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+CACHE = './feature_cache'
+
+# The vars the GLM and GBM notebooks model with, in their order
+FEATURES = ['vehicle_age', 'annual_mileage', 'vehicle_type', 'max_driver_age', 'min_driver_age', 'mean_driver_age',
+            'min_driver_tenure', 'youthful_driver_count', 'credit_score', 'garaging_location', 'household_tenure',
+            'multiline_houses', 'multiline_personal_article_policy', 'multiline_personal_liability_umbrella',
+            'multiline_rental', 'vehicle_count', 'vehicle_claim_time_since_all', 'driver_count', 'coverage_bi',
+            'coverage_coll', 'coverage_comp', 'coverage_ers', 'coverage_mpc', 'coverage_pd', 'coverage_ubi']
+
+TARGETS = ['vehicle_claim_cnt_pd_0']
+
+# The label codes W&B_GBM_Example.ipynb replaces the labels with
+LABEL_CODES = {
+    'vehicle_type': {'van': 1, 'sports car': 2, 'pickup': 3, 'sedan': 4, 'suv': 5},
+    'garaging_location': {'country': 1, 'downtown': 2, 'suburb': 3}
+}
+
+
+class cached_matrix:
+    """
+    One cache entry: x is (rows, features) and y is (rows, targets), both float64 memory maps that can't be written to.
+    Columns are in the order of features and targets, nan where a value is missing and couldn't be filled.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+
+        self.features = self.meta['features']
+        self.targets = self.meta['targets']
+        self.x = np.load(os.path.join(path, 'x.npy'), mmap_mode='r')
+        self.y = np.load(os.path.join(path, 'y.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.x)
+
+    def frame(self):
+        """x and y as pandas DataFrames with the column names, for the sklearn models that want them"""
+        import pandas as pd
+
+        return pd.DataFrame(self.x, columns=self.features), pd.DataFrame(self.y, columns=self.targets)
+
+
+def fingerprint(path):
+    """A version for a directory of Parquet files that changes whenever one of them gets rewritten"""
+    files = []
+    for root, _, names in os.walk(path):
+        for name in names:
+            stat = os.stat(os.path.join(root, name))
+            files.append((os.path.relpath(os.path.join(root, name), path), stat.st_size, stat.st_mtime_ns))
+
+    return hashlib.sha1(json.dumps(sorted(files)).encode()).hexdigest()
+
+
+def entry_key(version, split, features, targets, fill):
+    spec = {'version': version, 'split': split, 'features': list(features), 'targets': list(targets), 'fill': fill,
+            'codes': {x: LABEL_CODES[x] for x in features if x in LABEL_CODES}}
+
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def column_values(column, name):
+    """A column as float64, labels as their LABEL_CODES (unknown labels are nan), flags as 0/1 and Nones as nan"""
+    if name in LABEL_CODES:
+        labels = column.to_numpy(zero_copy_only=False)
+        values = np.full(len(labels), np.nan)
+        for label, code in LABEL_CODES[name].items():
+            values[labels == label] = code
+
+        return values
+
+    return pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def pad(values):
+    """Fills every nan with the last value above it in its column, like DataFrame.fillna(method = 'pad')"""
+    rows = np.arange(len(values))[:, None]
+    last = np.where(np.isnan(values), 0, rows)
+    np.maximum.accumulate(last, axis=0, out=last)
+
+    return np.take_along_axis(values, last, axis=0)
+
+
+def build_matrix(dataset, split, features, targets, fill):
+    table = ds.dataset(os.path.join(dataset, f'split={split}')).to_table(columns=[*features, *targets])
+
+    x = np.empty((table.num_rows, len(features)))
+    for i, name in enumerate(features):
+        x[:, i] = column_values(table.column(name), name)
+
+    y = np.column_stack([column_values(table.column(name), name) for name in targets])
+
+    if fill == 'pad':
+        x = pad(x)
+
+    return x, y
+
+
+def modeling_matrix(dataset, split='train', features=FEATURES, targets=TARGETS, version=None, fill='pad',
+                    cache=CACHE):
+    """
+    The cached_matrix of split of the Parquet dataset at dataset (laid out like parquet_writer or Data_Creation.ipynb
+    writes it), building it into cache first if it isn't there yet.
+    fill='pad' fills in missing features like the GBM notebook does, fill=None leaves them nan. Targets are never filled.
+    """
+
+    if fill not in ('pad', None):
+        raise ValueError(f"fill has to be 'pad' or None, got {fill!r}")
+
+    if version is None:
+        version = fingerprint(os.path.join(dataset, f'split={split}'))
+
+    path = os.path.join(cache, f'{split}-{entry_key(version, split, features, targets, fill)[:16]}')
+    if os.path.exists(os.path.join(path, 'meta.json')):
+        return cached_matrix(path)
+
+    x, y = build_matrix(dataset, split, features, targets, fill)
+
+    # Write the entry somewhere else and move it in whole, so nobody ever maps half an entry
+    os.makedirs(cache, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache, prefix='.building-')
+    try:
+        np.save(os.path.join(staging, 'x.npy'), x)
+        np.save(os.path.join(staging, 'y.npy'), y)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({'version': version, 'split': split, 'features': list(features), 'targets': list(targets),
+                       'fill': fill, 'codes': LABEL_CODES, 'rows': len(x)}, f, indent=2)
+
+        os.rename(staging, path)
+    except OSError:
+        # Another process finished the same entry first, theirs is just as good
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return cached_matrix(path)
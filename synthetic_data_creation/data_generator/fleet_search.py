@@ -0,0 +1,93 @@
+"""
+Looks for the best fleet of vehicles for a household without building vehicles it doesn't end up buying.
+
+household.update_vehicles() tries up to 20 candidate fleets a year. The candidates are the current fleet with a few
+vehicles dropped and/or one vehicle added, so nearly every vehicle shows up in several of them.
+Vehicles that might get bought are vehicle_specs (no id, no household), and fleet_search keeps each vehicle's cost and
+interest terms around so a candidate only has to redo the parts that depend on the whole fleet (who drives what).
+"""
+
+from .vehicle import vehicle
+from .assignment import vehicle_terms, interest_matrix, allocate_vehicles
+
+
+class vehicle_spec(vehicle):
+    """
+    A vehicle the household is thinking about buying.
+    It has everything needed to score a fleet, but it doesn't get an id or a household until it gets bought, see buy().
+    """
+
+    __slots__ = ()
+    __hash__ = object.__hash__
+
+    def __init__(self, age, vehicle_type):
+        self.age = age
+        self.years_owned = 0
+        self.vehicle_type = vehicle_type
+        self.depreciation_rate = 0.95
+
+        self.build_vehicle_type(vehicle_type)
+
+        self.purchase_price = self.msrp * self.depreciation_rate ** age
+        self.value = self.purchase_price
+
+    def buy(self, household):
+        return vehicle(household, self.age, self.vehicle_type)
+
+
+class fleet_search:
+    """
+    Scores candidate fleets for one household during one update_vehicles() call.
+    The household doesn't change while it's shopping, so its drivers and every vehicle's terms only get worked out once.
+    """
+
+    def __init__(self, household):
+        self.household = household
+        self.drivers = household.drivers
+        self.parents = household.child_count_lt_18 > 0
+        self._costs = {}
+        self._terms = {}
+
+    def cost(self, veh):
+        if veh not in self._costs:
+            self._costs[veh] = veh.monthly_cost
+
+        return self._costs[veh]
+
+    def terms(self, veh):
+        if veh not in self._terms:
+            self._terms[veh] = vehicle_terms(veh, self.parents)
+
+        return self._terms[veh]
+
+    def score(self, vehicles):
+        """Same score as household.evaluate_new_vehicles()"""
+        if len(vehicles) == 0:
+            return -1000
+
+        cost = 12 * sum([self.cost(x) for x in vehicles])
+        excess_cost = (cost - self.household.annual_income * 0.2 * 0.7)
+        if excess_cost >= 0:
+            return -500
+
+        drivers = self.drivers
+        if abs(len(drivers) - len(vehicles)) > 2:
+            return -250
+
+        interest = interest_matrix(drivers, vehicles, self.household, [self.terms(x) for x in vehicles])
+        allocation = allocate_vehicles(self.household, drivers, vehicles, interest)
+
+        match_score = 0
+        for j in range(len(vehicles)):
+            for i in range(len(drivers)):
+                match_score += interest[i][j] * allocation[i][j]
+
+        if len(drivers) != len(vehicles):
+            match_score += -1.0 * (len(drivers) - len(vehicles)) ** 2
+
+        # No one likes a giant army of matching cars
+        unique_types = len(set([x.vehicle_type for x in vehicles]))
+        if unique_types < len(vehicles):
+            match_score += 0.5 * (unique_types - len(vehicles))
+
+        return match_score
@@ -0,0 +1,125 @@
+"""
+Forks households so several different futures can be simulated from the same starting point.
+
+Running K scenarios from year t used to mean simulating every household from birth K times, or copy.deepcopy(), which
+walks the whole household <-> humans <-> vehicles <-> claims graph through the generic copy machinery and is slower than
+just simulating it again. fork() knows the shape of the graph: it makes new object shells for the household and
+everything in it, points them at each other, and shares everything that never changes once it's made (every slot
+value is shared as is: ids, fixed traits like gender or upbringing_score, favorite vehicles, a year's mileage numbers).
+The claim ledger's tallies get copied instead of worked out again from the claims.
+
+Each fork gets its own random stream from random_stream.branch(), so forks with different branch numbers have
+different futures, and the cost of K futures is just the K * years of moving them forward:
+
+    base = [household(random_stream(42, i)) for i in range(10_000)]
+    for x in base:
+        x.move_forward_n_years(10)
+
+    for branch in range(5):
+        future = fork_population(base, branch)
+        for x in future:
+            x.move_forward_n_years(5)
+
+branch=None keeps an exact copy of the random stream, so the fork lives out the very same future as the original.
+New ids come from a copy of the household's id allocator, so different branches hand out the same new ids, add the
+branch number to the output to tell them apart.
+"""
+
+from operator import attrgetter
+
+from .household import household
+from .human import human
+from .head_of_house import head_of_house
+from .spouse import spouse
+from .child import child
+from .vehicle import vehicle
+from .housing_property import housing_property
+from .claim import claim
+from .mileage import mileage_table
+from .ids import id_allocator
+
+
+def slot_copier(cls, slots):
+    """A function that makes a new cls with the same slot values as the one it's handed, household aside"""
+    slots = [x for x in slots if x != 'household']
+    values = attrgetter(*slots)
+    new = cls.__new__
+
+    def copy_of(x, household):
+        y = new(cls)
+        y.household = household
+        for name, value in zip(slots, values(x)):
+            setattr(y, name, value)
+
+        return y
+
+    return copy_of
+
+
+COPIERS = {
+    **{cls: slot_copier(cls, human.__slots__) for cls in (head_of_house, spouse, child)},
+    vehicle: slot_copier(vehicle, vehicle.__slots__),
+    housing_property: slot_copier(housing_property, housing_property.__slots__),
+    claim: slot_copier(claim, claim.__slots__)
+}
+
+
+def fork(x, branch=None):
+    """
+    A copy of household x that can be moved forward on its own.
+    branch is a whole number that picks the fork's random stream (see random_stream.branch()), None copies x's stream.
+    """
+
+    y = household.__new__(household)
+    y.__dict__.update(x.__dict__)
+
+    y.rng = x.rng.copy() if branch is None else x.rng.branch(branch)
+    y.new_id = id_allocator(x.new_id.shard, x.new_id.counter)
+    y._derived = {}
+    y.folded_claims = x.folded_claims.copy()
+
+    copies = {}
+
+    def copy_of(z):
+        if z is None:
+            return None
+        if z not in copies:
+            copies[z] = COPIERS[type(z)](z, y)
+
+        return copies[z]
+
+    y.head_of_household = copy_of(x.head_of_household)
+    y.significant_other = copy_of(x.significant_other)
+    y.children = [copy_of(z) for z in x.children]
+    y.vehicles = [copy_of(z) for z in x.vehicles]
+    y.properties = [copy_of(z) for z in x.properties]
+
+    y.claims = []
+    for z in x.claims:
+        c = copy_of(z)
+        c.vehicle = copy_of(z.vehicle)
+        c.driver = copy_of(z.driver)
+        y.claims.append(c)
+
+    y.claim_ledger = x.claim_ledger.copy(y, copies)
+
+    # This year's mileage table, with the same (never changed) miles
+    if x._mileage is not None:
+        key, table = x._mileage
+        if all(z in copies for z in (*table.drivers, *table.vehicles)):
+            same = mileage_table.__new__(mileage_table)
+            same.drivers = [copies[z] for z in table.drivers]
+            same.vehicles = [copies[z] for z in table.vehicles]
+            same.driver_index = table.driver_index
+            same.vehicle_index = table.vehicle_index
+            same.miles = table.miles
+            y._mileage = ((key[0], tuple(copies[z] for z in key[1]), tuple(copies[z] for z in key[2])), same)
+        else:
+            y._mileage = None
+
+    return y
+
+
+def fork_population(households, branch=None):
+    """fork() every household, all of them on the same branch"""
+    return [fork(x, branch) for x in households]
@@ -0,0 +1,65 @@
+"""
+The claim hazard kernel shared by household.generate_claims() and the PopulationEngine.
+
+A "cell" is one driver driving one vehicle, and each cell has a mileage for the city, highway and total road types.
+claim_hazards() works out the expected claims of every claim type for every cell at once, so a household (or a whole
+batch of households laid end to end) is a handful of array operations instead of a dict of formulas per cell.
+"""
+
+import numpy as np
+
+from .codes import SINGLE_CAR_COLLISION, MULTI_CAR_COLLISION, ERS_CLAIM
+
+ROAD_TYPES = ('city', 'highway', 'total')
+
+# Claim hazard terms by claim type code (see codes.CLAIM_TYPES) for the (city, highway, total) road types
+HAZARD_BASE = np.array([0.03, 0.03, 0.01, 0.01, 0.03, 0.03, 0.03])
+HAZARD_ROAD = np.array([
+    [1, 0.5, 1],
+    [1, 0.25, 1],
+    [1, 0.05, 1],
+    [1, 1.3, 1],
+    [1, 2.1, 1],
+    [1, 0.3, 1],
+    [1, 1.5, 1],
+])
+HAZARD_DRIVER_EXPONENT = np.array([0.9, 1, 0.1, 0.1, 0.1, 0.4, 0.3])
+HAZARD_DOWNTOWN = np.array([1, 1, 1.5, 0.6, 1, 1, 1])
+
+
+def claim_hazards(mileage, driving_hazard, vehicle_age, downtown):
+    """
+    Expected number of claims for every cell, road type and claim type, shaped (cells, road types, claim types).
+
+    mileage is (cells, road types) and already split by how much the driver uses the vehicle,
+    driving_hazard, vehicle_age and downtown (is the household's primary house downtown?) are one value per cell.
+    """
+
+    vehicle_age = np.asarray(vehicle_age, dtype=float)
+    mileage_term = np.sqrt(np.asarray(mileage, dtype=float) / 10000)
+
+    # Older vehicles crash and break down more
+    vehicle_term = np.ones((len(vehicle_age), len(HAZARD_BASE)))
+    vehicle_term[:, SINGLE_CAR_COLLISION] = np.minimum(1, 1 + 0.01 * (vehicle_age - 5))
+    vehicle_term[:, MULTI_CAR_COLLISION] = np.minimum(1, 1 + 0.0125 * (vehicle_age - 5))
+    vehicle_term[:, ERS_CLAIM] = np.minimum(1, 1 + 0.005 * vehicle_age + 0.1 * np.maximum(vehicle_age - 7, 0)
+                                            + 0.1 * np.maximum(vehicle_age - 12, 0) - 0.1 * np.maximum(vehicle_age - 17, 0)
+                                            - 0.05 * np.maximum(vehicle_age - 21, 0))
+    vehicle_term *= np.where(np.asarray(downtown)[:, None], HAZARD_DOWNTOWN[None, :], 1)
+    driver_term = np.asarray(driving_hazard, dtype=float)[:, None] ** HAZARD_DRIVER_EXPONENT[None, :]
+
+    return (HAZARD_BASE[None, None, :] * mileage_term[:, :, None] * HAZARD_ROAD.T[None, :, :]
+            * (driver_term * vehicle_term)[:, None, :])
+
+
+def claim_counts(hazard, generator, exact=False):
+    """
+    Draws the number of claims for every entry of a hazard array in one go.
+    By default this is the same shortcut as utils.poisson(), at most 1 claim with a chance of 1 - exp(-hazard).
+    exact=True draws real poisson counts instead, which can come out above 1.
+    """
+
+    if exact:
+        return generator.poisson(hazard)
+
+    return (1 - np.exp(-hazard) > generator.random(hazard.shape)).astype(np.int64)
@@ -1,4 +1,4 @@
-import random
+from .codes import MALE
 from .human import human
 from .spouse import spouse
 from .child import child
@@ -16,12 +16,14 @@ class head_of_house(human):
     This involves checks to make sure the household income is sufficent, there are enough beds, and there is an interest in having children.
     """
 
+    __slots__ = ()
+
     def __init__(self, household):
         self.household = household
 
     def start_life(self, household):
         target_age = max(16, int(
-            random.triangular(18, 80, 23) + random.normalvariate(0, 3)
+            household.rng.triangular(18, 80, 23) + household.rng.normalvariate(0, 3)
             )
         )
 
@@ -30,6 +32,7 @@ class head_of_house(human):
     def get_married(self, years_remaining):
         super().get_married()
         self.household.significant_other = spouse(self.household, self, years_remaining)
+        self.household.changed('members')
 
     def child_check(self, years_remaining):
         finances_check = (self.household.monthly_income - self.household.household_expenses > 1000)
@@ -62,16 +65,18 @@ class head_of_house(human):
         if self.gender == self.household.significant_other.gender:
             p = 0.25 * p
 
-        if p > random.uniform(0, 1):
+        if p > self.household.rng.uniform(0, 1):
             upbringing = self.household.combined_risk_score + \
-                random.normalvariate(0, 0.5)
+                self.household.rng.normalvariate(0, 0.5)
             new_child = child(self.household, years_remaining, upbringing)
             self.household.children.append(new_child)
+            self.household.changed('members')
 
             # Surprise Twins!
-            if 0.05 > random.uniform(0, 1):
+            if 0.05 > self.household.rng.uniform(0, 1):
                 new_child = child(self.household, years_remaining, upbringing)
                 self.household.children.append(new_child)
+                self.household.changed('members')
 
             self.risk_mitigation_score += 0.1
             self.household.significant_other.risk_mitigation_score += 0.1
@@ -87,7 +92,7 @@ class head_of_house(human):
 
         # Men drive a bit more!
         # According to the Federal Highway Administration, female drivers travel about 6,408 miles less than men annually.
-        if self.gender == 'm':
+        if self.gender == MALE:
             mileage *= 1.2
 
         # Unemployed people don't drive as much!
@@ -114,4 +119,4 @@ class head_of_house(human):
         city_mileage = mileage * 0.55 * self.household.primary_house.city_driving_ratio
         highway_mileage = mileage * 0.45 * self.household.primary_house.highway_driving_ratio
         
-        return (city_mileage, highway_mileage)
\ No newline at end of file
+        return (city_mileage, highway_mileage)
\ No newline at end of file
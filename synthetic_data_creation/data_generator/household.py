@@ -1,15 +1,24 @@
-import random
-#from numpy.random import poisson
 from statistics import mean
-from math import sqrt
-from uuid import uuid4
+from collections import Counter
 
-from .utils import sig, poisson
+import numpy as np
+
+from .utils import sig
+from .rng import random_stream
+from .ids import id_allocator, format_id
+from .codes import GENDERS, LOCATIONS, EDUCATION_LEVELS, VEHICLE_TYPES, DOWNTOWN, THEFT, HAIL, coverage_mask
+from .hazards import claim_hazards, claim_counts
 
 from .head_of_house import head_of_house
 from .housing_property import housing_property
-from .vehicle import vehicle
 from .claim import claim
+from .claim_ledger import claim_ledger
+from .mileage import mileage_table
+from .assignment import interest_matrix, allocate_vehicles
+from .fleet_search import fleet_search, vehicle_spec
+from .snapshot import household_snapshot
+from .derived import derived
+from .instrumentation import NULL_INSTRUMENTS, timed_phase
 
 class household:
     """
@@ -19,16 +28,27 @@ class household:
     You can then use move_forward_n_years() to move the hosuehold forward n years worth of experience. This will generate claims, and age other objects in the house.
     """
 
-    def __init__(self):
-        self.id = uuid4().hex
-        self.inforce = True
-        self.driviness = random.normalvariate(1, 0.2)
-        self.child_interest = random.choices([0, 1, 2, 3, 4, 5], [0.10, 0.15, 0.3, 0.3, 0.1, 0.05])[0]
-        self.children = []
-        self.properties = []
-        self.claims = []
-        self.vehicles = []
-        self.significant_other = None
+    # Draw real poisson claim counts instead of the at most 1 claim shortcut, see hazards.claim_counts()
+    exact_claim_counts = False
+
+    # Claims older than this many years get folded away, None keeps every one of them, see prune_claims()
+    # The summaries' claim counts and time since claim never look past 16 years, only the nested claim lists do
+    claim_horizon = None
+
+    # Check every cached property against working it out again, see derived.py
+    check_cache = False
+
+    # Phase timers and counters, switched off unless a run switches them on, see instrumentation.py
+    instruments = NULL_INSTRUMENTS
+
+    # Gets a row for every vehicle after every simulated year when set, see panel.py
+    panel = None
+
+    @timed_phase('household')
+    def __init__(self, rng=None):
+        self.start_empty(rng)
+        self.driviness = self.rng.normalvariate(1, 0.2)
+        self.child_interest = self.rng.choices([0, 1, 2, 3, 4, 5], [0.10, 0.15, 0.3, 0.3, 0.1, 0.05])[0]
         self.head_of_household = head_of_house(self)
         self.head_of_household.start_life(self)
         self.tenure_years = 0
@@ -42,7 +62,27 @@ class household:
                 veh.years_owned = 0
             
             else:
-                veh.years_owned = int(random.randint(0, veh.age))   
+                veh.years_owned = int(self.rng.randint(0, veh.age))   
+
+    def start_empty(self, rng=None):
+        """The bookkeeping every household starts with, before anyone has lived any of their life"""
+        # Everything in the household draws from this stream, see rng.random_stream
+        self.rng = rng if rng is not None else random_stream()
+        # Cached derived properties, see derived.py
+        self._derived = {}
+        # Ids for the household and everything in it, the household's index in the build is its shard, see ids.py
+        self.new_id = id_allocator(self.rng.index)
+        self.id = self.new_id()
+        self.inforce = True
+        self.children = []
+        self.properties = []
+        self.claims = []
+        self.claim_ledger = claim_ledger(self)
+        # How many claims prune_claims() has let go of, by why they went
+        self.folded_claims = Counter()
+        self.vehicles = []
+        self._mileage = None
+        self.significant_other = None
 
     def __hash__(self):
         return hash(self.id)
@@ -52,254 +92,177 @@ class household:
             return None
 
         for _ in range(n):
-            for x in self.children:
-                x.move_forward_n_years(1)
+            with self.instruments.phase('aging'):
+                for x in self.children:
+                    x.move_forward_n_years(1)
 
-            if self.significant_other is not None:
-                self.significant_other.move_forward_n_years(1)
+                if self.significant_other is not None:
+                    self.significant_other.move_forward_n_years(1)
 
-            self.head_of_household.move_forward_n_years(1)
+                self.head_of_household.move_forward_n_years(1)
 
-            for x in self.vehicles:
-                x.move_forward_n_years(1)
+                for x in self.vehicles:
+                    x.move_forward_n_years(1)
 
-            # Update all the tenures
-            self.tenure_years += 1
-            for x in self.drivers:
-                x.tenure_years += 1
+                # Update all the tenures
+                self.tenure_years += 1
+                for x in self.drivers:
+                    x.tenure_years += 1
+                self.changed('aged')
 
             self.household_lapse_check()
 
             if not self.inforce:
                 return None
             
-            if 0.5 < random.uniform(0, 1):
+            if 0.5 < self.rng.uniform(0, 1):
                     self.update_vehicles()
             
             self.generate_claims()
 
+            if self.panel is not None:
+                self.panel.record(self)
+
+            self.prune_claims()
 
-    def generate_claims(self):
-        mileage = self.determine_mileage()
-
-        for key, mileage in mileage.items():
-            driver, veh, road_type = key
-
-            driving_hazard = driver.driving_hazard
-
-            hazards = {
-                'single_car_collision': (
-                    0.03 * sqrt(mileage/10000) *
-                    (0.5 if road_type == 'highway' else 1) *
-                    (driving_hazard ** 0.9) *
-                    min(1, 1 + 0.01 * (veh.age - 5))
-                ),
-                'multi_car_collision': (
-                    0.03 * sqrt(mileage/10000) *
-                    (0.25 if road_type == 'highway' else 1) *
-                    (driving_hazard) *
-                    min(1, 1 + 0.0125 * (veh.age - 5))
-                ),
-                'theft': (
-                    0.01 * sqrt(mileage/10000) *
-                    (0.05 if road_type == 'highway' else 1) *
-                    (driving_hazard ** 0.1) *
-                    (1.5 if veh.household.primary_house.location == 'downtown' else 1)
-                ),
-                'hail': (                    
-                    0.01 * sqrt(mileage/10000) *
-                    (1.3 if road_type == 'highway' else 1) *
-                    (driving_hazard ** 0.1) *
-                    (0.6 if veh.household.primary_house.location == 'downtown' else 1)
-                ),
-                'glass': (
-                    0.03 * sqrt(mileage/10000) *
-                    (2.1 if road_type == 'highway' else 1) *
-                    (driving_hazard ** 0.1)
-                ),
-                'ubi': (
-                    0.03 * sqrt(mileage/10000) *
-                    (0.3 if road_type == 'highway' else 1) *
-                    (driving_hazard ** 0.4)
-                ),
-                'ers': (
-                    0.03 * sqrt(mileage/10000) *
-                    (1.5 if road_type == 'highway' else 1) *
-                    (driving_hazard ** 0.3) *
-                    min(1, 1 + 0.005 * veh.age + 0.1 * max(veh.age - 7, 0) + 0.1 * max(veh.age - 12, 0) - 0.1 * max(veh.age - 17, 0) - 0.05 * max(veh.age - 21, 0))
-                ),
-            }
 
-            hazard_rates = list(hazards.values())
-            claim_types = list(hazards.keys())
-            #n = poisson(hazard_rates)
-            n = [poisson(x) for x in hazard_rates]
+    @timed_phase('generate_claims')
+    def generate_claims(self):
+        table = self.determine_mileage()
+        if table.miles.size == 0:
+            return None
 
-            for i in range(len(n)):
-                claim_type = claim_types[i]
-                count = n[i]
+        # Every (driver, vehicle) cell gets a city, highway and a 'total' road type, claims come from all 3
+        vehicle_count = len(table.vehicles)
+        miles = table.miles.reshape(-1, 2)
+        hazard = claim_hazards(
+            np.column_stack([miles, miles.sum(axis=1)]),
+            np.repeat([driver.driving_hazard for driver in table.drivers], vehicle_count),
+            np.tile([veh.age for veh in table.vehicles], len(table.drivers)),
+            np.full(len(miles), self.primary_house.location == DOWNTOWN)
+        )
+
+        # One draw for every cell, road type, and claim type
+        counts = claim_counts(hazard, self.rng.generator, self.exact_claim_counts)
+
+        for i, road, j in zip(*np.nonzero(counts)):
+            driver, veh = table.drivers[i // vehicle_count], table.vehicles[i % vehicle_count]
+            if j == THEFT or j == HAIL:
+                assigned_driver = None
+            else:
+                assigned_driver = driver
 
-                if count > 0:
-                    for _ in range(count):
-                        if claim_type in ['theft', 'hail']:
-                            assigned_driver = None
-                        else:
-                            assigned_driver = driver
+            for _ in range(counts[i, road, j]):
+                new_claim = claim(j, self, vehicle=veh, driver=assigned_driver)
+                self.claims.append(new_claim)
+                self.claim_ledger.add(new_claim)
 
-                        self.claims.append(claim(claim_type, self, vehicle=veh, driver=assigned_driver))
+        self.instruments.count('claims_created', int(counts.sum()))
             
-    def determine_mileage(self):
-        mileage = {}
+    @timed_phase('prune_claims')
+    def prune_claims(self):
+        """
+        Folds away the claims nothing can reach anymore, so the claims don't pile up over a long simulation.
+        A claim is kept while it's from this year (panel.py reads those), in the claim ledger (what the summaries use),
+        or a paid claim on one of the household's vehicles (vehicle.prior_claims). The rest only get counted in
+        folded_claims: 'unpaid', 'departed' (its vehicle or driver left) or 'expired' (older than claim_horizon).
+        """
 
-        veh_assigments = self.determine_veh_assignements()
+        if not self.claims:
+            return None
 
-        for driver in self.drivers:
-            city_mileage, highway_mileage = driver.determine_mileage()
+        year = self.tenure_years
+        if self.claim_horizon is not None:
+            self.claim_ledger.expire(year - self.claim_horizon)
+
+        in_ledger = {id(x) for x in self.claim_ledger.claims}
+        vehicles = {id(x) for x in self.vehicles}
+
+        kept = []
+        for x in self.claims:
+            if self.claim_horizon is not None and year - x.when_occured > self.claim_horizon:
+                self.folded_claims['expired'] += 1
+            elif x.when_occured == year or id(x) in in_ledger or (x.paid_indicator and id(x.vehicle) in vehicles):
+                kept.append(x)
+            elif not x.paid_indicator:
+                self.folded_claims['unpaid'] += 1
+            else:
+                self.folded_claims['departed'] += 1
 
-            for veh in self.vehicles:           
-                allocation = veh_assigments[(driver, veh)]
+        self.claims = kept
 
-                mileage.update({
-                    (driver, veh, 'city'): city_mileage*allocation,
-                    (driver, veh, 'highway'): highway_mileage*allocation,
-                    (driver, veh, 'total'): (city_mileage+highway_mileage)*allocation,
-                })
+    def determine_mileage(self):
+        """
+        Everyone's mileage on every vehicle for the year as a mileage_table.
+        The table only changes when the year, the vehicles, or the drivers do, so it gets reused until then.
+        """
 
-        return mileage
+        drivers = self.drivers
+        key = (self.tenure_years, tuple(self.vehicles), tuple(drivers))
+
+        if self._mileage is None or self._mileage[0] != key:
+            table = mileage_table(drivers, self.vehicles, self.vehicle_allocation())
+            self._mileage = (key, table)
+
+        return self._mileage[1]
     
     def summarize_mileage(self, level = 'veh'):
-        if level == 'veh':
-            result = self.determine_mileage()
-            final = {veh:0 for veh in self.vehicles}
+        table = self.determine_mileage()
 
-            for key, value in result.items():
-                _, veh, road_type = key
-                if road_type == 'total':
-                    final[veh] += value
-
-            return final
+        if level == 'veh':
+            return dict(zip(table.vehicles, table.per_vehicle.tolist()))
         
         elif level == 'drv':
-            result = self.determine_mileage()
-            final = {drv:0 for drv in self.drivers}
-
-            for key, value in result.items():
-                driver, _, road_type = key
-                if road_type == 'total':
-                    final[driver] += value
-
-            return final
+            return dict(zip(table.drivers, table.per_driver.tolist()))
     
-    def determine_veh_assignements(self, vehicles = None):
-        pick_nth = lambda list_val, select: [list_val.index(i) for i in sorted(list_val, reverse=True)][:select][0]
+    def vehicle_allocation(self, vehicles = None, interest = None):
+        """
+        Share of each vehicle's driving done by each driver, as a list of rows (one row per driver).
+        interest can be passed in if the interest_matrix for these vehicles has already been worked out.
+        """
 
         vehicles = vehicles if vehicles is not None else self.vehicles
-        veh_cnt = len(vehicles) 
-
-        if len(vehicles) == 1:
-            # Everyone drives that car
-            return {
-                (driver, veh): 1
-                for driver in self.drivers
-                for veh in vehicles
-            }
-
-        if self.significant_other is None:
-            # Driver gets to drive everything, find their favorite
-            head_of_house_preferences = [self.head_of_household.vehicle_interest(veh, vehicles) for veh in vehicles]             
-            
-            first_pick = pick_nth(head_of_house_preferences, 1)  
-            if veh_cnt == 2:
-                return {
-                    (driver, veh): 0.85 if i == first_pick else 0.15
-                    for driver in self.drivers
-                    for i, veh in enumerate(vehicles)
-                }
-            else:
-                second_pick = pick_nth(head_of_house_preferences, 2)
-                rest = 0.05/(veh_cnt - 2)
-
-                return {
-                    (driver, veh): 0.85 if i == first_pick else (0.1 if i == second_pick else rest)
-                    for driver in self.drivers
-                    for i, veh in enumerate(vehicles)
-                }
-
-        else:
-            # Got to pick which driver gets each car. Start by calculating the parents to their top 2 fav cars
+        drivers = self.drivers
 
-            hoh_preferences = [self.head_of_household.vehicle_interest(veh, vehicles) for veh in vehicles]
-            so_preferences = [self.significant_other.vehicle_interest(veh, vehicles) for veh in vehicles]
+        if interest is None:
+            interest = interest_matrix(drivers, vehicles, self)
 
-            hoh_first_pick = pick_nth(hoh_preferences, 1) 
-            so_first_pick = pick_nth(so_preferences, 1)
-            hoh_second_pick = pick_nth(hoh_preferences, 2) 
-            so_second_pick = pick_nth(so_preferences, 2)
+        return allocate_vehicles(self, drivers, vehicles, interest)
 
-            if hoh_first_pick != so_first_pick:
-                best_hoh_pick = hoh_first_pick
-                best_so_pick = so_first_pick
-            else:
-                # Figure out who has to use their second fav car based on aggregate happiness
-                score_1 = hoh_preferences[hoh_first_pick] + so_preferences[so_second_pick]
-                score_2 = hoh_preferences[hoh_second_pick] + so_preferences[so_first_pick]
-
-                if score_1 >= score_2:
-                    best_hoh_pick = hoh_first_pick
-                    best_so_pick = so_second_pick
-                else:                    
-                    best_hoh_pick = hoh_first_pick
-                    best_so_pick = so_second_pick
-
-        rest = 0.15/(veh_cnt - 1)        
-        result = {
-                    (self.head_of_household, veh): 0.85 if i == best_hoh_pick else rest
-                    for i, veh in enumerate(vehicles)
-                }
-        
-        result.update({
-                    (self.significant_other, veh): 0.85 if i == best_so_pick else rest
-                    for i, veh in enumerate(vehicles)
-                })      
+    def determine_veh_assignements(self, vehicles = None):
+        vehicles = vehicles if vehicles is not None else self.vehicles
+        allocation = self.vehicle_allocation(vehicles)
 
-        if self.driver_count > 2:
-            claimed_cars = [best_hoh_pick, best_so_pick]
-            
-            other_drivers = [driver for driver in self.children if driver.is_driving_age]
-           
-            preferences = [[x.vehicle_interest(veh, vehicles) ** 2 if i not in claimed_cars else (0.75 * x.vehicle_interest(veh, vehicles)) ** 2
-                                for i, veh in enumerate(vehicles)] 
-                                for x in other_drivers]
-            balanced_preferences = [[x/sum(y) for x in y] for y in preferences]                
-            sum_of_veh_pref = [sum(x[i] for x in preferences) for i in range(veh_cnt)]
-
-            allocated_preferences = [[x/sum_of_veh_pref[i] for i, x in enumerate(y)] for y in balanced_preferences]
-            final_preferences = [[x/sum(y) for x in y] for y in allocated_preferences]
-
-            for i, x in enumerate(other_drivers):
-                pref = final_preferences[i]
-                result.update({
-                                (x, veh): pref[j]
-                                for j, veh in enumerate(vehicles)
-                            })
-                
-        return result
+        return {
+            (driver, veh): allocation[i][j]
+            for i, driver in enumerate(self.drivers)
+            for j, veh in enumerate(vehicles)
+        }
 
     def remove_child(self, removal_child):
         """Remove a child when they get to an old enough age"""
 
         removal_child.inforce = False
+        self.claim_ledger.remove_driver(removal_child)
         self.children = [x for x in self.children if x != removal_child]
+        self.changed('members')
+
+    def changed(self, event):
+        """Drops the cached properties that depend on event, see derived.py"""
+        cache = self._derived
+        if cache:
+            for name in self._invalidated_by[event]:
+                cache.pop(name, None)
 
     def generate_veh_list_from_scratch(self, n):
         vehicles = []
 
         for i in range(n):    
-            age = int(random.triangular(0, 25, 5))
-            vehicle_type = random.choice(['pickup', 'suv', 'sedan', 'sports car', 'van'])
-            vehicles.append(vehicle(self, age, vehicle_type))
+            age = int(self.rng.triangular(0, 25, 5))
+            vehicle_type = self.rng.choice(range(len(VEHICLE_TYPES)))
+            vehicles.append(vehicle_spec(age, vehicle_type))
         
-        return frozenset(vehicles)
+        return tuple(vehicles)
     
     def generate_veh_list(self, add_car, remove_car_n):
         vehicles = self.vehicles.copy()
@@ -309,49 +272,22 @@ class household:
                 if len(vehicles) == 1:
                     break
                 ids = len(vehicles)
-                id = random.choice(range(ids))
+                id = self.rng.choice(range(ids))
                 vehicles = [x for i, x in enumerate(vehicles) if i != id]
 
         # Randomly add 1 car
         if add_car:
-            age = int(random.uniform(0, 25))
-            vehicle_type = random.choice(['pickup', 'suv', 'sedan', 'sports car', 'van'])
+            age = int(self.rng.uniform(0, 25))
+            vehicle_type = self.rng.choice(range(len(VEHICLE_TYPES)))
 
-            vehicles.append(vehicle(self, age, vehicle_type))
+            vehicles.append(vehicle_spec(age, vehicle_type))
         
-        return frozenset(vehicles)
+        return tuple(vehicles)
 
     def evaluate_new_vehicles(self, vehicles):
-        if len(vehicles) == 0:
-            return -1000
-        
-        cost = 12 * sum([x.monthly_cost for x in vehicles])        
-        excess_cost = (cost - self.annual_income * 0.2 * 0.7)
-        if excess_cost >= 0:
-            return -500
-                
-        drivers = self.drivers
-        if abs(len(drivers) - len(vehicles)) > 2:
-            return -250
-        
-        prefs = {(driver, veh): driver.vehicle_interest(veh, vehicles) for veh in vehicles for driver in drivers}
-        allocation = self.determine_veh_assignements(vehicles)
-
-        match_score = 0
-        for key, value in prefs.items():
-            driver, veh = key
-            match_score += value * allocation[key]
-
-        if len(drivers) != len(vehicles):
-            match_score += -1.0 * (len(drivers) - len(vehicles)) ** 2
-
-        # No one likes a giant army of matching cars
-        unique_types = len(set([x.vehicle_type for x in vehicles]))
-        if unique_types < len(vehicles):
-            match_score += 0.5 * (unique_types - len(vehicles))
-
-        return match_score
+        return fleet_search(self).score(vehicles)
     
+    @timed_phase('update_vehicles')
     def update_vehicles(self):       
         cnt = self.driver_count 
 
@@ -363,11 +299,11 @@ class household:
             coverages = {
                 'bi' : True,
                 'pd' : True,
-                'coll' : p_major > random.uniform(0, 1),
-                'comp' : p_major > random.uniform(0, 1),
-                'mpc' : p_minor > random.uniform(0, 1),
-                'ers' : p_minor > random.uniform(0, 1),
-                'ubi' : p_minor > random.uniform(0, 1)
+                'coll' : p_major > self.rng.uniform(0, 1),
+                'comp' : p_major > self.rng.uniform(0, 1),
+                'mpc' : p_minor > self.rng.uniform(0, 1),
+                'ers' : p_minor > self.rng.uniform(0, 1),
+                'ubi' : p_minor > self.rng.uniform(0, 1)
             }
 
             if self.driver_count <= 1:
@@ -396,15 +332,15 @@ class household:
             # Decide if we want to modify any of the coverages randomly
             p_upgrade = 0.12 * sig(self.head_of_household.risk_mitigation_score/5)
             p_downgrade = 0.05 - 0.05 * sig(self.head_of_household.risk_mitigation_score/5)
-            coverages = {key: False if p_downgrade > random.uniform(0, 1) else value for key, value in coverages.items()}
-            coverages = {key: value | (p_upgrade > random.uniform(0, 1)) for key, value in coverages.items()}
+            coverages = {key: False if p_downgrade > self.rng.uniform(0, 1) else value for key, value in coverages.items()}
+            coverages = {key: value | (p_upgrade > self.rng.uniform(0, 1)) for key, value in coverages.items()}
  
             # Mandatory!
             coverages['bi'] = True
             coverages['pd'] = True
 
             options = [
-                frozenset(self.vehicles), 
+                tuple(self.vehicles), 
                 *[self.generate_veh_list(add_car = True, remove_car_n = 0) for i in range(5)],
                 *[self.generate_veh_list(add_car = True, remove_car_n = 1) for i in range(3)],
                 *[self.generate_veh_list(add_car = True, remove_car_n = 2) for i in range(3)],
@@ -413,26 +349,31 @@ class household:
                 *[self.generate_veh_list(add_car = False, remove_car_n = 3) for i in range(1)],
                 ]
 
-        options = [list(x) for x in set(options)]
-        scores = [self.evaluate_new_vehicles(x) for x in options]
-        best_score = [scores.index(i) for i in sorted(scores, reverse=True)][:1][0]
-
-        # If there are no good veh options, just buy a few crappy sedan I guess :P 
-        if best_score < -100:
-            self.vehicles = [vehicle(self, 'sedan', 20) for i in range(max(cnt, 1))]
-        new_vehicles = options[best_score]
-
+        # Drop repeated fleets, keeping the first of each so the order never depends on hashing
+        unique = {}
+        for x in options:
+            unique.setdefault(frozenset(x), list(x))
+        options = list(unique.values())
+        self.instruments.count('fleets_evaluated', len(options))
+        search = fleet_search(self)
+        scores = [search.score(x) for x in options]
+
+        # Fleets that tie for the best score used to come out of a set in no particular order, so pick one of them at
+        # random (the first one would always favor the smallest fleet)
+        top = max(scores)
+        tied = [i for i, x in enumerate(scores) if x == top]
+        best = self.rng.choice(tied) if len(tied) > 1 else tied[0]
+
+        # Only now do the new vehicles actually get bought
+        new_vehicles = [x.buy(self) if isinstance(x, vehicle_spec) else x for x in options[best]]
+
+        coverage = coverage_mask(**coverages)
         for veh in new_vehicles:
-            veh.bi_cov_ind = coverages['bi']
-            veh.pd_cov_ind = coverages['pd']
-            veh.coll_cov_ind = coverages['coll']
-            veh.comp_cov_ind = coverages['comp']
-            veh.mpc_cov_ind = coverages['mpc']
-            veh.ers_cov_ind = coverages['ers']
-            veh.ubi_cov_ind = coverages['ubi']
+            veh.coverage = coverage
 
-        self.vehicles = options[best_score]
+        self.vehicles = new_vehicles
 
+    @timed_phase('update_house')
     def update_house(self):
         if len(self.properties) <= 1:
             house_1 = housing_property(1, self)
@@ -453,7 +394,10 @@ class household:
                 self.properties = [house_2]
             else:
                 self.properties = [house_1]
+
+            self.changed('moved')
     
+    @timed_phase('household_lapse_check')
     def household_lapse_check(self):
         hh_age = self.head_of_household.age
 
@@ -477,15 +421,17 @@ class household:
         if hh_age > 75:
             p += ((hh_age - 75)/95) ** 2
 
-        if p > random.uniform(0, 1):
+        if p > self.rng.uniform(0, 1):
             self.inforce = False
 
     @property
+    @timed_phase('summary')
     def summary(self):
-        claims = [x for x in self.claims if (x.driver_in_force or x.driver is None) and x.how_old != 0 and x.paid_indicator]
+        ledger = self.claim_ledger
+        claims = [x for x in ledger.claims if x.how_old != 0]
 
         results = {
-            'household_id': self.id,
+            'household_id': format_id(self.id),
             'inforce': self.inforce,
             'household_tenure': self.tenure_years,
             'min_driver_tenure': self.min_driver_tenure,
@@ -504,117 +450,52 @@ class household:
             'vehicle_info': [x.summary for x in self.vehicles],
             'driver_info': [x.summary for x in self.drivers],
             'claims_info': [x.summary for x in claims],
-            'garaging_location': self.garaging_location
+            'garaging_location': LOCATIONS[self.garaging_location]
         }
 
         drivers_list = self.drivers
+        by_age = Counter([x.age for x in drivers_list])
+        by_age_gender = Counter([(x.age, x.gender) for x in drivers_list])
 
         driver_counts = {
-            f'driver_cnt_{age}':  len([x for x in drivers_list if x.age == age])
+            f'driver_cnt_{age}':  by_age[age]
             for age in range(16, 99)
         }
         results.update(**driver_counts)
 
         driver_counts = {
-            f'driver_cnt_{age}_{gender}':  len([x for x in drivers_list if x.age == age and x.gender == gender])
+            f'driver_cnt_{age}_{label}':  by_age_gender[age, gender]
             for age in range(16, 99)
-            for gender in ['m', 'f']
+            for gender, label in enumerate(GENDERS)
         }
 
         results.update(**driver_counts)
 
-        # Count of claims
-        claim_counts = {
-            f'household_claim_cnt_all_{age}': len([x for x in claims if x.how_old == age and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'household_claim_cnt_bi_{age}': len([x for x in claims if x.how_old == age and x.bi == 1 and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'household_claim_cnt_pd_{age}': len([x for x in claims if x.how_old == age and x.pd == 1 and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'household_claim_cnt_coll_{age}': len([x for x in claims if x.how_old == age and x.coll == 1 and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'household_claim_cnt_comp_{age}': len([x for x in claims if x.how_old == age and x.comp == 1 and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'household_claim_cnt_mpc_{age}': len([x for x in claims if x.how_old == age and x.mpc == 1 and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'household_claim_cnt_ers_{age}': len([x for x in claims if x.how_old == age and x.ers == 1 and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'household_claim_cnt_ubi_{age}': len([x for x in claims if x.how_old == age and x.ubi == 1 and x.paid_indicator])
-            for age in range(1, 16)
-        }
-        results.update(**claim_counts)
+        # Count of claims, the ledger keeps these up to date as claims come in
+        for coverage in ['all', 'bi', 'pd', 'coll', 'comp', 'mpc', 'ers', 'ubi']:
+            claim_counts = {
+                f'household_claim_cnt_{coverage}_{age}': ledger.count(coverage, age)
+                for age in range(1, 16)
+            }
+            results.update(**claim_counts)
 
         # Time Since Claim
-        def min_with_none(x): return min(x) if len(x) > 0 else None
         claim_counts = {
-            'household_claim_time_since_all': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16]),
-            'household_claim_time_since_bi': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.bi == 1]),
-            'household_claim_time_since_pd': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.pd == 1]),
-            'household_claim_time_since_comp': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.comp == 1]),
-            'household_claim_time_since_coll': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.coll == 1]),
-            'household_claim_time_since_mpc': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.mpc == 1]),
-            'household_claim_time_since_ers': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.ers == 1]),
-            'household_claim_time_since_ubi': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.ubi == 1])
+            f'household_claim_time_since_{coverage}': ledger.time_since(coverage)
+            for coverage in ['all', 'bi', 'pd', 'comp', 'coll', 'mpc', 'ers', 'ubi']
         }
         results.update(**claim_counts)
 
         return results
 
     @property
+    @timed_phase('summary_per_vehicle')
     def summary_per_vehicle(self):
-        results = self.summary
-        claims_info = results.pop('claims_info')
-        vehicle_info = results.pop('vehicle_info')
-        mileage_info = self.summarize_mileage('veh')
-
-        selection = ['vehicle_id', 'vehicle_age', 'vehicle_years_owned', 'vehicle_type']
-        household_vehicle_info = [
-            {key:value for key,value in x.items() if key in selection}
-            for x in vehicle_info
-            ]
-
-        summary = [dict(results,
-                        **x,
-                        annual_mileage = max(1000, round([value for key, value in mileage_info.items() if key.id == x['vehicle_id']][0], -3) + 
-                                             random.choices([-2000, -1000, 0, 1000, 2000], [0.1, 0.2, 0.3, 0.2, 0.1])[0]
-                                             ),
-                        vehicle_claims=[
-                            y for y in claims_info if y['vehicle_id'] == x['vehicle_id']],
-                        other_claims=[
-                            y for y in claims_info if y['vehicle_id'] != x['vehicle_id']],
-                        household_vehicles_info = [dict(y, this_vehicle_ind = y['vehicle_id'] == x['vehicle_id']) for y in household_vehicle_info]
-                        )
-                   for x in vehicle_info]
-
-        return summary
+        """One row per vehicle, the household features are worked out once and shared by all of them (see snapshot.py)"""
+        return self.snapshot().vehicle_rows()
+
+    def snapshot(self):
+        return household_snapshot(self)
 
     @property
     def summary_with_debugging(self):
@@ -624,7 +505,7 @@ class household:
             'monthly_income': self.monthly_income,
             'monthly_expenses': self.household_expenses,
             'best_job': max([x.job_class for x in self.household_members]),
-            'hoh_education': self.head_of_household.education,
+            'hoh_education': EDUCATION_LEVELS[self.head_of_household.education],
             'net_monthly': self.monthly_income - self.household_expenses,
             'min_driver_hazard': self.min_driver_hazard,
             'max_driver_hazard': self.max_driver_hazard,
@@ -637,13 +518,13 @@ class household:
 
         return results
 
-    @property
+    @derived('members')
     def household_members(self):
         members = [self.head_of_household,
                    self.significant_other, *self.children]
         return [x for x in members if x is not None]
 
-    @property
+    @derived('members', 'licensed')
     def drivers(self):
         return [x for x in self.household_members if x.is_driving_age]
 
@@ -665,7 +546,7 @@ class household:
     def driver_count(self):
         return len(self.drivers)
 
-    @property
+    @derived('members', 'licensed', 'aged')
     def youthful_driver_count(self):
         return len([x for x in self.drivers if x.age <= 25])
 
@@ -673,11 +554,11 @@ class household:
     def child_count(self):
         return len(self.children)
     
-    @property
+    @derived('members', 'aged')
     def child_count_lt_18(self):
         return len([x for x in self.children if x.age < 18])
     
-    @property
+    @derived('members', 'licensed')
     def non_driver_cnt(self):
         if len(self.children) == 0:
             return 0
@@ -714,7 +595,7 @@ class household:
     @property
     def multiline_houses(self):
         report_rate = 0.85
-        if report_rate >= random.uniform(0, 1):
+        if report_rate >= self.rng.uniform(0, 1):
             return len([x for x in self.properties if x.ownership_type == 'owned'])
         else:
             return 0
@@ -722,7 +603,7 @@ class household:
     @property
     def multiline_rental(self):
         report_rate = 0.45
-        if report_rate >= random.uniform(0, 1):
+        if report_rate >= self.rng.uniform(0, 1):
             return len([x for x in self.properties if x.ownership_type == 'rental'])
         else:
             return 0
@@ -744,7 +625,7 @@ class household:
         if self.annual_income > 195_000:
             report_rate += 0.1
 
-        return 1 if report_rate >= random.uniform(0, 1) else 0
+        return 1 if report_rate >= self.rng.uniform(0, 1) else 0
 
     @property
     def multiline_personal_article_policy(self):
@@ -754,9 +635,9 @@ class household:
         report_rate = 0.15
 
         if self.significant_other is not None:
-            return 1 if self.annual_income > 75_000 and report_rate >= random.uniform(0, 1) else 0
+            return 1 if self.annual_income > 75_000 and report_rate >= self.rng.uniform(0, 1) else 0
 
-        return 1 if self.annual_income > 150_000 and report_rate >= random.uniform(0, 1) else 0
+        return 1 if self.annual_income > 150_000 and report_rate >= self.rng.uniform(0, 1) else 0
 
     @property
     def garage_count(self):
@@ -776,35 +657,35 @@ class household:
     def vehicle_count(self):
         return len(self.vehicles)
 
-    @property
+    @derived('members', 'licensed', 'aged')
     def min_driver_age(self):
         if self.driver_count == 0:
             return None
 
         return min([x.age for x in self.drivers])
 
-    @property
+    @derived('members', 'licensed', 'aged')
     def max_driver_age(self):
         if self.driver_count == 0:
             return None
 
         return max([x.age for x in self.drivers])
 
-    @property
+    @derived('members', 'licensed', 'aged')
     def max_driver_tenure(self):
         if self.driver_count == 0:
             return None
 
         return max([x.tenure_years for x in self.drivers])
 
-    @property
+    @derived('members', 'licensed', 'aged')
     def min_driver_tenure(self):
         if self.driver_count == 0:
             return None
 
         return min([x.tenure_years for x in self.drivers])
 
-    @property
+    @derived('members', 'licensed', 'aged')
     def mean_driver_age(self):
         if self.driver_count == 0:
             return None
@@ -857,7 +738,7 @@ class household:
 
         return mean([x.risk_mitigation_score for x in self.drivers])
     
-    @property
+    @derived('moved')
     def primary_house(self):
         if len(self.properties) == 0:
             return None
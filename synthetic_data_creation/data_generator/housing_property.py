@@ -1,8 +1,7 @@
-import random
 from statistics import mean
-from uuid import uuid4
 
 from .utils import sig
+from .codes import DOWNTOWN, SUBURB, COUNTRY
 
 
 
@@ -13,14 +12,21 @@ class housing_property:
     2) It controls if the household has enough garages to house all their cars for certain types of claims.
     3) It is a source of expenses that could prevent other financial decisions.
     4) It can act as data for predicting loss (it should be correlated with upbringing scores)
+
+    location is a code from codes.LOCATIONS.
     """
 
+    __slots__ = (
+        'household', 'id', 'property_class', 'is_primary', 'driviness', 'ownership_type', 'garages', 'beds',
+        'monthly_cost', 'location', 'city_driving_ratio', 'highway_driving_ratio'
+    )
+
     def __init__(self, property_class, household):
         self.household = household
-        self.id = uuid4().hex
+        self.id = self.household.new_id()
         self.property_class = property_class
         self.is_primary = True
-        self.driviness = random.normalvariate(1, 0.1)
+        self.driviness = self.household.rng.normalvariate(1, 0.1)
 
         if property_class == 1:
             self.build_apartment()
@@ -29,37 +35,42 @@ class housing_property:
         elif property_class == 3:
             self.build_complete_house()
 
-        if self.location == 'downtown':
+        self.set_location(self.location)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def set_location(self, location):
+        self.location = location
+
+        if self.location == DOWNTOWN:
             self.city_driving_ratio = 1.4
             self.highway_driving_ratio = 0.35
-        elif self.location == 'suburb':
+        elif self.location == SUBURB:
             self.city_driving_ratio = 0.8
             self.highway_driving_ratio = 1.25
-        elif self.location == 'country':
+        elif self.location == COUNTRY:
             self.city_driving_ratio = 0.5
             self.highway_driving_ratio = 1.8
 
-    def __hash__(self):
-        return hash(self.id)
-
     def build_apartment(self):
         self.ownership_type = 'rental'
         self.garages = 0
         self.beds = 3
         self.monthly_cost = 1000
-        self.location = random.choices(['downtown', 'suburb', 'country'], [0.8, 0.15, 0.05])[0]
+        self.location = self.household.rng.choices([DOWNTOWN, SUBURB, COUNTRY], [0.8, 0.15, 0.05])[0]
 
     def build_modest_house(self):
         self.ownership_type = 'owned'
         self.garages = 3
         self.beds = 4
         self.monthly_cost = 2000
-        self.location = random.choices(['downtown', 'suburb', 'country'], [0.4, 0.4, 0.2])[0]
+        self.location = self.household.rng.choices([DOWNTOWN, SUBURB, COUNTRY], [0.4, 0.4, 0.2])[0]
 
     def build_complete_house(self):
         self.ownership_type = 'owned'
         self.garages = 5
         self.beds = 7
         self.monthly_cost = 4000
-        self.location = random.choices(['downtown', 'suburb', 'country'], [0.2, 0.7, 0.3])[0]
+        self.location = self.household.rng.choices([DOWNTOWN, SUBURB, COUNTRY], [0.2, 0.7, 0.3])[0]
 
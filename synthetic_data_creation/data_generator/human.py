@@ -1,64 +1,77 @@
-import random
 from statistics import mean
 from .utils import sig
-from uuid import uuid4
+from .ids import format_id
+from .codes import (GENDERS, MALE, FEMALE, PICKUP, SUV, SEDAN, SPORTS_CAR, VAN, UNEDUCATED, HIGH_SCHOOL_DEGREE,
+                    ATTENDING_COLLEGE, COLLEGE_GRADUATE, POSTBACCALAUREATE_DEGREE)
 
 class human:
     """
     Humans are one of the main classes of the process.
     Humans have an "upbringing score" that determines much of their life (occupation, income, driving ability, education, etc...)
     Each year the human ages up, improving their risk mitigation, potentially causing a wedding 🤵👰, updating their education status, etc...
+
+    gender and education are codes from codes.py (GENDERS, EDUCATION_LEVELS), the summary turns them back into labels.
     """
 
+    __slots__ = (
+        'household', 'id', 'driviness', 'age', 'tenure_years', 'driving_experience', 'is_driving_age', 'gender',
+        'married', 'education', 'job_class', 'inforce', 'prefered_vehicle', 'age_licensed', 'married_age',
+        'upbringing_score', 'risk_mitigation_score', 'job_risk_deviation', 'financial_risk_deviation'
+    )
+
     def __init__(self, household, target_age, target_gender=None, upbringing_score=None):
         self.household = household
-        self.id = uuid4().hex
-        self.driviness = random.normalvariate(1, 0.1)
+        self.id = self.household.new_id()
+        self.driviness = self.household.rng.normalvariate(1, 0.1)
         self.age = 0
         self.tenure_years = 0
         self.driving_experience = 0
         self.is_driving_age = False
-        self.gender = random.choices(['m', 'f'], weights=[0.5, 0.5])[
+        self.gender = self.household.rng.choices([MALE, FEMALE], weights=[0.5, 0.5])[
             0] if target_gender is None else target_gender
         self.married = False
-        self.education = 'uneducated'
+        self.education = UNEDUCATED
         self.job_class = 0
         self.inforce = True
 
 
-        # Assume everyone has a hidden favorite type of car
-        if self.gender == 'm':
-            veh_pref_dist = [0.3, 0.3, 0.1, 0.2, 0.1]
-        elif self.gender == 'f':
-            veh_pref_dist = [0.1, 0.15, 0.35, 0.1, 0.3]
-
-        self.prefered_vehicle = random.choices(
-            ['pickup', 'suv', 'sedan', 'sports car', 'van'],
-            veh_pref_dist)
+        self.prefered_vehicle = self.pick_prefered_vehicle()
 
-        self.age_licensed = random.choices([16, 17, 18, 19, 20], weights=[
+        self.age_licensed = self.household.rng.choices([16, 17, 18, 19, 20], weights=[
                                            0.7, 0.1, 0.1, 0.05, 0.05])[0]
         self.married_age = max(18,
-                               random.choices(population=[22, 25, 29, 33, 37, 41, 1000],
+                               self.household.rng.choices(population=[22, 25, 29, 33, 37, 41, 1000],
                                               weights=[0.20, 0.15, 0.15, 0.1, 0.1, 0.05, 0.25])[0]
-                               + int(random.uniform(-3, 3))
+                               + int(self.household.rng.uniform(-3, 3))
                                )
 
-        self.upbringing_score = upbringing_score if upbringing_score is not None else random.normalvariate(
+        self.upbringing_score = upbringing_score if upbringing_score is not None else self.household.rng.normalvariate(
             0, 3)
         self.risk_mitigation_score = self.upbringing_score + \
-            random.normalvariate(0, 0.5)
-        self.job_risk_deviation = random.normalvariate(0, 0.5)
-        self.financial_risk_deviation = random.normalvariate(0, 0.5)
+            self.household.rng.normalvariate(0, 0.5)
+        self.job_risk_deviation = self.household.rng.normalvariate(0, 0.5)
+        self.financial_risk_deviation = self.household.rng.normalvariate(0, 0.5)
 
         self.move_forward_n_years(target_age)
         
     def __hash__(self):
         return hash(self.id)
 
+    def pick_prefered_vehicle(self):
+        # Assume everyone has a hidden favorite type of car
+        if self.gender == MALE:
+            veh_pref_dist = [0.3, 0.3, 0.1, 0.2, 0.1]
+        elif self.gender == FEMALE:
+            veh_pref_dist = [0.1, 0.15, 0.35, 0.1, 0.3]
+
+        return self.household.rng.choices(
+            [PICKUP, SUV, SEDAN, SPORTS_CAR, VAN],
+            veh_pref_dist)
+
     def move_forward_n_years(self, n):
         for i in range(n):
             self.age += 1
+            self.household.changed('aged')
 
             if not self.married and self.married_age <= self.age:
                 self.get_married(years_remaining=n - 1 - i)
@@ -72,79 +85,81 @@ class human:
             else:
                 rate = 0.2
 
-            if rate > random.uniform(0, 1):
+            if rate > self.household.rng.uniform(0, 1):
                 self.evaluate_housing()
 
             if self.years_licensed >= 0:
-                self.is_driving_age = True
-
-                if self.gender == 'm':
-                    self.driving_experience += random.uniform(0.1, 0.75)
-                elif self.gender == 'f':
-                    self.driving_experience += random.uniform(0.1, 0.6)
-
-            if self.gender == 'm' and (23 < self.age < 27):
-                self.risk_mitigation_score += random.uniform(-0.05, 0.1)
-            elif self.gender == 'f' and (18 < self.age < 23):
-                self.risk_mitigation_score += random.uniform(-0.05, 0.1)
+                if not self.is_driving_age:
+                    self.is_driving_age = True
+                    self.household.changed('licensed')
+
+                if self.gender == MALE:
+                    self.driving_experience += self.household.rng.uniform(0.1, 0.75)
+                elif self.gender == FEMALE:
+                    self.driving_experience += self.household.rng.uniform(0.1, 0.6)
+
+            if self.gender == MALE and (23 < self.age < 27):
+                self.risk_mitigation_score += self.household.rng.uniform(-0.05, 0.1)
+            elif self.gender == FEMALE and (18 < self.age < 23):
+                self.risk_mitigation_score += self.household.rng.uniform(-0.05, 0.1)
             elif self.age < 23:
-                self.risk_mitigation_score += random.uniform(-0.05, 0.06)
+                self.risk_mitigation_score += self.household.rng.uniform(-0.05, 0.06)
             else:
-                self.risk_mitigation_score += random.uniform(-0.025, 0.05)
+                self.risk_mitigation_score += self.household.rng.uniform(-0.025, 0.05)
 
             self.child_check(years_remaining=n - 1 - i)
 
             self.leave_household()
 
     def evaluate_education(self):
-        if self.education == 'attending college':
+        if self.education == ATTENDING_COLLEGE:
             if self.age >= 26:
-                self.education = 'high school degree'
+                self.education = HIGH_SCHOOL_DEGREE
                 self.job_class = 1
             elif self.age >= 21:
                 p = 0.2 + 0.4 * sig(self.upbringing_score/5)
-                if p > random.uniform(0, 1):
-                    self.education = 'college graduate'
+                if p > self.household.rng.uniform(0, 1):
+                    self.education = COLLEGE_GRADUATE
                     self.job_class = min(max(2, self.job_class + 1), 6)
-                elif self.upbringing_score < 0 and 0.2 > random.uniform(0, 1):
-                    self.education = 'high school degree'
+                elif self.upbringing_score < 0 and 0.2 > self.household.rng.uniform(0, 1):
+                    self.education = HIGH_SCHOOL_DEGREE
                     self.job_class = 1
         elif self.age < 17 or self.age > 40:
             return None
         elif 17 <= self.age <= 21:
             p = 0.25 + 0.2 * sig(self.upbringing_score/5)
-            dice_roll = random.uniform(0, 1)
-            if self.education == 'uneducated' and p > dice_roll:
-                self.education = 'high school degree'
+            dice_roll = self.household.rng.uniform(0, 1)
+            if self.education == UNEDUCATED and p > dice_roll:
+                self.education = HIGH_SCHOOL_DEGREE
                 self.job_class = 1
-            elif self.education == 'high school degree' and p > dice_roll:
-                self.education = 'attending college'
+            elif self.education == HIGH_SCHOOL_DEGREE and p > dice_roll:
+                self.education = ATTENDING_COLLEGE
                 self.job_class = 1
-        elif 24 <= self.age <= 26 and self.education == 'college graduate':
+        elif 24 <= self.age <= 26 and self.education == COLLEGE_GRADUATE:
             p = 0.05 + 0.15 * sig(self.upbringing_score/5)
-            if p > random.uniform(0, 1):
-                self.education = 'postbaccalaureate degree'
+            if p > self.household.rng.uniform(0, 1):
+                self.education = POSTBACCALAUREATE_DEGREE
                 self.job_class = min(max(4, self.job_class + 1), 6)
-        elif self.education == 'college graduate' and self.job_class >= 3 and self.age <= 40:
-            if 0.01 > random.uniform(0, 1):
-                self.education = 'postbaccalaureate degree'
+        elif self.education == COLLEGE_GRADUATE and self.job_class >= 3 and self.age <= 40:
+            if 0.01 > self.household.rng.uniform(0, 1):
+                self.education = POSTBACCALAUREATE_DEGREE
                 self.job_class = min(max(4, self.job_class + 1), 6)
 
     def evaluate_job(self):
         change_up_index = 0.5 * sig(-self.job_risk_score)
-        if change_up_index > random.uniform(0, 1):
+        if change_up_index > self.household.rng.uniform(0, 1):
             allowed_ranges = {
-                'uneducated': [0, 1, 2],
-                'high school degree': [0, 1, 2, 3],
-                'attending college': [0, 1, 2],
-                'college graduate': [0, 2, 3, 4],
-                'postbaccalaureate degree': [0, 3, 4, 5, 6],
+                UNEDUCATED: [0, 1, 2],
+                HIGH_SCHOOL_DEGREE: [0, 1, 2, 3],
+                ATTENDING_COLLEGE: [0, 1, 2],
+                COLLEGE_GRADUATE: [0, 2, 3, 4],
+                POSTBACCALAUREATE_DEGREE: [0, 3, 4, 5, 6],
             }
             allowed_range = allowed_ranges[self.education]
             if self.job_class not in allowed_range:
                 return None
 
-            movement = random.choices([-1, 1], [0.4, 0.6])[0]
+            movement = self.household.rng.choices([-1, 1], [0.4, 0.6])[0]
             current_index = allowed_range.index(self.job_class)
             new_index = max(
                 min(current_index + movement, len(allowed_range)-1), 0)
@@ -184,9 +199,9 @@ class human:
         if vehicle.vehicle_type == self.prefered_vehicle:
             interest *= 1.5
 
-        if self.gender == 'm':
+        if self.gender == MALE:
             interest *= (1 + vehicle.male_interest)
-        if self.gender == 'f':
+        if self.gender == FEMALE:
             interest *= (1 + vehicle.female_interest)
         if self.age <= 25:
             interest *= (1 + vehicle.child_interest)
@@ -224,9 +239,9 @@ class human:
     @property
     def summary(self):
         results = {
-            'driver_id': self.id,
+            'driver_id': format_id(self.id),
             'driver_age': self.age,
-            'driver_gender': self.gender,
+            'driver_gender': GENDERS[self.gender],
             'driver_tenure': self.tenure_years
         }
 
@@ -236,8 +251,9 @@ class human:
     def hours_worked(self):
         if self.job_class == 0:
             return 0
-        elif self.education == 'attending_college' or self.age <= 21:
-            return random.uniform(5, 15)
+        # This used to also check for 'attending_college', a label no one ever had, so only the age ever counted
+        elif self.age <= 21:
+            return self.household.rng.uniform(5, 15)
         else:
             return 40
 
@@ -0,0 +1,81 @@
+"""
+Ids for everything a household creates (the household itself, its humans, vehicles, properties and claims).
+
+An id is a 64 bit whole number made of a shard and a counter. Every household gets its own shard, its index in the
+build, and counts up from there, so ids never collide across households or worker processes and a build hands out
+the same ids every time. Nothing is drawn from the household's random stream, so ids don't shift any other numbers.
+
+Ids stay numbers while simulating, format_id() turns them into hex strings for the summaries.
+"""
+
+import itertools
+import os
+
+SHARD_BITS = 39
+COUNTER_BITS = 24
+
+# Households without an index (built one at a time, outside of a build) take shards from the top half of the range
+LOOSE_SHARDS = 1 << (SHARD_BITS - 1)
+
+
+def loose_shards():
+    """
+    Shards for households without an index, counting up from a random spot in the top half of the range (and wrapping
+    around inside of it). Every process and every run starts somewhere else, so households made with household() in
+    different notebooks or processes don't hand out the same ids. Unlike build ids they're only unique by chance: two
+    processes that each make a million of them overlap about 1 time in 140,000.
+    """
+    start = int.from_bytes(os.urandom(8), 'big') % LOOSE_SHARDS
+    return (LOOSE_SHARDS + (start + i) % LOOSE_SHARDS for i in itertools.count())
+
+
+_loose_shards = loose_shards()
+
+
+def _new_loose_shards():
+    global _loose_shards
+    _loose_shards = loose_shards()
+
+
+# A forked worker would otherwise carry on from the very same spot as its parent
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_new_loose_shards)
+
+
+class id_allocator:
+    """
+    Hands out the ids of one shard in order, calling it gives the next id.
+    Up to 2 ** 24 ids per shard, which is a lot more than a household ever needs.
+    """
+
+    __slots__ = ('shard', 'counter')
+
+    def __init__(self, shard=None, counter=0):
+        if shard is None:
+            shard = next(_loose_shards)
+
+        if not 0 <= shard < 1 << SHARD_BITS:
+            raise ValueError(f'shard has to be between 0 and {(1 << SHARD_BITS) - 1}, got {shard}')
+
+        self.shard = shard
+        self.counter = counter
+
+    def __call__(self):
+        if self.counter >= 1 << COUNTER_BITS:
+            raise OverflowError(f'shard {self.shard} ran out of ids')
+
+        self.counter += 1
+        return self.shard << COUNTER_BITS | (self.counter - 1)
+
+
+def id_shard(id):
+    """Which shard (household) an id came from"""
+    return id >> COUNTER_BITS
+
+
+def format_id(id):
+    """An id as a 16 character hex string, None stays None"""
+    if id is None:
+        return None
+
+    return '%016x' % id
@@ -0,0 +1,214 @@
+"""
+Where does the simulation time go? Per phase timers, event counters and sampled profiles of the household lifecycle.
+
+Aging, update_vehicles, update_house, generate_claims, the lapse check and the summaries are all tangled up inside of
+household.move_forward_n_years(), so each of them runs inside of household.instruments.phase(name) and the interesting
+events get counted with household.instruments.count(name, n):
+
+    fleets_evaluated    candidate fleets scored by update_vehicles
+    claims_created      claims made by generate_claims
+    rng_draws           numbers each household took out of its random_stream (counted by build.household_rows)
+
+household.instruments is NULL_INSTRUMENTS unless a run switches them on, and every hook on it does nothing, so a normal
+run only pays for a couple of empty method calls. To switch them on for a run:
+
+    run = instruments(profile_every = 1000)
+    for rows in build(100_000, seed = 42, instruments = run):
+        ...
+    print(run.format_report())
+
+build() gives every worker its own instruments and merges what they saw back into run. Phase times include the phases
+that run inside of them (update_house runs while the head of house ages, the summary runs inside summary_per_vehicle).
+profile_every = n runs cProfile over every nth household of the build, run.profile_stats() gives back the pstats.
+"""
+
+import cProfile
+import pstats
+from functools import wraps
+from time import perf_counter
+
+
+class _no_phase:
+    """Context manager that does nothing, what the hooks hand back when instrumentation is off"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+NO_PHASE = _no_phase()
+
+
+class null_instruments:
+    """Instrumentation that's switched off, every hook does nothing"""
+
+    enabled = False
+
+    def phase(self, name):
+        return NO_PHASE
+
+    def count(self, name, n=1):
+        return None
+
+    def profiled(self, index):
+        return NO_PHASE
+
+
+NULL_INSTRUMENTS = null_instruments()
+
+
+class _phase_timer:
+    __slots__ = ('instruments', 'name', 'start')
+
+    def __init__(self, instruments, name):
+        self.instruments = instruments
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        totals = self.instruments.phases.setdefault(self.name, [0.0, 0])
+        totals[0] += perf_counter() - self.start
+        totals[1] += 1
+
+
+class _profiling:
+    __slots__ = ('instruments',)
+
+    def __init__(self, instruments):
+        self.instruments = instruments
+
+    def __enter__(self):
+        self.instruments.profiled_households += 1
+        self.instruments.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.instruments.profiler.disable()
+
+
+class _saved_stats:
+    """Lets pstats.Stats load a profile that's already been turned into a stats dict"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        return None
+
+
+class instruments:
+    """
+    Instrumentation that's switched on for one run.
+    phases are {phase: [seconds, calls]}, counts are {event: total}, and profile is the merged cProfile stats dict of
+    the profiled households.
+    """
+
+    enabled = True
+
+    def __init__(self, profile_every=None):
+        self.profile_every = profile_every
+        self.phases = {}
+        self.counts = {}
+        self.profile = {}
+        self.profiled_households = 0
+        self._profiler = None
+
+    def fresh(self):
+        """Empty instruments with the same settings, for a worker to fill in"""
+        return type(self)(self.profile_every)
+
+    def phase(self, name):
+        return _phase_timer(self, name)
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def profiled(self, index):
+        """Profiles the with block if household number index is one of the sampled ones"""
+        if self.profile_every is None or index % self.profile_every != 0:
+            return NO_PHASE
+
+        return _profiling(self)
+
+    @property
+    def profiler(self):
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+
+        return self._profiler
+
+    def _collect_profile(self):
+        if self._profiler is not None:
+            self._profiler.create_stats()
+            self._merge_profile(self._profiler.stats)
+            self._profiler = None
+
+    def _merge_profile(self, stats):
+        for func, stat in stats.items():
+            self.profile[func] = pstats.add_func_stats(self.profile[func], stat) if func in self.profile else stat
+
+    def report(self):
+        """Everything the instruments saw as plain dicts and lists, small enough to send back from a worker"""
+        self._collect_profile()
+        return {
+            'phases': {name: list(totals) for name, totals in self.phases.items()},
+            'counts': dict(self.counts),
+            'profile': self.profile,
+            'profiled_households': self.profiled_households
+        }
+
+    def merge(self, report):
+        """Adds another run's report() (usually a worker's) into these instruments"""
+        for name, (seconds, calls) in report['phases'].items():
+            totals = self.phases.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+
+        for name, n in report['counts'].items():
+            self.count(name, n)
+
+        self._collect_profile()
+        self._merge_profile(report['profile'])
+        self.profiled_households += report['profiled_households']
+
+    def profile_stats(self):
+        """pstats.Stats of every profiled household, None if nothing got profiled"""
+        self._collect_profile()
+        if not self.profile:
+            return None
+
+        return pstats.Stats(_saved_stats(dict(self.profile)))
+
+    def format_report(self):
+        lines = ['phase                       seconds       calls    ms/call']
+        for name, (seconds, calls) in sorted(self.phases.items(), key=lambda x: -x[1][0]):
+            lines.append(f'{name:<24}{seconds:>11.2f}{calls:>12,}{1000 * seconds / calls:>11.3f}')
+
+        for name, n in sorted(self.counts.items()):
+            lines.append(f'{name:<24}{n:>23,}')
+
+        if self.profiled_households:
+            lines.append(f'{self.profiled_households:,} households profiled, see profile_stats()')
+
+        return '\n'.join(lines)
+
+
+def timed_phase(name):
+    """Runs a household method inside of household.instruments.phase(name)"""
+
+    def decorate(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.instruments.phase(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,114 @@
+"""
+Starts a whole batch of households at once.
+
+Building a household object lives out the head of house's life one year at a time from birth, and every spouse and
+child gets born and aged from 0 on the way. That's the most expensive part of a build. The PopulationEngine already
+runs those same life rules for thousands of humans at a time with vectorized education, job, and risk score steps,
+so start_households() lets the engine live out everyone's starting life and then turns each of its households into
+regular household/human/housing_property/vehicle objects. From there on they are plain household objects, moving them
+forward, their claims and their summaries all go through the object code.
+
+The engine draws its numbers for the whole batch at once, so a household started this way follows the same rules as
+household(random_stream(seed, index)) but isn't a draw for draw copy of it.
+
+households = start_households(10_000, seed=498)
+for x in households:
+    x.move_forward_n_years(x.rng.randint(1, 20))
+"""
+
+import numpy as np
+
+from .population_engine import PopulationEngine, HEAD, SPOUSE, HOUSE_BEDS, HOUSE_GARAGES, HOUSE_MONTHLY_COST
+from .rng import random_stream
+from .household import household
+from .human import human
+from .head_of_house import head_of_house
+from .spouse import spouse
+from .child import child
+from .housing_property import housing_property
+from .vehicle import vehicle
+
+# human attributes that are stored under a different name in the engine
+HUMAN_COLUMNS = {'tenure_years': 'human_tenure', 'inforce': 'human_inforce'}
+
+
+def start_households(n, seed=0, start=0, chunk_size=2048):
+    """
+    Households start to start + n - 1 of a build, their starting lives simulated together by a PopulationEngine.
+    Each household still gets its own random_stream(seed, index) and its index as its id shard, so everything after
+    the start is reproducible household by household.
+    """
+
+    engine = PopulationEngine(n, seed=np.random.SeedSequence(seed, spawn_key=(start, n)), chunk_size=chunk_size)
+
+    return [household_from_engine(engine, i, random_stream(seed, start + i)) for i in range(n)]
+
+
+def household_from_engine(engine, h, rng):
+    """Turns row h of a PopulationEngine into a household object that draws from rng from here on"""
+    x = household.__new__(household)
+    x.start_empty(rng)
+    x.driviness = engine.household_driviness[h].item()
+    x.child_interest = engine.child_interest[h].item()
+    x.tenure_years = engine.tenure_years[h].item()
+
+    # Kids that moved out (or married) while they were being born and aged up still end up in children, like they do
+    # in head_of_house.child_check(), they're just not inforce
+    for s in np.flatnonzero(engine.present[h]):
+        if s == HEAD:
+            x.head_of_household = human_from_engine(engine, h, s, head_of_house, x)
+        elif s == SPOUSE:
+            x.significant_other = human_from_engine(engine, h, s, spouse, x)
+        else:
+            x.children.append(human_from_engine(engine, h, s, child, x))
+
+    x.properties = [house_from_engine(engine, h, x)]
+    if engine.vacation_home[h]:
+        vacation_home = housing_property(2, x)
+        vacation_home.is_primary = False
+        x.properties.append(vacation_home)
+
+    for v in np.flatnonzero(engine.vehicle_present[h]):
+        veh = vehicle(x, engine.vehicle_age[h, v].item(), engine.vehicle_type[h, v].item())
+        veh.years_owned = engine.years_owned[h, v].item()
+        veh.purchase_price = engine.purchase_price[h, v].item()
+        veh.value = engine.value[h, v].item()
+        veh.coverage = engine.coverage[h, v].item()
+        x.vehicles.append(veh)
+
+    return x
+
+
+def human_from_engine(engine, h, s, kind, x):
+    """The human in slot s of household h, kind is head_of_house, spouse or child"""
+    person = kind.__new__(kind)
+    person.household = x
+    person.id = x.new_id()
+
+    for name in human.__slots__:
+        if name not in ('household', 'id', 'prefered_vehicle'):
+            setattr(person, name, getattr(engine, HUMAN_COLUMNS.get(name, name))[h, s].item())
+
+    # The engine never keeps a favorite vehicle (it never matters), draw one like human.__init__() does
+    person.prefered_vehicle = person.pick_prefered_vehicle()
+
+    return person
+
+
+def house_from_engine(engine, h, x):
+    """The primary house of household h"""
+    property_class = engine.house_class[h].item()
+
+    house = housing_property.__new__(housing_property)
+    house.household = x
+    house.id = x.new_id()
+    house.property_class = property_class
+    house.is_primary = True
+    house.driviness = engine.house_driviness[h].item()
+    house.ownership_type = 'rental' if property_class == 1 else 'owned'
+    house.garages = HOUSE_GARAGES[property_class].item()
+    house.beds = HOUSE_BEDS[property_class].item()
+    house.monthly_cost = HOUSE_MONTHLY_COST[property_class].item()
+    house.set_location(engine.location[h].item())
+
+    return house
@@ -0,0 +1,40 @@
+import numpy as np
+
+ROAD_TYPES = ('city', 'highway')
+
+
+class mileage_table:
+    """
+    How many miles each driver puts on each vehicle of a household in a year, split by city and highway driving.
+    The miles are a drivers x vehicles x road types array, driver_index and vehicle_index map ids to rows/columns.
+
+    Building the table is the expensive part (everyone's mileage and the vehicle assignments), so the household builds
+    it once per simulated year and claims and summaries all read from the same table.
+    """
+
+    def __init__(self, drivers, vehicles, allocation):
+        """allocation is the drivers x vehicles share of driving from household.vehicle_allocation()"""
+        self.drivers = drivers
+        self.vehicles = vehicles
+        self.driver_index = {x.id: i for i, x in enumerate(drivers)}
+        self.vehicle_index = {x.id: i for i, x in enumerate(vehicles)}
+
+        driver_mileage = np.array([x.determine_mileage() for x in drivers], dtype=float).reshape(-1, len(ROAD_TYPES))
+        shares = np.array(allocation, dtype=float).reshape(len(drivers), len(vehicles))
+        self.miles = driver_mileage[:, None, :] * shares[:, :, None]
+
+    @property
+    def per_vehicle(self):
+        """Total miles on each vehicle, in the order of vehicles"""
+        return self.miles.sum(axis=2).sum(axis=0)
+
+    @property
+    def per_driver(self):
+        """Total miles for each driver, in the order of drivers"""
+        return self.miles.sum(axis=2).sum(axis=1)
+
+    def vehicle_miles(self, veh):
+        return self.per_vehicle[self.vehicle_index[veh.id]]
+
+    def driver_miles(self, driver):
+        return self.per_driver[self.driver_index[driver.id]]
@@ -0,0 +1,186 @@
+"""
+Panel output, one row per vehicle per simulated year, written out while the households move forward.
+
+summary_per_vehicle only sees a household once it's done moving forward, and the claim history features get worked
+back out from how old each claim is. Every year before that is a perfectly good exposure that gets thrown away.
+With a panel_writer switched on, household.move_forward_n_years() hands it the household after every year's claims
+and it adds a compact row for each vehicle: that year's covariates, the mileage the vehicle actually did, and how many
+paid claims it had on each coverage. Rows are kept as columns and written to Parquet a batch at a time, so nothing
+but the current batch is ever held.
+
+    with panel_writer('./panel') as panel, recording_panel(panel):
+        for x in households:
+            x.move_forward_n_years(20)
+
+build(..., panel = './panel') does the same in every worker, each shard writes its own part file.
+Ids are the raw numbers (ids.format_id() gives the hex strings the summaries use), and labels are dictionary encoded.
+"""
+
+import os
+from contextlib import contextmanager
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .codes import GENDERS, LOCATIONS, VEHICLE_TYPES, COVERAGES
+from .household import household
+from .parquet_writer import ROW_GROUP_SIZE
+
+# Columns that hold codes, written as dictionary columns of these labels
+LABELS = {'vehicle_type': VEHICLE_TYPES, 'garaging_location': LOCATIONS, 'primary_driver_gender': GENDERS}
+
+PANEL_SCHEMA = pa.schema([
+    ('household_id', pa.int64()),
+    ('vehicle_id', pa.int64()),
+    ('year', pa.int16()),
+    ('vehicle_age', pa.int16()),
+    ('vehicle_years_owned', pa.int16()),
+    ('vehicle_type', pa.dictionary(pa.int8(), pa.string())),
+    *[(f'coverage_{x}', pa.bool_()) for x in COVERAGES],
+    ('driver_count', pa.int8()),
+    ('vehicle_count', pa.int8()),
+    ('youthful_driver_count', pa.int8()),
+    ('min_driver_age', pa.int16()),
+    ('max_driver_age', pa.int16()),
+    ('mean_driver_age', pa.float32()),
+    ('credit_score', pa.int16()),
+    ('garaging_location', pa.dictionary(pa.int8(), pa.string())),
+    ('primary_driver_age', pa.int16()),
+    ('primary_driver_gender', pa.dictionary(pa.int8(), pa.string())),
+    ('city_mileage', pa.float32()),
+    ('highway_mileage', pa.float32()),
+    ('annual_mileage', pa.float32()),
+    ('claim_cnt_all', pa.int8()),
+    *[(f'claim_cnt_{x}', pa.int8()) for x in COVERAGES],
+])
+
+
+class panel_writer:
+    """
+    Collects a household's panel rows every year and writes them to path/name.parquet batch_size rows at a time.
+    Call close() (or use it in a with block) to write what's left and finish the file.
+    """
+
+    def __init__(self, path, batch_size=ROW_GROUP_SIZE, name='part-0'):
+        self.path = path
+        self.batch_size = batch_size
+        self.name = name
+        self.rows_written = 0
+        self._columns = {x: [] for x in PANEL_SCHEMA.names}
+        self._pending = 0
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, household):
+        """Adds this year's row for each of the household's vehicles, household.move_forward_n_years() calls this"""
+        if not household.vehicles:
+            return None
+
+        # Mileage for the year already got worked out for the claims, so this doesn't draw anything new
+        table = household.determine_mileage()
+        vehicle_miles = table.miles.sum(axis=0).tolist()
+        shares = table.miles.sum(axis=2)
+        primary_drivers = shares.argmax(axis=0).tolist() if table.drivers else None
+
+        # Paid claims from this year, counted by vehicle ('all' first, then each coverage)
+        year = household.tenure_years
+        claim_counts = {}
+        for claim in reversed(household.claims):
+            if claim.when_occured != year:
+                break
+
+            if claim.paid_indicator:
+                counts = claim_counts.setdefault(claim.vehicle_id, [0] * (len(COVERAGES) + 1))
+                counts[0] += 1
+                for i, coverage in enumerate(COVERAGES):
+                    counts[i + 1] += getattr(claim, coverage)
+
+        shared = {
+            'household_id': household.id,
+            'year': year,
+            'driver_count': household.driver_count,
+            'vehicle_count': household.vehicle_count,
+            'youthful_driver_count': household.youthful_driver_count,
+            'min_driver_age': household.min_driver_age,
+            'max_driver_age': household.max_driver_age,
+            'mean_driver_age': household.mean_driver_age,
+            'credit_score': household.credit_score,
+            'garaging_location': household.garaging_location
+        }
+
+        no_claims = [0] * (len(COVERAGES) + 1)
+        for j, veh in enumerate(table.vehicles):
+            driver = None if primary_drivers is None else table.drivers[primary_drivers[j]]
+            city, highway = vehicle_miles[j]
+            counts = claim_counts.get(veh.id, no_claims)
+
+            row = {
+                **shared,
+                'vehicle_id': veh.id,
+                'vehicle_age': veh.age,
+                'vehicle_years_owned': veh.years_owned,
+                'vehicle_type': veh.vehicle_type,
+                **{f'coverage_{x}': bool(veh.coverage & 1 << i) for i, x in enumerate(COVERAGES)},
+                'primary_driver_age': None if driver is None else driver.age,
+                'primary_driver_gender': None if driver is None else driver.gender,
+                'city_mileage': city,
+                'highway_mileage': highway,
+                'annual_mileage': city + highway,
+                'claim_cnt_all': counts[0],
+                **{f'claim_cnt_{x}': counts[i + 1] for i, x in enumerate(COVERAGES)}
+            }
+
+            for name, value in row.items():
+                self._columns[name].append(value)
+
+        self._pending += len(table.vehicles)
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def record_batch(self):
+        """The rows collected so far as a record batch"""
+        arrays = []
+        for field in PANEL_SCHEMA:
+            values = self._columns[field.name]
+            if field.name in LABELS:
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(values, pa.int8()), LABELS[field.name]))
+            else:
+                arrays.append(pa.array(values, field.type))
+
+        return pa.RecordBatch.from_arrays(arrays, schema=PANEL_SCHEMA)
+
+    def flush(self):
+        if not self._pending:
+            return None
+
+        if self._writer is None:
+            os.makedirs(self.path, exist_ok=True)
+            self._writer = pq.ParquetWriter(os.path.join(self.path, f'{self.name}.parquet'), PANEL_SCHEMA)
+
+        self._writer.write_batch(self.record_batch(), row_group_size=self.batch_size)
+        self.rows_written += self._pending
+        self._columns = {x: [] for x in PANEL_SCHEMA.names}
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+@contextmanager
+def recording_panel(writer):
+    """Has every household in this process hand its yearly rows to writer during the with block"""
+    previous = household.panel
+    household.panel = writer
+    try:
+        yield writer
+    finally:
+        household.panel = previous
@@ -0,0 +1,212 @@
+"""
+Writes summary_per_vehicle rows straight to a partitioned Parquet dataset.
+
+The rows hold lists of dicts (driver_info, vehicle_claims, other_claims, household_vehicles_info). Going through a
+pandas DataFrame turns those into object columns that pyarrow then has to work out the type of all over again, which
+ends up being the slowest (and biggest) part of a build. parquet_writer turns rows into Arrow record batches with
+list<struct> columns and writes them a row group at a time, so only a row group's worth of rows is ever held.
+
+The dataset is laid out like df.to_parquet(path, partition_cols = ['split']) would, one directory per split
+(split=train/, split=test/, ...) and pd.read_parquet() / pyarrow.parquet.read_table() read it back the same way.
+
+with parquet_writer('./data_result') as writer:
+    for rows in build(250_000, seed = 498):
+        writer.write(assign_splits(rows, rng))
+
+Rows can also be turned into record batches somewhere else (build(..., batches = True) does it in the workers) and
+handed over with write_batch().
+"""
+
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .codes import COVERAGES
+
+ROW_GROUP_SIZE = 50_000
+SPLITS = {'train': 0.7, 'test': 0.2, 'validation': 0.1}
+
+# Fields of the dicts inside the nested columns
+CLAIM_FIELDS = ['claim_id', 'vehicle_id', 'driver_id', 'driver_claim', *[f'{x}_ind' for x in COVERAGES],
+                *[f'veh_had_{x}_cov_ind' for x in COVERAGES], 'claim_age']
+DRIVER_FIELDS = ['driver_id', 'driver_age', 'driver_gender', 'driver_tenure']
+HOUSEHOLD_VEHICLE_FIELDS = ['vehicle_id', 'vehicle_age', 'vehicle_years_owned', 'vehicle_type', 'this_vehicle_ind']
+
+STRING_COLUMNS = {'garaging_location', 'vehicle_type', 'driver_gender', 'split'}
+FLOAT_COLUMNS = {'mean_driver_age', 'annual_mileage'}
+BOOL_COLUMNS = {'inforce', 'driver_claim', 'this_vehicle_ind'}
+
+
+def struct_of(fields):
+    return pa.struct([pa.field(x, column_type(x)) for x in fields])
+
+
+def column_type(name):
+    """
+    The Arrow type of a summary column (or a field of one of the nested columns), worked out from its name.
+    Everything that isn't an id, a label, a flag, a list or one of the few floats is a count, and counts can be None
+    (e.g. the time since claim columns when there's never been a claim).
+    """
+
+    if name in ('vehicle_claims', 'other_claims'):
+        return pa.list_(struct_of(CLAIM_FIELDS))
+    if name == 'driver_info':
+        return pa.list_(struct_of(DRIVER_FIELDS))
+    if name == 'household_vehicles_info':
+        return pa.list_(struct_of(HOUSEHOLD_VEHICLE_FIELDS))
+    if name.endswith('_id') or name in STRING_COLUMNS:
+        return pa.string()
+    if name in BOOL_COLUMNS or name.startswith('coverage_') or name.startswith('veh_had_'):
+        return pa.bool_()
+    if name in FLOAT_COLUMNS:
+        return pa.float64()
+
+    return pa.int64()
+
+
+def assign_splits(rows, rng, splits=SPLITS):
+    """
+    Gives every row a random 'split' (train/test/validation by default) like Data_Creation.ipynb does, rng is a
+    NumPy Generator. The rows are changed in place and handed back.
+    """
+
+    labels = list(splits)
+    picks = rng.choice(len(labels), size=len(rows), p=list(splits.values()))
+    for row, pick in zip(rows, picks):
+        row['split'] = labels[pick]
+
+    return rows
+
+
+def assign_batch_splits(batch, rng, splits=SPLITS):
+    """assign_splits() for a record batch, hands back the batch with a 'split' column added"""
+    labels = np.array(list(splits))
+    picks = rng.choice(len(labels), size=batch.num_rows, p=list(splits.values()))
+
+    return batch.append_column('split', pa.array(labels[picks], pa.string()))
+
+
+def schema_of(rows, partition_cols=()):
+    """The schema for rows like these, worked out from the columns of the first row, see column_type()"""
+    return pa.schema([pa.field(x, column_type(x)) for x in rows[0] if x not in partition_cols])
+
+
+def rows_to_batch(rows, schema):
+    """Rows as a record batch, one typed Arrow array per column of the schema"""
+    return pa.RecordBatch.from_arrays(
+        [pa.array([row.get(x.name) for row in rows], type=x.type) for x in schema],
+        schema=schema
+    )
+
+
+class parquet_writer:
+    """
+    Collects rows and writes them out a row group at a time, one Parquet file per partition.
+    The schema comes from the columns of the first row written, see column_type().
+    Call close() (or use it in a with block) to write what's left and finish the files.
+    """
+
+    def __init__(self, path, partition_cols=('split',), row_group_size=ROW_GROUP_SIZE, name='part-0'):
+        self.path = path
+        self.partition_cols = list(partition_cols)
+        self.row_group_size = row_group_size
+        self.name = name
+        self.schema = None
+        self.rows_written = 0
+        self._pending = {}
+        self._pending_batches = {}
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, rows):
+        """Adds rows, any partition that has a full row group waiting gets written"""
+        if self.schema is None and rows:
+            self.schema = schema_of(rows, self.partition_cols)
+
+        for row in rows:
+            key = tuple(row[x] for x in self.partition_cols)
+            pending = self._pending.setdefault(key, [])
+            pending.append(row)
+
+            if len(pending) >= self.row_group_size:
+                self._flush(key)
+
+    def write_batch(self, batch):
+        """
+        Adds a record batch with every column (partition columns too), split up by partition with Arrow.
+        Like write(), each partition's rows wait until there's a full row group of them.
+        The batch itself isn't held on to once this returns, only copies of its rows, so it can live in memory that's
+        about to go away (see shared_batches.py).
+        """
+        if self.schema is None:
+            self.schema = pa.schema([x for x in batch.schema if x.name not in self.partition_cols])
+
+        keys = [{}]
+        if self.partition_cols:
+            keys = pa.Table.from_batches([batch]).group_by(self.partition_cols).aggregate([]).to_pylist()
+
+        for key in keys:
+            # filter() always makes new arrays, even when every row matches
+            mask = pa.array(np.ones(batch.num_rows, bool))
+            for name, value in key.items():
+                mask = pc.and_(mask, pc.equal(batch.column(name), value))
+
+            part = batch.filter(mask).select(self.schema.names)
+            self._add_batch(tuple(key[x] for x in self.partition_cols), part)
+
+    def close(self):
+        for key in list(self._pending):
+            self._flush(key)
+
+        for key in list(self._pending_batches):
+            self._flush_batches(key, everything=True)
+
+        for writer in self._writers.values():
+            writer.close()
+
+        self._writers = {}
+
+    def record_batch(self, rows):
+        """The rows as a record batch, one typed Arrow array per column"""
+        return rows_to_batch(rows, self.schema)
+
+    def _writer(self, key):
+        if key not in self._writers:
+            directory = os.path.join(self.path, *[f'{x}={y}' for x, y in zip(self.partition_cols, key)])
+            os.makedirs(directory, exist_ok=True)
+            self._writers[key] = pq.ParquetWriter(os.path.join(directory, f'{self.name}.parquet'), self.schema)
+
+        return self._writers[key]
+
+    def _flush(self, key):
+        rows = self._pending.pop(key)
+        if not rows:
+            return None
+
+        self._writer(key).write_batch(self.record_batch(rows), row_group_size=self.row_group_size)
+        self.rows_written += len(rows)
+
+    def _add_batch(self, key, part):
+        pending = self._pending_batches.setdefault(key, [])
+        pending.append(part)
+        if sum(x.num_rows for x in pending) >= self.row_group_size:
+            self._flush_batches(key)
+
+    def _flush_batches(self, key, everything=False):
+        """Writes the partition's waiting batches as full row groups, what's left over waits unless everything=True"""
+        table = pa.Table.from_batches(self._pending_batches.pop(key), self.schema)
+        full = table.num_rows if everything else table.num_rows - table.num_rows % self.row_group_size
+        if full:
+            self._writer(key).write_table(table.slice(0, full).combine_chunks(), row_group_size=self.row_group_size)
+            self.rows_written += full
+
+        if full < table.num_rows:
+            self._pending_batches[key] = table.slice(full).combine_chunks().to_batches()
@@ -0,0 +1,1082 @@
+import numpy as np
+
+from .utils import sig
+from .hazards import claim_hazards, claim_counts
+from .codes import (GENDERS, MALE, VEHICLE_TYPES, LOCATIONS, DOWNTOWN, COVERAGES,
+                    UNEDUCATED, HIGH_SCHOOL_DEGREE, ATTENDING_COLLEGE, COLLEGE_GRADUATE, POSTBACCALAUREATE_DEGREE,
+                    SINGLE_CAR_COLLISION, MULTI_CAR_COLLISION, THEFT, HAIL, GLASS, UBI_CLAIM, ERS_CLAIM,
+                    BI_COV, PD_COV, COLL_COV, COMP_COV, MPC_COV, ERS_COV, UBI_COV)
+
+# Every household gets a fixed number of human and vehicle slots.
+# Slot 0 is the head of house, slot 1 is the spouse, and the rest are children.
+HEAD = 0
+SPOUSE = 1
+FIRST_CHILD = 2
+MAX_CHILDREN = 6
+MAX_PEOPLE = FIRST_CHILD + MAX_CHILDREN
+MAX_VEHICLES = 10
+
+# Vehicle stats by vehicle type code, these mirror vehicle.build_*()
+SEATS = np.array([3, 6, 4, 2, 6])
+MSRP = np.array([60_000, 60_000, 20_000, 25_000, 30_000])
+MALE_INTEREST = np.array([0.75, 0.7, -0.3, 0.6, -0.4])
+FEMALE_INTEREST = np.array([-0.4, -0.5, 0.6, -0.4, 0.7])
+CHILD_INTEREST = np.array([0.3, -0.5, -0.4, 0.6, -0.5])
+PARENT_INTEREST = np.array([-0.3, 0.4, 0.4, -0.3, 0.9])
+PROTECTION = np.array([2, 3, 1, 1, 2])
+HURT_OTHERS = np.array([3, 3, 1, 2, 2])
+DEPRECIATION_RATE = 0.95
+
+# Housing stats by property class (0 means no house yet), these mirror housing_property.build_*()
+HOUSE_BEDS = np.array([0, 3, 4, 7])
+HOUSE_GARAGES = np.array([0, 0, 3, 5])
+HOUSE_MONTHLY_COST = np.array([0, 1000, 2000, 4000])
+HOUSE_LOCATION_WEIGHTS = np.array([
+    [1.0, 0.0, 0.0],
+    [0.8, 0.15, 0.05],
+    [0.4, 0.4, 0.2],
+    [0.2, 0.7, 0.3],
+])
+HOUSE_LOCATION_WEIGHTS = HOUSE_LOCATION_WEIGHTS / HOUSE_LOCATION_WEIGHTS.sum(axis=1, keepdims=True)
+CITY_DRIVING_RATIO = np.array([1.4, 0.8, 0.5])
+HIGHWAY_DRIVING_RATIO = np.array([0.35, 1.25, 1.8])
+
+WAGES = np.array([0, 8, 15, 30, 50, 70, 125])
+
+# Job classes each education level can move between, padded with -1
+ALLOWED_JOBS = np.array([
+    [0, 1, 2, -1, -1],
+    [0, 1, 2, 3, -1],
+    [0, 1, 2, -1, -1],
+    [0, 2, 3, 4, -1],
+    [0, 3, 4, 5, 6],
+])
+ALLOWED_JOB_COUNT = (ALLOWED_JOBS >= 0).sum(axis=1)
+JOB_POSITION = np.full((len(ALLOWED_JOBS), len(WAGES)), -1)
+for _edu, _jobs in enumerate(ALLOWED_JOBS):
+    for _i, _job in enumerate(_jobs[_jobs >= 0]):
+        JOB_POSITION[_edu, _job] = _i
+
+COVERAGE_BITS = (BI_COV, PD_COV, COLL_COV, COMP_COV, MPC_COV, ERS_COV, UBI_COV)
+
+
+class PopulationEngine:
+    """
+    A columnar version of the household simulation meant for building very large books of business.
+
+    Instead of a graph of household/human/vehicle/claim objects, every household, human, and vehicle is a row in a set of NumPy arrays.
+    Humans and vehicles live in fixed slots per household (head of house, spouse, up to 6 children and up to 10 vehicles),
+    and claims are kept in an append only table.
+    Each call to step() moves the whole book forward one year with vectorized phases for aging, education/jobs, housing,
+    vehicle depreciation, lapse, vehicle shopping, and claims.
+
+    The rules are the same ones used by the household/human/vehicle/claim classes, so the results should be statistically
+    equivalent to building the same number of household objects. The draws aren't the same though, so don't expect row for row matches!
+
+    Big fleet and claim calculations are done chunk_size households at a time to keep memory in check.
+    """
+
+    # Draw real poisson claim counts instead of the at most 1 claim shortcut, see hazards.claim_counts()
+    exact_claim_counts = False
+
+    def __init__(self, n, seed=None, chunk_size=2048):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.chunk_size = chunk_size
+        self._next_id = 0
+        self._claims = []
+
+        # Households
+        self.household_id = self._new_ids(n)
+        self.inforce = np.ones(n, dtype=bool)
+        self.household_driviness = np.zeros(n)
+        self.child_interest = np.zeros(n, dtype=np.int8)
+        self.tenure_years = np.zeros(n, dtype=np.int16)
+        self.house_class = np.zeros(n, dtype=np.int8)
+        self.location = np.zeros(n, dtype=np.int8)
+        self.house_driviness = np.ones(n)
+        self.vacation_home = np.zeros(n, dtype=bool)
+
+        # Humans
+        shape = (n, MAX_PEOPLE)
+        self.present = np.zeros(shape, dtype=bool)
+        self.human_inforce = np.zeros(shape, dtype=bool)
+        self.human_id = np.full(shape, -1, dtype=np.int64)
+        self.age = np.zeros(shape, dtype=np.int16)
+        self.human_tenure = np.zeros(shape, dtype=np.int16)
+        self.gender = np.zeros(shape, dtype=np.int8)
+        self.married = np.zeros(shape, dtype=bool)
+        self.married_age = np.zeros(shape, dtype=np.int16)
+        self.age_licensed = np.zeros(shape, dtype=np.int16)
+        self.is_driving_age = np.zeros(shape, dtype=bool)
+        self.driving_experience = np.zeros(shape, dtype=np.float32)
+        self.education = np.zeros(shape, dtype=np.int8)
+        self.job_class = np.zeros(shape, dtype=np.int8)
+        self.driviness = np.zeros(shape, dtype=np.float32)
+        self.upbringing_score = np.zeros(shape, dtype=np.float32)
+        self.risk_mitigation_score = np.zeros(shape, dtype=np.float32)
+        self.job_risk_deviation = np.zeros(shape, dtype=np.float32)
+        self.financial_risk_deviation = np.zeros(shape, dtype=np.float32)
+
+        # Vehicles
+        shape = (n, MAX_VEHICLES)
+        self.vehicle_present = np.zeros(shape, dtype=bool)
+        self.vehicle_id = np.full(shape, -1, dtype=np.int64)
+        self.vehicle_type = np.zeros(shape, dtype=np.int8)
+        self.vehicle_age = np.zeros(shape, dtype=np.int16)
+        self.years_owned = np.zeros(shape, dtype=np.int16)
+        self.purchase_price = np.zeros(shape, dtype=np.float32)
+        self.value = np.zeros(shape, dtype=np.float32)
+        self.coverage = np.zeros(shape, dtype=np.uint8)
+
+        self._start_lives()
+
+    def _new_ids(self, k):
+        ids = np.arange(self._next_id, self._next_id + k, dtype=np.int64)
+        self._next_id += k
+        return ids
+
+    def _chunks(self, hh):
+        for i in range(0, len(hh), self.chunk_size):
+            yield hh[i:i + self.chunk_size]
+
+    # ------------------------------------------------------------------
+    # Population lifecycle
+    # ------------------------------------------------------------------
+
+    def _start_lives(self):
+        """Same process as household.__init__() and head_of_house.start_life(), just for every household at once"""
+        n, rng = self.n, self.rng
+        hh = np.arange(n)
+
+        self.household_driviness[:] = rng.normal(1, 0.2, n)
+        self.child_interest[:] = rng.choice(6, n, p=[0.10, 0.15, 0.3, 0.3, 0.1, 0.05])
+
+        target_age = np.maximum(16, (rng.triangular(18, 23, 80, n) + rng.normal(0, 3, n)).astype(int))
+        self._spawn(hh, np.full(n, HEAD), target_age=np.zeros(n, dtype=int), upbringing_score=rng.normal(0, 3, n))
+
+        # The head of house lives their life one year at a time since it drives everything else in the house
+        while True:
+            heads = np.flatnonzero(self.age[:, HEAD] < target_age)
+            if len(heads) == 0:
+                break
+            self._step_humans(heads, np.full(len(heads), HEAD), target_age=target_age[heads])
+
+        self._update_house(hh)
+        self._update_vehicles(hh)
+
+        # Have to come up with how long they've owned the car!
+        owned = self.vehicle_present & (self.vehicle_age > 0)
+        self.years_owned[owned] = rng.integers(0, self.vehicle_age[owned].astype(int) + 1)
+
+    def move_forward_n_years(self, years):
+        """Moves households forward, years can either be a single number or a number per household"""
+        years = np.broadcast_to(np.asarray(years), (self.n,))
+
+        for t in range(int(years.max(initial=0))):
+            self.step(years > t)
+
+    def step(self, active=None):
+        """Moves every inforce household (or the inforce households flagged in active) forward one year"""
+        mask = self.inforce if active is None else self.inforce & active
+        hh = np.flatnonzero(mask)
+        if len(hh) == 0:
+            return None
+
+        h, s = np.nonzero(self.present[hh])
+        self._step_humans(hh[h], s)
+
+        self.vehicle_age[hh] += 1
+        self.years_owned[hh] += 1
+        self.value[hh] *= DEPRECIATION_RATE
+
+        # Update all the tenures
+        self.tenure_years[hh] += 1
+        self.human_tenure[hh] += self.drivers[hh]
+
+        self._lapse_check(hh)
+        hh = hh[self.inforce[hh]]
+
+        shopping = hh[0.5 < self.rng.random(len(hh))]
+        self._update_vehicles(shopping)
+
+        self._generate_claims(hh)
+
+    # ------------------------------------------------------------------
+    # Humans
+    # ------------------------------------------------------------------
+
+    def _spawn(self, h, s, target_age, upbringing_score, gender=None):
+        """Creates new humans in the given slots and ages them up to their target age (same as human.__init__())"""
+        k, rng = len(h), self.rng
+        if k == 0:
+            return None
+
+        self.present[h, s] = True
+        self.human_inforce[h, s] = True
+        self.human_id[h, s] = self._new_ids(k)
+        self.age[h, s] = 0
+        self.human_tenure[h, s] = 0
+        self.driving_experience[h, s] = 0
+        self.is_driving_age[h, s] = False
+        self.married[h, s] = False
+        self.education[h, s] = UNEDUCATED
+        self.job_class[h, s] = 0
+        self.driviness[h, s] = rng.normal(1, 0.1, k)
+        self.gender[h, s] = rng.integers(0, 2, k) if gender is None else gender
+
+        # human.prefered_vehicle is never drawn here, the object model stores it as a list so the 1.5x bonus never applies
+        self.age_licensed[h, s] = rng.choice([16, 17, 18, 19, 20], k, p=[0.7, 0.1, 0.1, 0.05, 0.05])
+        self.married_age[h, s] = np.maximum(
+            18,
+            rng.choice([22, 25, 29, 33, 37, 41, 1000], k, p=[0.20, 0.15, 0.15, 0.1, 0.1, 0.05, 0.25])
+            + np.trunc(rng.uniform(-3, 3, k)).astype(int)
+        )
+
+        self.upbringing_score[h, s] = upbringing_score
+        self.risk_mitigation_score[h, s] = upbringing_score + rng.normal(0, 0.5, k)
+        self.job_risk_deviation[h, s] = rng.normal(0, 0.5, k)
+        self.financial_risk_deviation[h, s] = rng.normal(0, 0.5, k)
+
+        # New humans live out the years before they join the house on their own
+        while True:
+            active = self.age[h, s] < target_age
+            if not active.any():
+                break
+            self._step_humans(h[active], s[active], solo=True)
+
+    def _step_humans(self, h, s, solo=False, target_age=None):
+        """
+        Moves the humans at (h, s) forward one year, same as human.move_forward_n_years(1).
+        Solo humans are still being created, so they can't buy houses or have kids yet.
+        """
+        if len(h) == 0:
+            return None
+
+        rng = self.rng
+        self.age[h, s] += 1
+        age = self.age[h, s]
+        years_remaining = np.zeros(len(h), dtype=int) if target_age is None else target_age - age
+        is_child = s >= FIRST_CHILD
+
+        # Weddings 🤵👰 Children leave the house when they get married
+        weddings = ~self.married[h, s] & (self.married_age[h, s] <= age)
+        leaving = weddings & is_child
+        newlyweds = weddings & ~is_child
+        self.married[h[newlyweds], s[newlyweds]] = True
+        self.risk_mitigation_score[h[newlyweds], s[newlyweds]] += 0.15
+
+        if not solo:
+            heads = newlyweds & (s == HEAD)
+            self._spawn_spouse(h[heads], years_remaining[heads])
+
+        self._evaluate_education(h, s)
+        self._evaluate_job(h, s)
+
+        licensed = age >= self.age_licensed[h, s]
+        self.is_driving_age[h[licensed], s[licensed]] = True
+        male = self.gender[h, s] == MALE
+        upper = np.where(male, 0.75, 0.6)
+        self.driving_experience[h[licensed], s[licensed]] += rng.uniform(0.1, upper[licensed])
+
+        low, high = np.full(len(h), -0.025), np.full(len(h), 0.05)
+        young = age < 23
+        low[young], high[young] = -0.05, 0.06
+        maturing = (male & (23 < age) & (age < 27)) | (~male & (18 < age) & (age < 23))
+        low[maturing], high[maturing] = -0.05, 0.1
+        self.risk_mitigation_score[h, s] += rng.uniform(low, high)
+
+        # Older kids with a decent income try to move out.
+        # Kids are aged before the head of house, so they're gone before any house hunting or baby planning.
+        children = np.flatnonzero(is_child)
+        ch, cs = h[children], s[children]
+        self_sufficent = self._human_income(ch, cs) >= 30_000
+        score = 0.5 * self_sufficent + 0.25 * (self.age[ch, cs] >= 25)
+        leaving[children] |= score > rng.random(len(children))
+
+        self.human_inforce[h[leaving], s[leaving]] = False
+        if solo:
+            return None
+
+        self.present[h[leaving], s[leaving]] = False
+
+        # People don't shop for houses every year!
+        heads = s == HEAD
+        rate = np.where(self.house_class[h[heads]] == 1, 0.5, 0.2)
+        self._update_house(h[heads][rate > rng.random(heads.sum())])
+
+        self._child_check(h[heads], years_remaining[heads])
+
+    def _evaluate_education(self, h, s):
+        """Vectorized human.evaluate_education()"""
+        k, rng = len(h), self.rng
+        age = self.age[h, s]
+        education = self.education[h, s]
+        job = self.job_class[h, s]
+        upbringing = self.upbringing_score[h, s]
+        upbringing_pct = sig(upbringing / 5)
+        roll, second_roll = rng.random(k), rng.random(k)
+
+        new_education, new_job = education.copy(), job.copy()
+
+        attending = education == ATTENDING_COLLEGE
+        aged_out = attending & (age >= 26)
+        senior = attending & (age >= 21) & (age < 26)
+        graduated = senior & (0.2 + 0.4 * upbringing_pct > roll)
+        dropped_out = senior & ~graduated & (upbringing < 0) & (0.2 > second_roll)
+
+        deciding = ~attending & (age >= 17) & (age <= 40)
+        teen = deciding & (age <= 21)
+        p = 0.25 + 0.2 * upbringing_pct
+        high_school = teen & (education == UNEDUCATED) & (p > roll)
+        college = teen & (education == HIGH_SCHOOL_DEGREE) & (p > roll)
+
+        grad_school_age = (age >= 24) & (age <= 26)
+        grad_school = deciding & grad_school_age & (education == COLLEGE_GRADUATE) & (0.05 + 0.15 * upbringing_pct > roll)
+        late_grad_school = (deciding & ~teen & ~grad_school_age & (education == COLLEGE_GRADUATE)
+                            & (job >= 3) & (0.01 > roll))
+
+        for mask, level in [(aged_out | dropped_out | high_school, HIGH_SCHOOL_DEGREE), (college, ATTENDING_COLLEGE)]:
+            new_education[mask] = level
+            new_job[mask] = 1
+
+        new_education[graduated] = COLLEGE_GRADUATE
+        new_job[graduated] = np.minimum(np.maximum(2, job[graduated] + 1), 6)
+
+        postbaccalaureate = grad_school | late_grad_school
+        new_education[postbaccalaureate] = POSTBACCALAUREATE_DEGREE
+        new_job[postbaccalaureate] = np.minimum(np.maximum(4, job[postbaccalaureate] + 1), 6)
+
+        self.education[h, s] = new_education
+        self.job_class[h, s] = new_job
+
+    def _evaluate_job(self, h, s):
+        """Vectorized human.evaluate_job()"""
+        k, rng = len(h), self.rng
+        education = self.education[h, s]
+        job = self.job_class[h, s]
+        job_risk_score = self.risk_mitigation_score[h, s] + self.job_risk_deviation[h, s]
+
+        position = JOB_POSITION[education, job]
+        changing = (0.5 * sig(-job_risk_score) > rng.random(k)) & (position >= 0)
+        movement = np.where(rng.random(k) < 0.4, -1, 1)
+        new_position = np.clip(position + movement, 0, ALLOWED_JOB_COUNT[education] - 1)
+
+        self.job_class[h, s] = np.where(changing, ALLOWED_JOBS[education, new_position], job)
+
+    def _spawn_spouse(self, h, years_remaining):
+        """Vectorized spouse.__init__()"""
+        k, rng = len(h), self.rng
+        if k == 0:
+            return None
+
+        # Pick an age that is slightly lower than the head of house
+        so_age = self.age[h, HEAD].astype(int)
+        lower = np.maximum.reduce([(so_age / 2 + 7).astype(int), np.full(k, 18), so_age - 10])
+        mode = so_age - 2
+        target_age = so_age.copy()
+        spread = (lower < mode) & (mode < so_age)
+        target_age[spread] = rng.triangular(lower[spread], mode[spread], so_age[spread]).astype(int)
+
+        # Decide if the couple is same or different sex
+        straight_couple = rng.random(k) < 0.9
+        gender = np.where(straight_couple, 1 - self.gender[h, HEAD], self.gender[h, HEAD])
+
+        upbringing = self.upbringing_score[h, HEAD] + rng.normal(0, 0.5, k)
+        spouse = np.full(k, SPOUSE)
+        self._spawn(h, spouse, target_age + years_remaining, upbringing, gender)
+
+        self.married[h, spouse] = True
+        self.risk_mitigation_score[h, spouse] += 0.15
+
+    def _child_check(self, h, years_remaining):
+        """Vectorized head_of_house.child_check()"""
+        if len(h) == 0:
+            return None
+
+        rng = self.rng
+        monthly_income = self._annual_income(h) / 12
+        finances_check = monthly_income - self._household_expenses(h, monthly_income) > 1000
+        room_check = HOUSE_BEDS[self.house_class[h]] >= self.present[h].sum(axis=1) + 1
+        child_count = self.present[h, FIRST_CHILD:].sum(axis=1)
+        possible_check = self.married[h, HEAD] & (self.child_interest[h] > child_count)
+
+        age = self.age[h, HEAD]
+        p = np.select(
+            [(20 <= age) & (age <= 25), (26 <= age) & (age <= 36), (37 <= age) & (age <= 41), (41 <= age) & (age <= 45)],
+            [0.25, 0.5, 0.35, 0.25],
+            0
+        )
+        p = p * np.where(child_count >= 1, 0.9, 1) * np.where(child_count >= 3, 0.9, 1)
+        p = p * np.where(self.gender[h, HEAD] == self.gender[h, SPOUSE], 0.25, 1)
+
+        having_kid = finances_check & room_check & possible_check & (p > rng.random(len(h)))
+        h, years_remaining = h[having_kid], years_remaining[having_kid]
+        upbringing = (self.upbringing_score[h, HEAD] + self.upbringing_score[h, SPOUSE]) / 2 + rng.normal(0, 0.5, len(h))
+        self._add_children(h, years_remaining, upbringing)
+
+        # Surprise Twins!
+        twins = 0.05 > rng.random(len(h))
+        self._add_children(h[twins], years_remaining[twins], upbringing[twins])
+
+        self.risk_mitigation_score[h, HEAD] += 0.1
+        self.risk_mitigation_score[h, SPOUSE] += 0.1
+
+    def _add_children(self, h, target_age, upbringing_score):
+        free = ~self.present[h, FIRST_CHILD:]
+        room = free.any(axis=1)
+        slot = FIRST_CHILD + free.argmax(axis=1)
+        self._spawn(h[room], slot[room], target_age[room], upbringing_score[room])
+
+    def _human_income(self, h, s):
+        job = self.job_class[h, s]
+        hours = np.where(self.age[h, s] <= 21, self.rng.uniform(5, 15, len(h)), 40)
+        return np.where(job == 0, 0, WAGES[job] * hours * 52)
+
+    def _annual_income(self, h):
+        job = self.job_class[h]
+        hours = np.where(self.age[h] <= 21, self.rng.uniform(5, 15, job.shape), 40)
+        income = np.where(self.present[h] & (job != 0), WAGES[job] * hours * 52, 0)
+        return income.sum(axis=1)
+
+    def _household_expenses(self, h, monthly_income):
+        cost = self.present[h].sum(axis=1) * 1_000
+        cost = cost + monthly_income * 0.3  # darn taxes and savings!
+        cost = cost + HOUSE_MONTHLY_COST[self.house_class[h]] + 2000 * self.vacation_home[h]
+        cost = cost + np.where(self.vehicle_present[h],
+                               _monthly_cost(self.vehicle_age[h], self.years_owned[h], self.purchase_price[h]),
+                               0).sum(axis=1)
+        return cost
+
+    def _driving_hazard(self, h):
+        driving_experience_pct = sig(1.5 * self.driving_experience[h] - 5)
+        risk_mitigation_pct = sig(self.risk_mitigation_score[h] / 2.5 - 0.75)
+        age = self.age[h].astype(float)
+
+        return 0.5 + 2.3 * sig(
+            1 - 1.5 * driving_experience_pct - 2.0 * risk_mitigation_pct
+            + 0.025 * np.maximum(age - 55, 0) + 0.05 * np.maximum(age - 65, 0) - 0.05 * np.maximum(age - 75, 0)
+        )
+
+    def _credit_score(self, h):
+        financial_risk_score = self.risk_mitigation_score[h, HEAD] + self.financial_risk_deviation[h, HEAD]
+        return (300 + 600 * sig(0.2 * financial_risk_score)).astype(int)
+
+    @property
+    def drivers(self):
+        return self.present & self.is_driving_age
+
+    # ------------------------------------------------------------------
+    # Houses
+    # ------------------------------------------------------------------
+
+    def _update_house(self, h):
+        """Vectorized household.update_house()"""
+        h = h[~self.vacation_home[h]]
+        if len(h) == 0:
+            return None
+
+        rng = self.rng
+        budget = 0.7 * self._annual_income(h) / 12
+        house_class = np.select([0.3 * budget >= 4000, 0.3 * budget >= 2000], [3, 2], 1)
+
+        # Congrats on the vacation home you crazy people that make way too much money
+        self.vacation_home[h] = 0.2 * budget >= 4000 + 2000
+        self.house_class[h] = house_class
+        self.house_driviness[h] = rng.normal(1, 0.1, len(h))
+
+        cumulative = HOUSE_LOCATION_WEIGHTS[house_class].cumsum(axis=1)
+        self.location[h] = (rng.random((len(h), 1)) > cumulative[:, :-1]).sum(axis=1)
+
+    # ------------------------------------------------------------------
+    # Vehicles
+    # ------------------------------------------------------------------
+
+    def _update_vehicles(self, hh):
+        # Households of a similar size get chunked together so the fleet arrays stay as narrow as possible
+        size = _row_width(self.present[hh]) * (MAX_VEHICLES + 1) + _row_width(self.vehicle_present[hh])
+        for h in self._chunks(hh[np.argsort(size, kind='stable')]):
+            self._update_vehicles_chunk(h)
+
+    def _update_vehicles_chunk(self, h):
+        """Vectorized household.update_vehicles(), every candidate fleet for every household is scored at once"""
+        m, rng = len(h), self.rng
+        if m == 0:
+            return None
+
+        risk_pct = sig(self.risk_mitigation_score[h, HEAD] / 5)
+        has_fleet = self.vehicle_present[h].any(axis=1)
+
+        # Probability of picking up coverages varies by risk mitigation score
+        rolls = rng.random((m, 5))
+        p_major, p_minor = 0.5 + 0.5 * risk_pct, 0.3 + 0.6 * risk_pct
+        new_coverage = np.stack([p_major, p_major, p_minor, p_minor, p_minor], axis=1) > rolls
+
+        current = np.stack([(self.coverage[h] & bit).any(axis=1) for bit in COVERAGE_BITS[2:]], axis=1)
+        p_upgrade = 0.12 * risk_pct
+        p_downgrade = 0.05 - 0.05 * risk_pct
+        current &= ~(p_downgrade[:, None] > rng.random((m, 5)))
+        current |= p_upgrade[:, None] > rng.random((m, 5))
+
+        extras = np.where(has_fleet[:, None], current, new_coverage)
+        coverage = np.full(m, BI_COV | PD_COV, dtype=np.uint8)
+        for i, bit in enumerate(COVERAGE_BITS[2:]):
+            coverage[extras[:, i]] |= bit
+
+        fresh = np.flatnonzero(~has_fleet)
+        existing = np.flatnonzero(has_fleet)
+        present, vehicle_type, age, years_owned, purchase_price, value, ids = (
+            np.zeros((m, 20, MAX_VEHICLES), dtype=dt) for dt in (bool, np.int8, np.int16, np.int16, float, float, np.int64)
+        )
+        ids[:] = -1
+
+        if len(fresh):
+            sizes = self._fresh_fleet_sizes(self.drivers[h[fresh]].sum(axis=1))
+            slots = np.arange(MAX_VEHICLES)
+            present[fresh] = slots[None, None, :] < np.minimum(sizes, MAX_VEHICLES)[:, :, None]
+            shape = (len(fresh), 20, MAX_VEHICLES)
+            vehicle_type[fresh] = rng.integers(0, 5, shape)
+            age[fresh] = rng.triangular(0, 5, 25, shape).astype(int)
+
+        if len(existing):
+            self._existing_fleet_candidates(h[existing], existing, present, vehicle_type, age, years_owned,
+                                            purchase_price, value, ids)
+
+        new = present & (ids < 0)
+        purchase_price[new] = MSRP[vehicle_type[new]] * DEPRECIATION_RATE ** age[new]
+        value[new] = purchase_price[new]
+
+        # Ties for the best score go to a random one of the tied fleets, like household.update_vehicles(). Only
+        # households without a single real candidate (every score -inf) fall back to the first one
+        width = max(_width(present), 1)
+        scores = self._score_fleets(h, present[..., :width], vehicle_type[..., :width], age[..., :width],
+                                    years_owned[..., :width], purchase_price[..., :width], value[..., :width])
+        top = scores.max(axis=1, keepdims=True)
+        tied = (scores == top) & np.isfinite(top)
+        best = np.where(tied, rng.random(scores.shape), -1.0).argmax(axis=1)
+        rows = np.arange(m)
+
+        self.vehicle_present[h] = present[rows, best]
+        self.vehicle_type[h] = vehicle_type[rows, best]
+        self.vehicle_age[h] = age[rows, best]
+        self.years_owned[h] = years_owned[rows, best]
+        self.purchase_price[h] = purchase_price[rows, best]
+        self.value[h] = value[rows, best]
+
+        chosen_ids = ids[rows, best]
+        new = self.vehicle_present[h] & (chosen_ids < 0)
+        chosen_ids[new] = self._new_ids(new.sum())
+        chosen_ids[~self.vehicle_present[h]] = -1
+        self.vehicle_id[h] = chosen_ids
+        self.coverage[h] = np.where(self.vehicle_present[h], coverage[:, None], 0)
+
+    @staticmethod
+    def _fresh_fleet_sizes(driver_count):
+        """Fleet sizes tried when a household doesn't have any vehicles yet, unused candidates get a size of 0"""
+        lone = np.array([1] * 10 + [2] * 10)
+        sizes = driver_count[:, None] + np.array([-1] * 5 + [0] * 5 + [1] * 5 + [0] * 5)[None, :]
+        sizes[:, 15:] = 0
+        return np.where(driver_count[:, None] <= 1, lone[None, :], sizes)
+
+    def _existing_fleet_candidates(self, h, rows, present, vehicle_type, age, years_owned, purchase_price, value, ids):
+        """Same as the options household.update_vehicles() generates from an existing fleet"""
+        rng = self.rng
+        add_car = np.array([False] + [True] * 11 + [False] * 5)
+        remove_car_n = np.array([0] * 6 + [1] * 3 + [2] * 3 + [1] * 3 + [2, 3])
+        k = len(add_car)
+
+        for target, source in [(present, self.vehicle_present), (vehicle_type, self.vehicle_type), (age, self.vehicle_age),
+                               (years_owned, self.years_owned), (purchase_price, self.purchase_price),
+                               (value, self.value), (ids, self.vehicle_id)]:
+            target[rows, :k] = source[h][:, None, :]
+
+        # Padding candidates are never picked
+        present[rows, k:] = False
+        cand = present[rows, :k]
+
+        for i in range(remove_car_n.max()):
+            count = cand.sum(axis=2)
+            removing = (remove_car_n[None, :] > i) & (count > 1)
+            pick = (rng.random(count.shape) * count).astype(int)
+            position = np.where(cand, cand.cumsum(axis=2) - 1, -1)
+            cand &= ~(removing[:, :, None] & (position == pick[:, :, None]))
+
+        # Dropping vehicles can land on the same fleet more than once, only keep the first of each like household.update_vehicles() does
+        keeps = np.flatnonzero(~add_car)
+        for a, j in enumerate(keeps):
+            for i in keeps[:a]:
+                cand[(cand[:, i] == cand[:, j]).all(axis=1), j] = False
+
+        free = ~cand
+        adding = add_car[None, :] & free.any(axis=2)
+        slot = free.argmax(axis=2)
+        r, c = np.nonzero(adding)
+        s = slot[r, c]
+        cand[r, c, s] = True
+        present[rows, :k] = cand
+
+        rr = rows[r]
+        vehicle_type[rr, c, s] = rng.integers(0, 5, len(r))
+        age[rr, c, s] = rng.uniform(0, 25, len(r)).astype(int)
+        years_owned[rr, c, s] = 0
+        ids[rr, c, s] = -1
+
+    def _score_fleets(self, h, present, vehicle_type, age, years_owned, purchase_price, value):
+        """Vectorized household.evaluate_new_vehicles() for arrays of candidate fleets shaped (households, candidates, vehicles)"""
+        vehicle_count = present.sum(axis=2)
+        driver_count = self.drivers[h].sum(axis=1)[:, None]
+
+        cost = 12 * np.where(present, _monthly_cost(age, years_owned, purchase_price), 0).sum(axis=2)
+        excess_cost = cost - self._annual_income(h)[:, None] * 0.2 * 0.7
+
+        interest = self._vehicle_interest(h, present, vehicle_type, age, value)
+        allocation = self._vehicle_allocation(h, present, interest)
+        driving = self.drivers[h, :interest.shape[2]][:, None, :, None]
+        match_score = (interest * allocation * driving).sum(axis=(2, 3))
+        match_score -= 1.0 * (driver_count - vehicle_count) ** 2
+
+        # No one likes a giant army of matching cars
+        unique_types = np.stack([(present & (vehicle_type == t)).any(axis=2) for t in range(len(VEHICLE_TYPES))]).sum(axis=0)
+        match_score += 0.5 * (unique_types - vehicle_count)
+
+        score = np.select([excess_cost >= 0, np.abs(driver_count - vehicle_count) > 2], [-500, -250], match_score)
+
+        # Empty fleets only show up as padding, so they can never be picked
+        return np.where(vehicle_count == 0, -np.inf, score)
+
+    def _vehicle_interest(self, h, present, vehicle_type, age, value):
+        """Vectorized human.vehicle_interest(), shaped (households, fleets, humans, vehicles)"""
+        # Only look at the human slots that are actually used
+        people = max(_width(self.present[h]), FIRST_CHILD)
+        gender, human_age = self.gender[h, :people], self.age[h, :people]
+        age = age.astype(float)
+
+        # No one wants to drive an older car!
+        interest = np.maximum(
+            2
+            + 0.05 * np.maximum(5 - age, 0)
+            - 0.05 * np.maximum(age - 5, 0)
+            + 0.025 * np.maximum(age - 15, 0)
+            + 0.02 * np.maximum(age - 20, 0),
+            0.25
+        )[:, :, None, :]
+
+        male = (gender == MALE)[:, None, :, None]
+        interest = interest * np.where(male, 1 + MALE_INTEREST[vehicle_type][:, :, None, :],
+                                       1 + FEMALE_INTEREST[vehicle_type][:, :, None, :])
+
+        youthful = (human_age <= 25)[:, None, :, None]
+        interest = interest * np.where(youthful, 1 + CHILD_INTEREST[vehicle_type][:, :, None, :], 1)
+
+        has_kids = ((self.present[h, FIRST_CHILD:] & (self.age[h, FIRST_CHILD:] < 18)).any(axis=1))[:, None, None, None]
+        interest = interest * np.where(has_kids, 1 + PARENT_INTEREST[vehicle_type][:, :, None, :], 1)
+
+        # Don't want kids driving the fancy car!
+        values = np.sort(np.where(present, value, -np.inf), axis=2)[:, :, ::-1]
+        first, second = values[:, :, :1], values[:, :, 1:2]
+        fanciest = value >= first
+        runner_up = ~fanciest & (present.sum(axis=2, keepdims=True) > 1) & (value >= second)
+        penalty = np.where(fanciest, 0.25, np.where(runner_up, 0.35, 1))
+        young_penalty = np.where(~fanciest & ~runner_up & (value > 15_000), 0.5, penalty)
+
+        is_child = (np.arange(people) >= FIRST_CHILD)[None, :]
+        young_child = (is_child & (human_age <= 21))[:, None, :, None]
+        interest = interest * np.where(young_child, young_penalty[:, :, None, :],
+                                       np.where(is_child[:, None, :, None], penalty[:, :, None, :], 1))
+
+        return interest
+
+    def _vehicle_allocation(self, h, present, interest):
+        """Vectorized household.determine_veh_assignements(), shaped (households, fleets, humans, vehicles)"""
+        vehicle_count = present.sum(axis=2)[:, :, None]
+        in_fleet = present[:, :, None, :]
+        slots = np.arange(present.shape[2])
+
+        # pick_nth always returns the favorite vehicle, even when asked for the second pick
+        masked = np.where(in_fleet, interest, -np.inf)
+        hoh_pick = slots == masked[:, :, HEAD].argmax(axis=2)[:, :, None]
+        so_pick = slots == masked[:, :, SPOUSE].argmax(axis=2)[:, :, None]
+
+        # Single drivers get to drive everything
+        rest = np.where(vehicle_count == 2, 0.15, 0.05 / np.maximum(vehicle_count - 2, 1))
+        single = np.where(hoh_pick, 0.85, rest)
+
+        # Couples each get a favorite, kids split up whatever is left
+        rest = 0.15 / np.maximum(vehicle_count - 1, 1)
+        couple = np.zeros(interest.shape)
+        couple[:, :, HEAD] = np.where(hoh_pick, 0.85, rest)
+        couple[:, :, SPOUSE] = np.where(so_pick, 0.85, rest)
+
+        people = interest.shape[2]
+        drivers = self.drivers[h, :people]
+        child_drivers = (drivers & (np.arange(people) >= FIRST_CHILD))[:, None, :, None]
+        preferences = np.where((hoh_pick | so_pick)[:, :, None, :], 0.75 * interest, interest) ** 2
+        preferences = np.where(child_drivers & in_fleet, preferences, 0)
+        balanced = _normalize(preferences, axis=3)
+        allocated = _safe_divide(balanced, preferences.sum(axis=2, keepdims=True))
+        final = _normalize(allocated, axis=3)
+        kids_share = drivers.sum(axis=1)[:, None, None, None] > 2
+        couple[:, :, FIRST_CHILD:] = np.where(kids_share, final[:, :, FIRST_CHILD:], 0)
+
+        has_spouse = self.present[h, SPOUSE][:, None, None, None]
+        allocation = np.where(has_spouse, couple, single[:, :, None, :])
+        allocation = np.where(vehicle_count[:, :, :, None] == 1, 1, allocation)
+
+        return np.where(in_fleet, allocation, 0)
+
+    # ------------------------------------------------------------------
+    # Mileage and claims
+    # ------------------------------------------------------------------
+
+    def _driver_mileage(self, h):
+        """Vectorized determine_mileage() for every human in the household, returns city and highway mileage"""
+        age = self.age[h].astype(float)
+        male = self.gender[h] == MALE
+        employed = self.job_class[h] != 0
+        drivers = self.drivers[h]
+        driver_count = drivers.sum(axis=1, keepdims=True)
+        non_driver_cnt = (self.present[h, FIRST_CHILD:] & ~self.is_driving_age[h, FIRST_CHILD:]).sum(axis=1, keepdims=True)
+
+        # Adults drive the same amount unless they have someone to share rides with, kids drive more as they get older
+        mileage = np.full(age.shape, 10_000.0)
+        mileage[:, HEAD] *= np.where(self.present[h, SPOUSE], 0.7, 1)
+        mileage[:, SPOUSE] *= 0.7
+        mileage[:, :FIRST_CHILD] *= np.where(employed[:, :FIRST_CHILD], 1, 0.5)
+
+        kids = mileage[:, FIRST_CHILD:]
+        kid_age = age[:, FIRST_CHILD:]
+        kids[:] = np.select([kid_age <= 18, kid_age <= 20], [6_000, 8_000], 10_000)
+        kids *= np.where(employed[:, FIRST_CHILD:], 1.2, 1)
+        kids *= np.where(driver_count > 3, 0.7 ** np.maximum(driver_count - 3, 0), 1)
+
+        # Men drive a bit more!
+        mileage *= np.where(male, 1.2, 1)
+
+        # Less driving as you age
+        mileage *= 1 - (np.maximum(0.01 * (age - 65), 0) + np.maximum(0.01 * (age - 75), 0))
+
+        # Kids have their own activities
+        mileage += np.where(non_driver_cnt > 0, 2_000 * non_driver_cnt / np.maximum(driver_count, 1), 0)
+
+        mileage *= self.driviness[h] * self.household_driviness[h][:, None] * self.house_driviness[h][:, None]
+        location = self.location[h][:, None]
+        city_mileage = mileage * 0.55 * CITY_DRIVING_RATIO[location]
+        highway_mileage = mileage * 0.45 * HIGHWAY_DRIVING_RATIO[location]
+
+        return city_mileage, highway_mileage
+
+    def _current_allocation(self, h):
+        present = self.vehicle_present[h][:, None, :]
+        interest = self._vehicle_interest(h, present, self.vehicle_type[h][:, None, :],
+                                          self.vehicle_age[h][:, None, :], self.value[h][:, None, :])
+        allocation = np.zeros((len(h), MAX_PEOPLE, MAX_VEHICLES))
+        allocation[:, :interest.shape[2]] = self._vehicle_allocation(h, present, interest)[:, 0]
+        return allocation
+
+    def vehicle_mileage(self, h):
+        """Annual mileage per vehicle slot for the households in h"""
+        allocation = self._current_allocation(h)
+        city_mileage, highway_mileage = self._driver_mileage(h)
+        total = np.where(self.drivers[h], city_mileage + highway_mileage, 0)
+        return (allocation * total[:, :, None]).sum(axis=1)
+
+    def _generate_claims(self, hh):
+        size = _row_width(self.present[hh]) * (MAX_VEHICLES + 1) + _row_width(self.vehicle_present[hh])
+        for h in self._chunks(hh[np.argsort(size, kind='stable')]):
+            self._generate_claims_chunk(h)
+
+    def _generate_claims_chunk(self, h):
+        """Vectorized household.generate_claims(), every driver/vehicle/road type combination is evaluated at once"""
+        rng = self.rng
+        if len(h) == 0:
+            return None
+
+        allocation = self._current_allocation(h)
+        city_mileage, highway_mileage = self._driver_mileage(h)
+        driving_hazard = self._driving_hazard(h)
+
+        # Only look at driver/vehicle pairs that exist
+        r, d, v = np.nonzero(self.drivers[h][:, :, None] & self.vehicle_present[h][:, None, :])
+        share = allocation[r, d, v]
+        mileage = np.stack([city_mileage[r, d], highway_mileage[r, d], city_mileage[r, d] + highway_mileage[r, d]], axis=1)
+        downtown = self.location[h][r] == DOWNTOWN
+        hazard = claim_hazards(share[:, None] * mileage, driving_hazard[r, d], self.vehicle_age[h][r, v], downtown)
+        counts = claim_counts(hazard, rng, self.exact_claim_counts)
+
+        pair, _, claim_type = np.nonzero(counts)
+        if len(pair) == 0:
+            return None
+
+        # Exact poisson counts can have more than one claim in a spot
+        repeats = counts[counts > 0]
+        pair, claim_type = np.repeat(pair, repeats), np.repeat(claim_type, repeats)
+        rows, driver, slot = r[pair], d[pair], v[pair]
+        self._record_claims(h, rows, driver, slot, claim_type)
+
+    def _record_claims(self, h, rows, driver, slot, claim_type):
+        """Vectorized claim.__init__(), works out which coverages pay for each new claim"""
+        rng = self.rng
+        k = len(rows)
+        household = h[rows]
+        vehicle_type = self.vehicle_type[household, slot]
+        coverage = self.coverage[household, slot]
+        protection = PROTECTION[vehicle_type]
+        hurt_others = HURT_OTHERS[vehicle_type]
+        income = self._annual_income(h)[rows]
+        garages = HOUSE_GARAGES[self.house_class[household]]
+        veh_cnt = self.vehicle_present[household].sum(axis=1)
+
+        hurt_mult = np.select([hurt_others == 1, hurt_others == 3], [0.8, 1.2], 1)
+        protection_mult = np.select([protection == 1, protection == 3], [1.2, 0.8], 1)
+        income_bands = [income > 150_000, income > 120_000, income > 90_000]
+
+        paid = np.zeros(k, dtype=np.uint8)
+        rolls = rng.random((k, 5))
+        crash = rng.random(k)
+
+        def pays(p, roll, bit):
+            return np.where((p > rolls[:, roll]) & (coverage & bit > 0), bit, 0).astype(np.uint8)
+
+        # Single car collisions: tree, fence, parked_car, pedestrian
+        single = claim_type == SINGLE_CAR_COLLISION
+        tree, fence = crash < 0.4, (crash >= 0.4) & (crash < 0.7)
+        parked, pedestrian = (crash >= 0.7) & (crash < 0.9), crash >= 0.9
+        bi = np.select([pedestrian, parked], [0.9, 0.3 * hurt_mult], 0)
+        pd = np.select([pedestrian, parked, fence, tree], [0.05, 0.9 * hurt_mult, 0.9, 0.05])
+        coll = np.select([parked, fence, tree, pedestrian], [0.85, 0.15, 0.9, 0.15]) * np.select(income_bands, [0.8, 0.85, 0.9], 1)
+        mpc = np.select([parked, tree], [0.3, 0.8], 0.05) * protection_mult
+        single_paid = pays(bi, 0, BI_COV) | pays(pd, 1, PD_COV) | pays(coll, 2, COLL_COV) | pays(mpc, 3, MPC_COV)
+        paid[single] = single_paid[single]
+
+        # Multi car collisions: fender_bender or serious
+        multi = claim_type == MULTI_CAR_COLLISION
+        serious = crash >= 0.5
+        bi = np.where(serious, 0.6, 0.05) * hurt_mult
+        pd = np.where(serious, 0.95, 0.35 * hurt_mult)
+        coll = np.where(serious, 0.95, 0.3 * np.select(income_bands, [0.5, 0.6, 0.7], 1))
+        mpc = np.where(serious, 0.6, 0.05) * protection_mult
+        multi_paid = pays(bi, 0, BI_COV) | pays(pd, 1, PD_COV) | pays(coll, 2, COLL_COV) | pays(mpc, 3, MPC_COV)
+        paid[multi] = multi_paid[multi]
+
+        # Theft and hail depend on if the vehicle was garaged at the time!
+        weather = (claim_type == THEFT) | (claim_type == HAIL)
+        mult = np.select(income_bands, [0.5, 0.6, 0.7], 1.0)
+        mult = np.select([garages > veh_cnt, garages > 0], [mult * 0.25, mult * (1 - 0.75 * veh_cnt / np.maximum(garages, 1))], mult)
+        paid[weather] = pays(mult, 0, COMP_COV)[weather]
+
+        glass = claim_type == GLASS
+        mult = np.select([income > 150_000, income > 120_000, income > 90_000, income > 70_000], [0.2, 0.4, 0.6, 0.8], 1)
+        paid[glass] = pays(mult, 0, COMP_COV)[glass]
+
+        ubi = claim_type == UBI_CLAIM
+        coll = np.where(serious, 0.8, 0.2 * np.select(income_bands, [0.5, 0.6, 0.7], 1))
+        ubi_p = np.where(serious, 0.8, 0.3) * protection_mult
+        ubi_paid = pays(coll, 2, COLL_COV) | pays(ubi_p, 4, UBI_COV)
+        paid[ubi] = ubi_paid[ubi]
+
+        # claim.build_ers() checks the ubi coverage, keep that behavior
+        ers = claim_type == ERS_CLAIM
+        p = np.where(self.gender[household, driver] == MALE, 0.7, 0.85)
+        ers_paid = np.where((p > rolls[:, 0]) & (coverage & UBI_COV > 0), ERS_COV, 0).astype(np.uint8)
+        paid[ers] = ers_paid[ers]
+
+        # Nobody is driving during a theft or a hail storm
+        driver_id = np.where(weather, -1, self.human_id[household, driver])
+
+        self._claims.append({
+            'claim_id': self._new_ids(k),
+            'household': household,
+            'vehicle_id': self.vehicle_id[household, slot],
+            'driver_id': driver_id,
+            'when_occured': self.tenure_years[household].copy(),
+            'claim_type': claim_type.astype(np.int8),
+            'paid': paid,
+            'coverage': coverage,
+        })
+
+    @property
+    def claims(self):
+        """All the claims generated so far as a dict of columns"""
+        columns = ['claim_id', 'household', 'vehicle_id', 'driver_id', 'when_occured', 'claim_type', 'paid', 'coverage']
+        if len(self._claims) == 0:
+            return {key: np.zeros(0, dtype=np.int64) for key in columns}
+
+        if len(self._claims) > 1:
+            self._claims = [{key: np.concatenate([x[key] for x in self._claims]) for key in columns}]
+
+        return self._claims[0]
+
+    def _lapse_check(self, h):
+        """Vectorized household.household_lapse_check()"""
+        hh_age = self.age[h, HEAD].astype(float)
+        score = self._credit_score(h)
+
+        # Low credit score individuals will shop more
+        p = np.select([score <= 500, score <= 600, score <= 700], [0.10, 0.05, 0.025], 0.01)
+
+        # General mortality
+        p = p + np.where(hh_age > 75, ((hh_age - 75) / 95) ** 2, 0)
+
+        # Let's keep the households in the 2 digit ages
+        lapsed = (hh_age >= 99) | (p > self.rng.random(len(h)))
+        self.inforce[h[lapsed]] = False
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def vehicle_rows(self):
+        """
+        One row per vehicle for inforce households with at least one driver, same columns as household.summary_per_vehicle.
+        Nested columns (driver_info, vehicle_claims, other_claims, household_vehicles_info) are left off.
+        Returns a dict of columns that can be handed straight to pd.DataFrame().
+        """
+        rng = self.rng
+        drivers = self.drivers
+        keep = np.flatnonzero(self.inforce & drivers.any(axis=1))
+        row_h, row_v = np.nonzero(self.vehicle_present[keep])
+        local = np.full(self.n, -1)
+        local[keep] = np.arange(len(keep))
+
+        # Household level features
+        h = keep
+        drv = drivers[h]
+        driver_count = drv.sum(axis=1)
+        ages = np.where(drv, self.age[h], 0)
+        tenures = np.where(drv, self.human_tenure[h], 0)
+        big = np.iinfo(np.int16).max
+        income = self._annual_income(h)
+
+        owned = (self.house_class[h] >= 2).astype(int) + self.vacation_home[h]
+        rental = (self.house_class[h] == 1).astype(int)
+        umbrella_rate = (0.05 * (income > 95_000) + 0.05 * (income > 115_000) + 0.05 * (income > 135_000)
+                         + 0.1 * (income > 155_000) + 0.1 * (income > 195_000))
+        married = self.present[h, SPOUSE]
+        article = np.where(married, income > 75_000, income > 150_000) & (0.15 >= rng.random(len(h)))
+
+        household = {
+            'household_id': self.household_id[h],
+            'inforce': self.inforce[h],
+            'household_tenure': self.tenure_years[h],
+            'min_driver_tenure': np.where(drv, tenures, big).min(axis=1),
+            'max_driver_tenure': tenures.max(axis=1),
+            'driver_count': driver_count,
+            'vehicle_count': self.vehicle_present[h].sum(axis=1),
+            'youthful_driver_count': (drv & (self.age[h] <= 25)).sum(axis=1),
+            'max_driver_age': ages.max(axis=1),
+            'min_driver_age': np.where(drv, ages, big).min(axis=1),
+            'mean_driver_age': ages.sum(axis=1) / driver_count,
+            'credit_score': self._credit_score(h),
+            'multiline_houses': np.where(0.85 >= rng.random(len(h)), owned, 0),
+            'multiline_rental': np.where(0.45 >= rng.random(len(h)), rental, 0),
+            'multiline_personal_liability_umbrella': (umbrella_rate >= rng.random(len(h))).astype(int),
+            'multiline_personal_article_policy': article.astype(int),
+            'garaging_location': np.array(LOCATIONS)[self.location[h]],
+        }
+
+        driver_age = np.where(drv, self.age[h], -1)
+        for age in range(16, 99):
+            household[f'driver_cnt_{age}'] = (driver_age == age).sum(axis=1)
+
+        for age in range(16, 99):
+            for code, gender in enumerate(GENDERS):
+                household[f'driver_cnt_{age}_{gender}'] = ((driver_age == age) & (self.gender[h] == code)).sum(axis=1)
+
+        # Claims that still count towards the experience
+        claims = self.claims
+        inforce_humans = np.sort(self.human_id[self.present & self.human_inforce])
+        claim_local = local[claims['household']]
+        claim_age = self.tenure_years[claims['household']] - claims['when_occured']
+        usable = ((claim_local >= 0) & (claims['paid'] > 0)
+                  & ((claims['driver_id'] < 0) | _contains(inforce_humans, claims['driver_id'])))
+        coverage_hits = [np.ones(len(claim_age), dtype=bool)] + [(claims['paid'] & bit) > 0 for bit in COVERAGE_BITS]
+        names = ('all', 'bi', 'pd', 'coll', 'comp', 'mpc', 'ers', 'ubi')
+
+        household.update(_claim_features('household', names, coverage_hits, usable & (claim_age != 0),
+                                         claim_local, claim_age, len(h), range(1, 16)))
+
+        vehicle_ids = self.vehicle_id[h][row_h, row_v]
+        order = np.argsort(vehicle_ids)
+        position = np.searchsorted(vehicle_ids[order], claims['vehicle_id'])
+        position = np.minimum(position, max(len(order) - 1, 0))
+        matched = (len(order) > 0) & (vehicle_ids[order][position] == claims['vehicle_id'])
+        claim_row = np.where(matched, order[position], -1)
+
+        vehicle = {
+            'vehicle_id': vehicle_ids,
+            'vehicle_age': self.vehicle_age[h][row_h, row_v],
+            'vehicle_years_owned': self.years_owned[h][row_h, row_v],
+            'vehicle_type': np.array(VEHICLE_TYPES)[self.vehicle_type[h][row_h, row_v]],
+        }
+        coverage = self.coverage[h][row_h, row_v]
+        for bit, name in zip(COVERAGE_BITS, COVERAGES):
+            vehicle[f'coverage_{name}'] = (coverage & bit) > 0
+
+        vehicle.update(_claim_features('vehicle', names, coverage_hits, usable & matched,
+                                       claim_row, claim_age, len(row_h), range(0, 16)))
+
+        mileage = np.concatenate([self.vehicle_mileage(x) for x in self._chunks(h)]) if len(h) else np.zeros((0, MAX_VEHICLES))
+        vehicle['annual_mileage'] = np.maximum(
+            1000,
+            np.round(mileage[row_h, row_v], -3) + rng.choice([-2000, -1000, 0, 1000, 2000], len(row_h), p=np.array([0.1, 0.2, 0.3, 0.2, 0.1]) / 0.9)
+        )
+
+        rows = {key: value[row_h] for key, value in household.items()}
+        rows.update(vehicle)
+        return rows
+
+
+def _monthly_cost(age, years_owned, purchase_price):
+    """Vectorized vehicle.monthly_cost, assumes a 5 year loan plus maintanance"""
+    loan_cost = np.where(years_owned <= 5, 1.1 * purchase_price / (5 * 12), 0)
+    maintanance_cost = np.select([age < 10, age < 15, age < 20], [50, 100, 150], 200)
+    return loan_cost + maintanance_cost
+
+
+def _width(mask):
+    """How many slots are needed to hold every True in the last axis of mask"""
+    used = np.flatnonzero(mask.reshape(-1, mask.shape[-1]).any(axis=0))
+    return used[-1] + 1 if len(used) else 0
+
+
+def _row_width(mask):
+    """Same as _width() but for each row of a 2d mask"""
+    return np.where(mask.any(axis=1), mask.shape[1] - mask[:, ::-1].argmax(axis=1), 0)
+
+
+def _safe_divide(x, y):
+    return np.divide(x, y, out=np.zeros(np.broadcast(x, y).shape), where=y != 0)
+
+
+def _normalize(x, axis):
+    return _safe_divide(x, x.sum(axis=axis, keepdims=True))
+
+
+def _contains(sorted_values, values):
+    if len(sorted_values) == 0:
+        return np.zeros(len(values), dtype=bool)
+
+    position = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[position] == values
+
+
+def _claim_features(prefix, names, coverage_hits, usable, row, claim_age, n_rows, ages):
+    """Claim count by coverage and claim age, plus time since the last claim by coverage"""
+    features = {}
+
+    for name, hit in zip(names, coverage_hits):
+        selected = usable & hit
+        counts = np.zeros((n_rows, 17), dtype=np.int64)
+        in_window = selected & (claim_age >= 0) & (claim_age <= 16)
+        np.add.at(counts, (row[in_window], claim_age[in_window]), 1)
+
+        for age in ages:
+            features[f'{prefix}_claim_cnt_{name}_{age}'] = counts[:, age]
+
+    for name, hit in zip(names, coverage_hits):
+        recent = usable & hit & (claim_age >= 1) & (claim_age <= 16)
+        time_since = np.full(n_rows, np.inf)
+        np.minimum.at(time_since, row[recent], claim_age[recent])
+        features[f'{prefix}_claim_time_since_{name}'] = np.where(np.isinf(time_since), np.nan, time_since)
+
+    return features
@@ -0,0 +1,233 @@
+"""
+The NN research inputs, worked out for a whole table at once instead of a row at a time.
+
+NN_Grid_Search_V7.ipynb runs prepare_row() over the data with DataFrame.apply(axis = 1): every row picks the fields out
+of its nested claims/drivers/vehicles one dict at a time and makes three tf.ragged.constant()s, which takes longer than
+training the model. The nested columns are already list<struct> columns in the Parquet output (see parquet_writer.py),
+so every driver of every row is one flat Arrow array and where each row's drivers start is the list offsets.
+ragged_features() works on those directly with NumPy, normalized and encoded the same way prepare_row() does it:
+
+    driver_info     (drivers, 3)    driver_age, driver_gender, driver_tenure
+    vehicle_info    (vehicles, 4)   this_vehicle_ind, vehicle_age, vehicle_type, vehicle_years_owned
+    claims_info     (claims, 15)    CLAIM_FEATURES and if it's a claim on this vehicle, the vehicle's claims first.
+                                    Rows without any claims get a single row of zeros, like prepare_row() gives them
+    other_data      (rows, 25)      OTHER_FEATURES
+    target          (rows, 4)       TARGETS
+
+Every ragged one comes with a {name}_row_splits array (row i's values are values[splits[i]:splits[i + 1]]), which is
+what tf.RaggedTensor.from_row_splits() takes. Everything is float16 like prepare_row() makes it.
+
+    export_splits('./data_result', './nn_features')
+    train_x, train_y = load_dataset('./nn_features/train.npz')
+
+load_dataset() hands back the same (x, y) that prep_one_datas() did, without any Python work per row.
+"""
+
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+CLAIM_FEATURES = ['bi_ind', 'coll_ind', 'comp_ind', 'ers_ind', 'mpc_ind', 'pd_ind', 'ubi_ind',
+                  'veh_had_bi_cov_ind', 'veh_had_coll_cov_ind', 'veh_had_comp_cov_ind', 'veh_had_ers_cov_ind',
+                  'veh_had_mpc_cov_ind', 'veh_had_pd_cov_ind', 'veh_had_ubi_cov_ind']
+
+OTHER_FEATURES = ['credit_score', 'garaging_location', 'household_tenure', 'multiline_houses', 'multiline_rental',
+                  'multiline_personal_article_policy', 'multiline_personal_liability_umbrella', 'vehicle_count',
+                  'annual_mileage', 'vehicle_age', 'vehicle_type', 'vehicle_years_owned', 'max_driver_age',
+                  'min_driver_age', 'mean_driver_age', 'min_driver_tenure', 'youthful_driver_count', 'driver_count',
+                  'coverage_bi', 'coverage_coll', 'coverage_comp', 'coverage_ers', 'coverage_mpc', 'coverage_pd',
+                  'coverage_ubi']
+
+TARGETS = ['vehicle_claim_cnt_pd_0', 'vehicle_claim_cnt_coll_0', 'vehicle_claim_cnt_bi_0', 'vehicle_claim_cnt_mpc_0']
+
+# (center, scale) of the numbers prepare_row() normalizes as (x - center) / scale, the rest go in as they are
+OTHER_SCALING = {
+    'credit_score': (600, 500),
+    'household_tenure': (15, 10),
+    'multiline_houses': (0, 2),
+    'vehicle_count': (3, 3),
+    'annual_mileage': (10_000, 10_000),
+    'vehicle_age': (15, 15),
+    'vehicle_years_owned': (10, 15),
+    'max_driver_age': (45, 45),
+    'min_driver_age': (45, 45),
+    'mean_driver_age': (45, 45),
+    'min_driver_tenure': (30, 30),
+    'youthful_driver_count': (0, 4),
+    'driver_count': (0, 5)
+}
+
+# Label encodings, anything else is 0
+VEHICLE_TYPE_CODES = {'van': 1, 'sedan': 2, 'sports car': 3, 'suv': 4}
+GARAGING_LOCATION_CODES = {'country': 1, 'downtown': 2}
+
+RAGGED = ('driver_info', 'vehicle_info', 'claims_info')
+
+
+def encode(labels, codes):
+    """A string array as the codes prepare_row() gives its labels"""
+    labels = labels.to_numpy(zero_copy_only=False)
+    encoded = np.zeros(len(labels))
+    for label, code in codes.items():
+        encoded[labels == label] = code
+
+    return encoded
+
+
+def numbers(array):
+    """A numeric or bool Arrow array as float64, with Nones as NaN (what pandas would have handed prepare_row())"""
+    return pc.cast(array, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def nested(column):
+    """The flat struct values of a list<struct> column and how many of them each row has"""
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+
+    return pc.list_flatten(column), pc.list_value_length(column).to_numpy(zero_copy_only=False)
+
+
+def row_splits(lengths):
+    splits = np.zeros(len(lengths) + 1, np.int64)
+    np.cumsum(lengths, out=splits[1:])
+    return splits
+
+
+def driver_features(table):
+    drivers, lengths = nested(table.column('driver_info'))
+    values = np.column_stack([
+        (numbers(drivers.field('driver_age')) - 50) / 50,
+        (drivers.field('driver_gender').to_numpy(zero_copy_only=False) == 'm') * 1.0,
+        (numbers(drivers.field('driver_tenure')) - 10) / 10
+    ]) if len(drivers) else np.zeros((0, 3))
+
+    return values, row_splits(lengths)
+
+
+def vehicle_features(table):
+    vehicles, lengths = nested(table.column('household_vehicles_info'))
+    values = np.column_stack([
+        numbers(vehicles.field('this_vehicle_ind')),
+        (numbers(vehicles.field('vehicle_age')) - 15) / 15,
+        encode(vehicles.field('vehicle_type'), VEHICLE_TYPE_CODES),
+        (numbers(vehicles.field('vehicle_years_owned')) - 15) / 15
+    ]) if len(vehicles) else np.zeros((0, 4))
+
+    return values, row_splits(lengths)
+
+
+def claim_features(table):
+    """Each row's vehicle claims then its other claims, or one row of zeros if it has neither"""
+    vehicle_claims, vehicle_lengths = nested(table.column('vehicle_claims'))
+    other_claims, other_lengths = nested(table.column('other_claims'))
+
+    lengths = np.maximum(vehicle_lengths + other_lengths, 1)
+    splits = row_splits(lengths)
+    values = np.zeros((splits[-1], len(CLAIM_FEATURES) + 1))
+
+    # Where every claim goes: its row's start, past the vehicle claims for the other claims, plus its place in the row
+    rows = np.arange(table.num_rows)
+    for claims, counts, skip, this_vehicle in (
+        (vehicle_claims, vehicle_lengths, np.zeros_like(vehicle_lengths), 1),
+        (other_claims, other_lengths, vehicle_lengths, 0)
+    ):
+        if not len(claims):
+            continue
+
+        owner = np.repeat(rows, counts)
+        place = np.arange(len(claims)) - np.repeat(row_splits(counts)[:-1], counts)
+        at = splits[owner] + skip[owner] + place
+
+        for i, name in enumerate(CLAIM_FEATURES):
+            values[at, i] = numbers(claims.field(name))
+
+        values[at, -1] = this_vehicle
+
+    return values, splits
+
+
+def other_features(table):
+    columns = []
+    for name in OTHER_FEATURES:
+        if name == 'garaging_location':
+            column = encode(table.column(name), GARAGING_LOCATION_CODES)
+        elif name == 'vehicle_type':
+            column = encode(table.column(name), VEHICLE_TYPE_CODES)
+        else:
+            column = numbers(table.column(name))
+
+        if name in OTHER_SCALING:
+            center, scale = OTHER_SCALING[name]
+            column = (column - center) / scale
+
+        columns.append(column)
+
+    return np.column_stack(columns)
+
+
+def ragged_features(table):
+    """
+    The NN inputs of every row of table (a pyarrow Table or RecordBatch of summary_per_vehicle rows, like a split of
+    the Parquet output or a batch out of build(..., batches = True)) as a dict of flat arrays, see the top of the file.
+    """
+
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+
+    features = {}
+    for name, (values, splits) in zip(RAGGED, (driver_features(table), vehicle_features(table), claim_features(table))):
+        features[name] = values.astype(np.float16)
+        features[f'{name}_row_splits'] = splits
+
+    features['other_data'] = other_features(table).astype(np.float16)
+    features['target'] = np.column_stack([numbers(table.column(x)) for x in TARGETS]).astype(np.float16)
+
+    return features
+
+
+def export_splits(dataset, out, compress=False):
+    """
+    ragged_features() of every split of a Parquet dataset written by parquet_writer (or Data_Creation.ipynb), saved as
+    out/{split}.npz. Hands back {split: rows}.
+    """
+
+    os.makedirs(out, exist_ok=True)
+    data = ds.dataset(dataset, partitioning='hive')
+    splits = pc.unique(data.to_table(columns=['split']).column('split')).to_pylist()
+
+    rows = {}
+    for split in sorted(splits):
+        table = data.to_table(filter=pc.field('split') == split)
+        (np.savez_compressed if compress else np.savez)(os.path.join(out, f'{split}.npz'), **ragged_features(table))
+        rows[split] = table.num_rows
+
+    return rows
+
+
+def load_features(path):
+    """The arrays export_splits() saved"""
+    with np.load(path) as arrays:
+        return dict(arrays)
+
+
+def to_tensors(features):
+    """
+    (x, y) for the model, the same thing prep_one_datas() gave: x is the driver_info, vehicle_info and claims_info
+    ragged tensors and the other_data tensor, y is the target tensor.
+    """
+
+    import tensorflow as tf
+
+    x = [tf.RaggedTensor.from_row_splits(features[name], features[f'{name}_row_splits'], validate=False)
+         for name in RAGGED]
+    x.append(tf.convert_to_tensor(features['other_data']))
+
+    return x, tf.convert_to_tensor(features['target'])
+
+
+def load_dataset(path):
+    """to_tensors() of a file export_splits() saved"""
+    return to_tensors(load_features(path))
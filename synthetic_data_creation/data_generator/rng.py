@@ -0,0 +1,179 @@
+"""
+A random number stream for each household.
+
+Every household carries its own random_stream, and all of its humans, vehicles, properties and claims draw from it.
+That way a household comes out the same no matter which order (or which process) the households get simulated in.
+
+The stream mimics the parts of the random module the simulation uses, but pulls uniforms and normals out of a NumPy
+Generator a few hundred at a time, which is a lot cheaper than asking for one number at a time.
+"""
+
+import random
+from bisect import bisect
+from itertools import accumulate
+from math import sqrt
+
+import numpy as np
+
+BUFFER_SIZE = 256
+
+# How each buffer gets filled back up, by buffer name
+REFILLS = {
+    'uniforms': lambda generator, n: generator.random(n),
+    'normals': lambda generator, n: generator.standard_normal(n),
+    'words': lambda generator, n: generator.integers(0, 2 ** 64, n, dtype=np.uint64)
+}
+
+
+class random_stream:
+    """
+    Drop in replacement for the random module calls used by the simulation.
+    Seeding with a (seed, index) pair gives every household an independent stream that can be rebuilt from just those
+    two numbers, e.g. random_stream(42, 7) is always the 8th household of build 42.
+    Without a seed the stream is seeded off of the random module, so random.seed() still makes a run repeatable.
+    """
+
+    def __init__(self, seed=None, index=None, buffer_size=BUFFER_SIZE):
+        if seed is None:
+            seed = random.getrandbits(128)
+
+        self.index = index
+        spawn_key = () if index is None else (index,)
+        self.generator = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=spawn_key))
+        self.buffer_size = buffer_size
+        self._uniforms = []
+        self._normals = []
+        self._words = []
+        # Numbers pulled into the buffers so far, see draws
+        self.buffered = 0
+        # The bit generator state each buffer was last filled from, so getstate() doesn't have to copy the buffers
+        self._filled_from = {}
+
+    def _refill(self, name):
+        self._filled_from[name] = self.generator.bit_generator.state
+        numbers = REFILLS[name](self.generator, self.buffer_size).tolist()
+        setattr(self, f'_{name}', numbers)
+        self.buffered += self.buffer_size
+
+        return numbers
+
+    def getstate(self):
+        """
+        Everything needed to pick the stream back up right where it is, like random.getstate().
+        Each buffer is saved as (the bit generator state it was filled from, how many numbers are left in it) instead of
+        the numbers themselves, setstate() fills it again from that state.
+        """
+        return {
+            'index': self.index,
+            'buffer_size': self.buffer_size,
+            'bit_generator': self.generator.bit_generator.state,
+            'buffers': {name: (self._filled_from.get(name), len(getattr(self, f'_{name}'))) for name in REFILLS},
+            'buffered': self.buffered
+        }
+
+    def setstate(self, state):
+        """Picks back up from a getstate(), the stream has to be using the same kind of bit generator"""
+        self.index = state['index']
+        self.buffer_size = state['buffer_size']
+        self.buffered = state['buffered']
+        self._filled_from = {}
+
+        for name, (filled_from, left) in state['buffers'].items():
+            numbers = []
+            if left:
+                self.generator.bit_generator.state = filled_from
+                numbers = REFILLS[name](self.generator, self.buffer_size).tolist()[:left]
+                self._filled_from[name] = filled_from
+
+            setattr(self, f'_{name}', numbers)
+
+        self.generator.bit_generator.state = state['bit_generator']
+
+    def copy(self):
+        """A copy that draws the very same numbers from here on, without taking any from this stream"""
+        stream = random_stream.__new__(random_stream)
+        stream.__dict__.update(self.__dict__)
+        stream.generator = np.random.Generator(type(self.generator.bit_generator)())
+        stream.generator.bit_generator.state = self.generator.bit_generator.state
+        stream._uniforms = list(self._uniforms)
+        stream._normals = list(self._normals)
+        stream._words = list(self._words)
+        stream._filled_from = dict(self._filled_from)
+
+        return stream
+
+    def branch(self, key):
+        """
+        A new stream for another possible future of the same household, seeded from where this stream is right now
+        and key. Branches with different keys are independent of each other and of this stream.
+        """
+        state = self.generator.bit_generator.state['state']
+        return random_stream([state['state'], state['inc'], key], self.index, self.buffer_size)
+
+    @property
+    def draws(self):
+        """How many numbers have been drawn from the buffers, draws made straight from the generator aren't counted"""
+        return self.buffered - len(self._uniforms) - len(self._normals) - len(self._words)
+
+    def random(self):
+        """A uniform number in [0, 1)"""
+        if not self._uniforms:
+            self._refill('uniforms')
+
+        return self._uniforms.pop()
+
+    def gauss(self):
+        """A standard normal number"""
+        if not self._normals:
+            self._refill('normals')
+
+        return self._normals.pop()
+
+    def uniform(self, a, b):
+        return a + (b - a) * self.random()
+
+    def normalvariate(self, mu=0.0, sigma=1.0):
+        return mu + sigma * self.gauss()
+
+    def triangular(self, low=0.0, high=1.0, mode=None):
+        """Same inverse cdf trick as random.triangular"""
+        u = self.random()
+        try:
+            c = 0.5 if mode is None else (mode - low) / (high - low)
+        except ZeroDivisionError:
+            return low
+
+        if u > c:
+            u = 1.0 - u
+            c = 1.0 - c
+            low, high = high, low
+
+        return low + (high - low) * sqrt(u * c)
+
+    def randint(self, a, b):
+        """A whole number between a and b, both ends included"""
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+    def choices(self, population, weights=None, k=1):
+        """Weighted picks with replacement, the weights don't need to add up to 1"""
+        n = len(population)
+        if weights is None:
+            return [population[int(self.random() * n)] for i in range(k)]
+
+        cum_weights = list(accumulate(weights))
+        total = cum_weights[-1]
+        return [population[bisect(cum_weights, self.random() * total, 0, n - 1)] for i in range(k)]
+
+    def getrandbits(self, k):
+        """A random whole number with k bits, built out of buffered 64 bit words"""
+        bits = 0
+        for i in range((k + 63) // 64):
+            if not self._words:
+                self._refill('words')
+
+            bits = (bits << 64) | self._words.pop()
+
+        return bits >> (-k % 64)
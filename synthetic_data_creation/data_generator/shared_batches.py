@@ -0,0 +1,89 @@
+"""
+Hands record batches from worker processes to the parent through shared memory instead of pickling rows.
+
+A shard's summary_per_vehicle rows are thousands of dicts with lists of dicts inside. Sending them back from a worker
+pickles every one of those objects, and the parent has to unpickle them all and then turn them into Arrow arrays before
+they can be written. With enough workers the parent can't keep up and adding cores stops helping.
+
+With build(..., batches = True) the worker turns its rows into a record batch itself, writes the batch in Arrow's IPC
+format into a new multiprocessing.shared_memory block, and sends back just the block's name. The parent maps the block
+and reads the batch straight out of it without copying, then lets go of the block once the batch has been used.
+"""
+
+import atexit
+from multiprocessing import shared_memory, resource_tracker
+
+import pyarrow as pa
+
+# Blocks that couldn't be closed yet because something still had a batch out of them, see release()
+_still_mapped = []
+
+
+def track_blocks():
+    """
+    Starts this process's resource tracker before any workers do, so the workers share it instead of starting their own.
+    Blocks the parent release()s are then off the books everywhere, and anything left behind by a crash gets cleaned up.
+    """
+    resource_tracker.ensure_running()
+
+
+def to_shared_memory(batch):
+    """Writes batch into a new shared memory block and hands back the block's name, for from_shared_memory()"""
+    sizer = pa.MockOutputStream()
+    with pa.ipc.new_stream(sizer, batch.schema) as writer:
+        writer.write_batch(batch)
+
+    block = shared_memory.SharedMemory(create=True, size=sizer.size())
+    sink = pa.FixedSizeBufferWriter(pa.py_buffer(block.buf))
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+
+    # Nothing can still be pointing into block.buf when it's closed
+    sink.close()
+    del writer, sink
+    name = block.name
+    block.close()
+
+    return name
+
+
+def from_shared_memory(name):
+    """
+    The batch in a to_shared_memory() block, read in place, along with the block.
+    The batch is only good until the block is release()d.
+    """
+
+    block = shared_memory.SharedMemory(name=name)
+    batch = pa.ipc.open_stream(pa.py_buffer(block.buf)).read_next_batch()
+
+    return batch, block
+
+
+def release(block):
+    """
+    Frees a block once its batch has been used. The name goes away right away, the memory once the block is closed.
+    If something still holds on to the batch the block gets closed on a later release() instead.
+    """
+
+    block.unlink()
+    _still_mapped.append(block)
+
+    for x in list(_still_mapped):
+        try:
+            x.close()
+        except BufferError:
+            continue
+
+        _still_mapped.remove(x)
+
+
+@atexit.register
+def _drop_still_mapped():
+    # Whatever's still out of a block at exit keeps it mapped until the process is gone, without close() complaining
+    for x in _still_mapped:
+        try:
+            x.close()
+        except BufferError:
+            x._buf = x._mmap = None
+
+    _still_mapped.clear()
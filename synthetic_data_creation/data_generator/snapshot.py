@@ -0,0 +1,83 @@
+"""
+A household's features for one extraction, worked out once and shared by every one of its vehicle rows.
+
+household.summary works out a few hundred household level features (driver counts, claim counts, multiline, ...) and
+some of them (annual income, the multiline policies) draw new random numbers every time they're read. A household
+with 3 vehicles puts out 3 rows, and each row used to get its own copy of all of those features.
+
+household_snapshot takes the summary once, groups the claims by vehicle, and hands out vehicle rows that are plain
+dicts of the shared (read only) household features followed by the row's own vehicle columns, in the same column order
+summary_per_vehicle always had, so every row of a household sees the very same features.
+"""
+
+SELECTION = ['vehicle_id', 'vehicle_age', 'vehicle_years_owned', 'vehicle_type']
+
+
+class frozen_features(dict):
+    """A dict that can't be changed after it's made, the household features every vehicle row shares"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('household snapshot features are read only')
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class household_snapshot:
+    """
+    Everything summary_per_vehicle puts out for one household at one point in time.
+    features are the household level columns, vehicles the summary of each vehicle (in household.vehicles order),
+    claims_by_vehicle the claim summaries of each vehicle id and other_claims the rest of the household's claims for
+    each vehicle id. household_vehicles_info is every row's list of the household's vehicles.
+    """
+
+    __slots__ = ('features', 'vehicles', 'claims', 'claims_by_vehicle', 'other_claims', 'household_vehicles_info',
+                 'annual_mileage')
+
+    def __init__(self, household):
+        results = household.summary
+        claims = results.pop('claims_info')
+        vehicles = results.pop('vehicle_info')
+
+        self.features = frozen_features(results)
+        self.vehicles = vehicles
+        self.claims = claims
+        self.claims_by_vehicle = {}
+        self.other_claims = {x['vehicle_id']: [] for x in vehicles}
+        for claim in claims:
+            self.claims_by_vehicle.setdefault(claim['vehicle_id'], []).append(claim)
+            for vehicle_id, others in self.other_claims.items():
+                if vehicle_id != claim['vehicle_id']:
+                    others.append(claim)
+
+        household_vehicles = [{key: x[key] for key in SELECTION} for x in vehicles]
+        self.household_vehicles_info = [
+            [dict(y, this_vehicle_ind=j == i) for j, y in enumerate(household_vehicles)] for i in range(len(vehicles))
+        ]
+
+        # Reported mileage is the real mileage rounded off, give or take a couple thousand
+        vehicle_miles = household.determine_mileage().per_vehicle
+        self.annual_mileage = [
+            max(1000, round(vehicle_miles[i], -3)
+                + household.rng.choices([-2000, -1000, 0, 1000, 2000], [0.1, 0.2, 0.3, 0.2, 0.1])[0])
+            for i in range(len(vehicles))
+        ]
+
+    def vehicle_row(self, i):
+        """The row for the ith vehicle, the household features and then its own columns"""
+        veh = self.vehicles[i]
+        vehicle_id = veh['vehicle_id']
+
+        return {
+            **self.features,
+            **veh,
+            'annual_mileage': self.annual_mileage[i],
+            'vehicle_claims': self.claims_by_vehicle.get(vehicle_id, []),
+            'other_claims': self.other_claims[vehicle_id],
+            'household_vehicles_info': self.household_vehicles_info[i]
+        }
+
+    def vehicle_rows(self):
+        return [self.vehicle_row(i) for i in range(len(self.vehicles))]
@@ -1,7 +1,7 @@
-import random
 from statistics import mean
 from .utils import sig
 
+from .codes import MALE, FEMALE
 from .human import human
 
 
@@ -14,6 +14,8 @@ class spouse(human):
     For all other purposes they are a normal human that drives cars and generates claims.
     """
 
+    __slots__ = ()
+
     def __init__(self, household, so, years_remaining):
         # Pick an age that is slightly lower than the head of house
         age_lowerbound = max(int(so.age/2 + 7), 18, so.age - 10)
@@ -21,7 +23,7 @@ class spouse(human):
         age_mode = so.age-2
 
         if age_lowerbound < age_mode < age_upperbound:
-            target_age = random.triangular(
+            target_age = household.rng.triangular(
                 age_lowerbound, age_upperbound, mode=age_mode)
             
             target_age = int(target_age)
@@ -29,15 +31,15 @@ class spouse(human):
             target_age = so.age
 
         # Decide if the couple is same or different sex
-        straight_couple = random.choices([True, False], weights=[0.9, 0.1])[0]
+        straight_couple = household.rng.choices([True, False], weights=[0.9, 0.1])[0]
         if not straight_couple:
             target_gender = so.gender
         else:
-            target_gender = 'm' if so.gender == 'f' else 'f'
+            target_gender = MALE if so.gender == FEMALE else FEMALE
 
         # Pick an upbringing that is similar to the head of house
         target_upbringing_score = so.upbringing_score + \
-            random.normalvariate(0, 0.5)
+            household.rng.normalvariate(0, 0.5)
 
         super().__init__(household=household,
                          target_age=target_age+years_remaining,
@@ -51,7 +53,7 @@ class spouse(human):
         
         # Men drive a bit more!
         # According to the Federal Highway Administration, female drivers travel about 6,408 miles less than men annually.
-        if self.gender == 'm':
+        if self.gender == MALE:
             mileage *= 1.2
 
         # Unemployed people don't drive as much!
@@ -78,4 +80,4 @@ class spouse(human):
         city_mileage = mileage * 0.55 * self.household.primary_house.city_driving_ratio
         highway_mileage = mileage * 0.45 * self.household.primary_house.highway_driving_ratio
         
-        return (city_mileage, highway_mileage)
\ No newline at end of file
+        return (city_mileage, highway_mileage)
\ No newline at end of file
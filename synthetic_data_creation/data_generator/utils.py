@@ -11,13 +11,13 @@ def sig(x):
     
     return 0.5 * (x / (1 + abs(x)) + 1)
 
-def poisson(lam):
+def poisson(lam, rng=random):
     # Shortcut poisson formula for speed!
 
     p_0 = (exp(-lam))
     p_gt_0 = 1 - p_0
 
-    if p_gt_0 > random.uniform(0, 1):
+    if p_gt_0 > rng.uniform(0, 1):
         return 1
     else:
-        return 0
\ No newline at end of file
+        return 0
@@ -1,7 +1,8 @@
-import random
 from statistics import mean
 from .utils import sig
-from uuid import uuid4
+from .ids import format_id
+from .codes import (VEHICLE_TYPES, PICKUP, SUV, SEDAN, SPORTS_CAR, VAN, COVERAGES, BI_COV, PD_COV, COLL_COV, COMP_COV,
+                    MPC_COV, ERS_COV, UBI_COV, coverage_flag)
 
 
 class vehicle:
@@ -11,34 +12,36 @@ class vehicle:
     The value of the vehicle depreciates as the vehicle ages.
 
     All claims are assigned to exactly 1 vehicle, so a vehicle has a claim history of any claims that it was invovled in.
+
+    vehicle_type is a code from codes.VEHICLE_TYPES and the coverages the vehicle carries are packed into the coverage
+    bitmask (see codes.COVERAGES), bi_cov_ind and friends read and set single bits of it.
     """
 
+    __slots__ = (
+        'household', 'id', 'age', 'years_owned', 'vehicle_type', 'depreciation_rate', 'coverage', 'seats', 'msrp',
+        'male_interest', 'female_interest', 'child_interest', 'parent_interest', 'protection', 'hurt_others',
+        'purchase_price', 'value'
+    )
+
+    bi_cov_ind = coverage_flag('coverage', BI_COV)
+    pd_cov_ind = coverage_flag('coverage', PD_COV)
+    coll_cov_ind = coverage_flag('coverage', COLL_COV)
+    comp_cov_ind = coverage_flag('coverage', COMP_COV)
+    mpc_cov_ind = coverage_flag('coverage', MPC_COV)
+    ers_cov_ind = coverage_flag('coverage', ERS_COV)
+    ubi_cov_ind = coverage_flag('coverage', UBI_COV)
+
     def __init__(self, household, age, vehicle_type):
         self.household = household
-        self.id = uuid4().hex
+        self.id = self.household.new_id()
         self.age = age
         self.years_owned = 0
         self.vehicle_type = vehicle_type
         self.depreciation_rate = 0.95
 
-        self.bi_cov_ind = True
-        self.pd_cov_ind = True
-        self.coll_cov_ind = False
-        self.comp_cov_ind = False
-        self.mpc_cov_ind = False
-        self.ers_cov_ind = False
-        self.ubi_cov_ind = False
+        self.coverage = BI_COV | PD_COV
 
-        if vehicle_type == 'pickup':
-            self.build_pickup()
-        elif vehicle_type == 'suv':
-            self.build_suv()
-        elif vehicle_type == 'sedan':
-            self.build_sedan()
-        elif vehicle_type == 'sports car':
-            self.build_sports_car()
-        elif vehicle_type == 'van':
-            self.build_van()
+        self.build_vehicle_type(vehicle_type)
 
         self.purchase_price = self.msrp * self.depreciation_rate ** age
         self.value = self.purchase_price
@@ -46,6 +49,18 @@ class vehicle:
     def __hash__(self):
         return hash(self.id)
 
+    def build_vehicle_type(self, vehicle_type):
+        if vehicle_type == PICKUP:
+            self.build_pickup()
+        elif vehicle_type == SUV:
+            self.build_suv()
+        elif vehicle_type == SEDAN:
+            self.build_sedan()
+        elif vehicle_type == SPORTS_CAR:
+            self.build_sports_car()
+        elif vehicle_type == VAN:
+            self.build_van()
+
     def build_pickup(self):
         self.seats = 3
         self.msrp = 60_000
@@ -131,81 +146,27 @@ class vehicle:
     @property
     def summary(self):
         results = {
-            'vehicle_id': self.id,
+            'vehicle_id': format_id(self.id),
             'vehicle_age': self.age,
             'vehicle_years_owned': self.years_owned,
-            'vehicle_type': self.vehicle_type,
-            'coverage_bi': self.bi_cov_ind,
-            'coverage_pd': self.pd_cov_ind,
-            'coverage_coll': self.coll_cov_ind,
-            'coverage_comp': self.comp_cov_ind,
-            'coverage_mpc': self.mpc_cov_ind,
-            'coverage_ers': self.ers_cov_ind,
-            'coverage_ubi': self.ubi_cov_ind
+            'vehicle_type': VEHICLE_TYPES[self.vehicle_type],
+            **{f'coverage_{x}': bool(self.coverage & 1 << i) for i, x in enumerate(COVERAGES)}
         }
 
-        claims = [x for x in self.prior_claims if x.paid_indicator and (x.driver_in_force  or x.driver is None)]
-
-        # Count of claims
-        claim_counts = {
-            f'vehicle_claim_cnt_all_{age}': len([x for x in claims if x.how_old == age])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
+        ledger = self.household.claim_ledger
 
-        claim_counts = {
-            f'vehicle_claim_cnt_bi_{age}': len([x for x in claims if x.how_old == age and x.bi == 1])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'vehicle_claim_cnt_pd_{age}': len([x for x in claims if x.how_old == age and x.pd == 1])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'vehicle_claim_cnt_coll_{age}': len([x for x in claims if x.how_old == age and x.coll == 1])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'vehicle_claim_cnt_comp_{age}': len([x for x in claims if x.how_old == age and x.comp == 1])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'vehicle_claim_cnt_mpc_{age}': len([x for x in claims if x.how_old == age and x.mpc == 1])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'vehicle_claim_cnt_ers_{age}': len([x for x in claims if x.how_old == age and x.ers == 1])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
-
-        claim_counts = {
-            f'vehicle_claim_cnt_ubi_{age}': len([x for x in claims if x.how_old == age and x.ubi == 1])
-            for age in range(0, 16)
-        }
-        results.update(**claim_counts)
+        # Count of claims, the ledger keeps these up to date as claims come in
+        for coverage in ['all', 'bi', 'pd', 'coll', 'comp', 'mpc', 'ers', 'ubi']:
+            claim_counts = {
+                f'vehicle_claim_cnt_{coverage}_{age}': ledger.count(coverage, age, self.id)
+                for age in range(0, 16)
+            }
+            results.update(**claim_counts)
 
         # Time Since Claim
-        def min_with_none(x): return min(x) if len(x) > 0 else None
         claim_counts = {
-            'vehicle_claim_time_since_all': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16]),
-            'vehicle_claim_time_since_bi': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.bi == 1]),
-            'vehicle_claim_time_since_pd': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.pd == 1]),
-            'vehicle_claim_time_since_comp': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.comp == 1]),
-            'vehicle_claim_time_since_coll': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.coll == 1]),
-            'vehicle_claim_time_since_mpc': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.mpc == 1]),
-            'vehicle_claim_time_since_ers': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.ers == 1]),
-            'vehicle_claim_time_since_ubi': min_with_none([x.how_old for x in claims if 1 <= x.how_old <= 16 and x.ubi == 1])
+            f'vehicle_claim_time_since_{coverage}': ledger.time_since(coverage, self.id)
+            for coverage in ['all', 'bi', 'pd', 'comp', 'coll', 'mpc', 'ers', 'ubi']
         }
         results.update(**claim_counts)
 